@@ -1,8 +1,63 @@
+import functools
+import json
+import logging
+import os
+import time
+
+import perf
+
+# Timed from the first line, so a cold start shows what the imports cost
+perf.start()
+perf.mark("imports")
+run_t0 = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
 import numpy as np
 
+import model
+
+# Pick up data files the analysts edited since the last rerun; the cached
+# figures and simulations were built on the old numbers. A file that fails
+# to load leaves the last good data in place (warned about below), whatever
+# the loader raised: a bad file must not take every session down with it.
+try:
+    data_error = None
+    if model.refresh():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+except Exception as e:
+    data_error = e
+
+# One snapshot for the whole run, even if another session refreshes meanwhile
+data_snapshot = model.current()
+months_all = list(data_snapshot.months_all)
+in_signups_all, oon_embed_signups_all = data_snapshot.in_signups_all, data_snapshot.oon_embed_signups_all
+active_rescue_rate, inactive_rescue_rate = data_snapshot.active_rescue_rate, data_snapshot.inactive_rescue_rate
+repeat_rate_base, bp_prev_month_feb = data_snapshot.repeat_rate_base, data_snapshot.bp_prev_month_feb
+LTV_MULT_ACT, LTV_MULT_ACTIVE_RESC = data_snapshot.LTV_MULT_ACT, data_snapshot.LTV_MULT_ACTIVE_RESC
+LTV_MULT_INACTIVE_RESC, LTV_MULT_REPEAT = data_snapshot.LTV_MULT_INACTIVE_RESC, data_snapshot.LTV_MULT_REPEAT
+
+from data import CALENDAR_MONTHS
+from model import DEFAULT_INPUTS, INPUT_LABELS, compare_start_months
+from extension import completion_pmf, solve as solve_extension
+from montecarlo import (
+    DISTRIBUTIONS, UNCERTAIN_INPUTS, DEFAULT_SAMPLES,
+    default_spec, recentre, simulate, breakeven_bands,
+)
+from sensitivity import SENSITIVITY_OUTPUTS, SPIDER_POINTS, one_at_a_time, tornado
+from sobol import FACTOR_LABELS, LTV_MULT_SPREAD, NET_VALUE_FACTORS, REV_LTV_FACTORS, sobol_indices
+from surface import COST_AXIS, COMPLETION_AXIS, RECOVERY_AXIS, SURFACE_INPUTS, breakeven_surface, lookup
+from timeline import GROUPS as TIMELINE_GROUPS, GROUP_LABELS as TIMELINE_LABELS, revenue_timeline
+import graph
+import scenario_cache
+import microsim
+import warmup
+
+perf.mark("setup")
+
 st.set_page_config(
     page_title="Braze Migration Risk Model",
     page_icon="📊",
@@ -10,6 +65,28 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# ?trace=1 traces this run (BRAZE_TRACE traces every run): model stages,
+# sections, figure JSON and memory peaks, shown in a panel at the bottom
+TRACE_PARAM = "trace"
+PERF_RUN_KEY = "perf_run"
+if st.query_params.get(TRACE_PARAM, "") not in ("", "0"):
+    perf.trace()
+
+if data_error is not None:
+    st.warning(f"The data files could not be reloaded, so the model still uses the last good version. {data_error}")
+
+# ── Chart payload ───────────────────────────────────────────────────────────
+# Figure JSON is the bulk of what a run sends to the browser. plotly_chart()
+# below adds up the size of each figure it ships (measured once, when the
+# cached figure is built), and the run's total is checked against
+# BRAZE_PAYLOAD_BUDGET_KB when it ends. Streamlit swaps an unchanged message
+# of 10 KB or more for a hash the browser already holds, so this is an upper
+# bound on the chart bytes that cross the wire.
+PAYLOAD_BUDGET_ENV_VAR = "BRAZE_PAYLOAD_BUDGET_KB"
+PAYLOAD_BUDGET_KB = float(os.environ.get(PAYLOAD_BUDGET_ENV_VAR, 192))
+chart_payload = {"bytes": 0, "charts": 0}
+logger = logging.getLogger(__name__)
+
 # ── Color palette ───────────────────────────────────────────────────────────
 COLORS = {
     "red":        "#E63946",
@@ -27,7 +104,22 @@ COLORS = {
     "green":      "#2A9D8F",
 }
 
+# Every figure ships its template inside its JSON. Streamlit's default one
+# also carries defaults for a dozen trace types never drawn here (about half
+# of a small chart's payload), so the charts use a copy trimmed to the types
+# they draw, registered once per process. The browser still themes its
+# placeholder colors as before.
+CHART_TEMPLATE = "braze"
+CHART_TRACE_TYPES = ("bar", "scatter", "heatmap")
+if CHART_TEMPLATE not in pio.templates:
+    _base_template = pio.templates[pio.templates.default]
+    pio.templates[CHART_TEMPLATE] = go.layout.Template(
+        layout=_base_template.layout,
+        data={t: getattr(_base_template.data, t) for t in CHART_TRACE_TYPES if getattr(_base_template.data, t)},
+    )
+
 CHART_LAYOUT = dict(
+    template=CHART_TEMPLATE,
     plot_bgcolor=COLORS["white"],
     paper_bgcolor=COLORS["white"],
     font=dict(family="Inter, -apple-system, sans-serif", size=13, color=COLORS["dark"]),
@@ -40,142 +132,70 @@ CHART_LAYOUT = dict(
     yaxis=dict(gridcolor=COLORS["gray_light"], zeroline=False),
 )
 
+# Section figures are cached on the model outputs they plot. Fragments still
+# run on every full rerun, so this is what makes an unchanged section cheap.
+# cache_resource hands out the same object to every session (st.plotly_chart
+# copies it via to_dict()), so never mutate a figure after building it.
+# sized_figures records each figure's JSON size while it is still private.
+FIGURE_CACHE_SIZE = 64
+
+
+def _json_bytes(fig):
+    # The same serialization st.plotly_chart ships to the browser
+    return len(pio.to_json(fig, validate=False).encode())
+
+
+def sized_figures(builder):
+    """Figure builder wrapper: stamps each returned figure with its JSON size, once, as it is built.
+
+    Goes under @st.cache_resource, so a cached figure is serialized for
+    sizing only on the cache miss that builds it, not on every rerun.
+    """
+    @functools.wraps(builder)
+    def build(*args, **kwargs):
+        out = builder(*args, **kwargs)
+        for fig in out if isinstance(out, tuple) else (out,):
+            if isinstance(fig, go.Figure):
+                fig._payload_bytes = _json_bytes(fig)
+        return out
+    return build
+
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart, adding the figure's JSON size to chart_payload (timed under perf tracing)."""
+    size = getattr(fig, "_payload_bytes", None)
+    with perf.span("plotly_json", "serialize") as args:
+        if args is not None:
+            # Traced runs re-serialize to time it
+            size = _json_bytes(fig)
+            args["bytes"] = size
+            args["traces"] = len(fig.data)
+        elif size is None:
+            size = _json_bytes(fig)
+    chart_payload["bytes"] += size
+    chart_payload["charts"] += 1
+    return st.plotly_chart(fig, **kwargs)
+
 # ── Global CSS ──────────────────────────────────────────────────────────────
-st.markdown(f"""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-
-    /* Base */
-    html, body, [class*="stApp"] {{
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-    }}
-
-    /* Sidebar */
-    section[data-testid="stSidebar"] {{
-        background: {COLORS["gray_light"]};
-        border-right: 1px solid #ddd;
-    }}
-    section[data-testid="stSidebar"] .stSlider label,
-    section[data-testid="stSidebar"] .stNumberInput label {{
-        font-size: 0.82rem;
-        font-weight: 500;
-        color: {COLORS["dark"]};
-    }}
-
-    /* Metric cards */
-    .hero-card {{
-        background: {COLORS["white"]};
-        border: 1px solid #e0e0e0;
-        border-radius: 14px;
-        padding: 24px 16px;
-        text-align: center;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.04);
-        height: 100%;
-    }}
-    .hero-value {{
-        font-size: 1.85rem;
-        font-weight: 700;
-        margin: 6px 0 2px 0;
-        line-height: 1.15;
-    }}
-    .hero-label {{
-        font-size: 0.72rem;
-        font-weight: 600;
-        color: {COLORS["gray"]};
-        text-transform: uppercase;
-        letter-spacing: 0.06em;
-    }}
-    .hero-sub {{
-        font-size: 0.75rem;
-        color: {COLORS["gray"]};
-        margin-top: 4px;
-    }}
-    .text-red   {{ color: {COLORS["red"]}; }}
-    .text-green {{ color: {COLORS["green"]}; }}
-    .text-dark  {{ color: {COLORS["dark"]}; }}
-
-    /* Decision badge */
-    .decision-badge {{
-        display: inline-block;
-        padding: 12px 28px;
-        border-radius: 10px;
-        font-size: 0.95rem;
-        font-weight: 700;
-        letter-spacing: 0.04em;
-        text-transform: uppercase;
-        margin-top: 8px;
-    }}
-    .badge-extend {{
-        background: #D8F3DC; color: #1B4332; border: 2px solid {COLORS["green"]};
-    }}
-    .badge-migrate {{
-        background: #D1ECF1; color: #0C5460; border: 2px solid {COLORS["dark_mid"]};
-    }}
-
-    /* Section headers */
-    .section-num {{
-        display: inline-block;
-        background: {COLORS["dark"]};
-        color: white;
-        width: 28px; height: 28px;
-        border-radius: 50%;
-        text-align: center;
-        line-height: 28px;
-        font-size: 0.8rem;
-        font-weight: 700;
-        margin-right: 8px;
-        vertical-align: middle;
-    }}
-    .section-title {{
-        font-size: 1.2rem;
-        font-weight: 700;
-        color: {COLORS["dark"]};
-        vertical-align: middle;
-    }}
-    .section-desc {{
-        font-size: 0.83rem;
-        color: {COLORS["gray"]};
-        margin: 4px 0 20px 36px;
-        line-height: 1.5;
-    }}
-
-    /* Tables */
-    .clean-table {{
-        width: 100%;
-        border-collapse: collapse;
-        font-size: 0.85rem;
-        margin: 12px 0;
-    }}
-    .clean-table th {{
-        text-align: left;
-        padding: 8px 12px;
-        border-bottom: 2px solid {COLORS["dark"]};
-        font-weight: 600;
-        color: {COLORS["dark"]};
-        font-size: 0.78rem;
-        text-transform: uppercase;
-        letter-spacing: 0.03em;
-    }}
-    .clean-table td {{
-        padding: 7px 12px;
-        border-bottom: 1px solid #eee;
-        color: {COLORS["dark"]};
-    }}
-    .clean-table tr:last-child td {{
-        border-bottom: 2px solid {COLORS["dark"]};
-        font-weight: 600;
-    }}
-    .clean-table .num {{ text-align: right; font-variant-numeric: tabular-nums; }}
-
-    /* Hide streamlit default metric styling tweaks */
-    div[data-testid="stMetricValue"] {{ font-size: 1.1rem; }}
-</style>
-""", unsafe_allow_html=True)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@st.cache_resource(show_spinner=False)
+def _stylesheet():
+    # Read once per process; the palette comes in as CSS variables
+    with open(os.path.join(STATIC_DIR, "app.css"), encoding="utf-8") as f:
+        css = f.read()
+    palette = "".join(f"--{name.replace('_', '-')}: {color}; " for name, color in COLORS.items())
+    return f"<style>\n:root {{ {palette}}}\n{css}</style>"
+
+
+st.markdown(_stylesheet(), unsafe_allow_html=True)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # HEADER
 # ═══════════════════════════════════════════════════════════════════════════
+perf.mark("header")
 st.markdown(f"""
 <div style="margin-bottom: 4px;">
     <span style="font-size: 2rem; font-weight: 700; color: {COLORS['dark']};">Braze Migration</span>
@@ -190,635 +210,1274 @@ st.markdown(f"""
 # ═══════════════════════════════════════════════════════════════════════════
 # SIDEBAR
 # ═══════════════════════════════════════════════════════════════════════════
-with st.sidebar:
-    st.markdown(f"<div style='font-weight:700; font-size:1.05rem; color:{COLORS['dark']}; margin-bottom:12px;'>Model Inputs</div>", unsafe_allow_html=True)
+perf.mark("sidebar")
+# Widget key -> model input. Defaults go through session state instead of
+# value=, so a widget keeps its value when the update mode moves it in or
+# out of the form (which changes its widget id).
+INPUT_WIDGETS = {
+    "completion": "completion_rate", "recovery": "recovery_months", "start_month": "migration_month",
+    "iterable_cost": "iterable_cost", "arpu": "arpu",
+    "in_signup": "in_signup_depression", "oon_signup": "oon_embed_signup_depression",
+    "m0_base": "m0_activation_base", "m1_uplift": "m1_plus_uplift",
+    "m0_dep": "m0_depression", "m1_dep": "m1_plus_depression",
+    "active_dep": "active_rescue_depression", "inactive_dep": "inactive_rescue_depression",
+    "repeat_dep": "repeat_depression_bps",
+}
+# Recovery shape per lever group: widget key -> model input. "custom" is the
+# curve typed into CUSTOM_CURVE_KEY, passed to the model as the scenario's
+# custom_curve.
+SHAPE_WIDGETS = {
+    "signup_shape": "signup_recovery_shape", "activation_shape": "activation_recovery_shape",
+    "rescue_shape": "rescue_recovery_shape", "repeat_shape": "repeat_recovery_shape",
+}
+SHAPE_OPTIONS = model.RECOVERY_SHAPES + ("custom",)  # "custom" sits at model.CUSTOM_SHAPE
+CUSTOM_CURVE_KEY = "custom_recovery"
+CUSTOM_CURVE_DEFAULT = "0, 10, 50, 90"
+UPDATE_MODES = {
+    "live": "Live",
+    "debounced": "Debounced",
+    "apply": "Apply",
+}
+DEBOUNCE_S = 0.35
 
-    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:16px 0 8px 0;'>Core Assumptions</div>", unsafe_allow_html=True)
+for key, name in INPUT_WIDGETS.items():
+    st.session_state.setdefault(key, DEFAULT_INPUTS[name])
+for key in SHAPE_WIDGETS:
+    st.session_state.setdefault(key, SHAPE_OPTIONS[0])
+st.session_state.setdefault(CUSTOM_CURVE_KEY, CUSTOM_CURVE_DEFAULT)
 
-    completion_rate = st.slider(
-        "% of IP Warmup Completed",
-        min_value=0, max_value=100, value=50, step=5,
-        help="Expected completion level of IP warmup process (higher = better deliverability)"
-    )
-    failure_prob = (100 - completion_rate) / 100
 
-    recovery_months = st.slider(
-        "Recovery Window (months)",
-        min_value=1, max_value=6, value=3, step=1,
-        help="Months to recover from a failed warmup"
-    )
+def _keep_inputs():
+    for key in (*INPUT_WIDGETS, *SHAPE_WIDGETS, CUSTOM_CURVE_KEY):
+        st.session_state[key] = st.session_state[key]
 
-    iterable_cost = st.number_input(
-        "Iterable Extension Cost ($)",
-        min_value=0, max_value=50_000_000, value=500_000, step=100_000,
-        help="Cost to keep Iterable running in parallel"
-    )
 
-    arpu = st.number_input(
-        "ARPU ($/month)", min_value=1.0, max_value=100.0, value=30.0, step=1.0
-    )
+def _custom_curve(text):
+    """model.recovery_curve() of a comma-separated list of % recovered at each month start, or None."""
+    try:
+        return model.recovery_curve([float(v) / 100 for v in text.replace(",", " ").split()])
+    except ValueError:
+        return None
+
 
-    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>1 · Signup Depression</div>", unsafe_allow_html=True)
-    st.caption("How much signup volume drops during failure. 1.0 = no impact.")
+with st.sidebar:
+    st.markdown(f"<div style='font-weight:700; font-size:1.05rem; color:{COLORS['dark']}; margin-bottom:12px;'>Model Inputs</div>", unsafe_allow_html=True)
 
-    in_signup_depression = st.slider(
-        "IN Signups", min_value=0.0, max_value=1.0, value=0.95, step=0.05, format="%.2f",
-        help="IN signups are heavily email-dependent (drip campaigns, reminders)",
-        key="in_signup"
+    update_mode = st.radio(
+        "Update", UPDATE_MODES, horizontal=True, key="update_mode", format_func=UPDATE_MODES.get,
+        on_change=_keep_inputs,
+        help="Live reruns on every change. Debounced waits for a pause and drops superseded runs. "
+             "Apply batches edits until you press Apply.",
     )
-    oon_embed_signup_depression = st.slider(
-        "OON / Embed Signups", min_value=0.0, max_value=1.0, value=1.0, step=0.05, format="%.2f",
-        help="OON from performance marketing; Embed from partner flows — minimal email dependency",
-        key="oon_signup"
+    run_stats_slot = st.empty()
+    merge_charts = st.toggle(
+        "One figure for sections 1–4", key="merge_charts",
+        help="Draw the signup, activation, rescue and repeat bar charts as rows of a single figure "
+             "after section 4: one chart payload instead of four.",
     )
 
-    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>2 · Activation Depression</div>", unsafe_allow_html=True)
-    st.caption("Post-signup email nudges affect ALL channels.")
+    # In apply mode edits stay in the browser until submit: one rerun per batch
+    inputs_box = st.form("model_inputs", border=False) if update_mode == "apply" else st.container()
+    with inputs_box:
+        st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:16px 0 8px 0;'>Core Assumptions</div>", unsafe_allow_html=True)
+
+        completion_rate = st.slider(
+            "% of IP Warmup Completed",
+            min_value=0, max_value=100, step=5,
+            help="Expected completion level of IP warmup process (higher = better deliverability)",
+            key="completion"
+        )
+
+        recovery_months = st.slider(
+            "Recovery Window (months)",
+            min_value=1, max_value=6, step=1,
+            help="Months to recover from a failed warmup",
+            key="recovery"
+        )
+
+        shape_cols = st.columns(2)
+        shapes = {}
+        for i, (key, label) in enumerate(zip(SHAPE_WIDGETS, ("Signups", "Activation", "Rescue", "Repeat"))):
+            shapes[SHAPE_WIDGETS[key]] = shape_cols[i % 2].selectbox(
+                f"{label} Recovery", SHAPE_OPTIONS, format_func=str.capitalize, key=key,
+                help="How the lever climbs back to baseline over the window: linear, exponential "
+                     "(fast rebound), logistic (S-curve), step (flat until the window ends) or custom",
+            )
+        custom_curve = st.text_input(
+            "Custom Recovery Curve (% recovered by month)", key=CUSTOM_CURVE_KEY,
+            help="Share of the way back to baseline at the start of each window month, e.g. "
+                 "\"0, 10, 50, 90\" for a 4-month curve; other window lengths stretch it",
+        )
+
+        migration_month = st.select_slider(
+            "Migration Start Month", options=range(len(months_all)), format_func=months_all.__getitem__,
+            help="Month the cutover (and any failed warmup) begins; signup volume and user growth follow the calendar",
+            key="start_month"
+        )
+
+        iterable_cost = st.number_input(
+            "Iterable Extension Cost ($)",
+            min_value=0, max_value=50_000_000, step=100_000,
+            help="Cost to keep Iterable running in parallel",
+            key="iterable_cost"
+        )
+
+        arpu = st.number_input(
+            "ARPU ($/month)", min_value=1.0, max_value=100.0, step=1.0, key="arpu"
+        )
+
+        st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>1 · Signup Depression</div>", unsafe_allow_html=True)
+        st.caption("How much signup volume drops during failure. 1.0 = no impact.")
+
+        in_signup_depression = st.slider(
+            "IN Signups", min_value=0.0, max_value=1.0, step=0.05, format="%.2f",
+            help="IN signups are heavily email-dependent (drip campaigns, reminders)",
+            key="in_signup"
+        )
+        oon_embed_signup_depression = st.slider(
+            "OON / Embed Signups", min_value=0.0, max_value=1.0, step=0.05, format="%.2f",
+            help="OON from performance marketing; Embed from partner flows — minimal email dependency",
+            key="oon_signup"
+        )
+
+        st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>2 · Activation Depression</div>", unsafe_allow_html=True)
+        st.caption("Post-signup email nudges affect ALL channels.")
+
+        m0_activation_base = st.slider(
+            "M0 Activation Rate (baseline)", min_value=0.50, max_value=0.80,
+            step=0.01, format="%.2f", key="m0_base"
+        )
+        m1_plus_uplift = st.slider(
+            "M1+ Uplift (pp)", min_value=0.0, max_value=0.25,
+            step=0.01, format="%.2f", help="Email-driven late activation uplift", key="m1_uplift"
+        )
+        m0_depression = st.slider(
+            "M0 Depression (all channels)", min_value=0.0, max_value=1.0,
+            step=0.05, format="%.2f", key="m0_dep"
+        )
+        m1_plus_depression = st.slider(
+            "M1+ Depression (all channels)", min_value=0.0, max_value=1.0,
+            step=0.05, format="%.2f", help="Nurture emails are the primary late-activation driver", key="m1_dep"
+        )
+
+        st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>3 · Rescue Depression</div>", unsafe_allow_html=True)
+        st.caption("Rescue emails target ALL users regardless of signup channel.")
+
+        active_rescue_depression = st.slider(
+            "Active Rescue", min_value=0.0, max_value=1.0,
+            step=0.05, format="%.2f", key="active_dep"
+        )
+        inactive_rescue_depression = st.slider(
+            "Inactive Rescue", min_value=0.0, max_value=1.0,
+            step=0.05, format="%.2f", help="Win-back emails are ~100% of the inactive rescue lever",
+            key="inactive_dep"
+        )
+
+        st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>4 · Repeat Rate</div>", unsafe_allow_html=True)
+        st.caption("~70% autopay — only ~30% manual-pay users are email-sensitive. SMS/push still active.")
+
+        repeat_depression_bps = st.slider(
+            "Repeat Rate Depression (bps)",
+            min_value=0, max_value=200, step=10,
+            help="Basis point drop in repeat rate. 50 bps = 0.50pp (85.3% → 84.8%)",
+            key="repeat_dep"
+        )
+
+        if update_mode == "apply":
+            st.form_submit_button("Apply", type="primary", use_container_width=True)
+
+    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>5 · Uncertainty</div>", unsafe_allow_html=True)
+    st.caption("Replace point estimates with distributions and simulate.")
+
+    mc_mode = st.toggle("Monte Carlo mode", value=False, key="mc_mode")
+    mc_specs = {}
+    if mc_mode:
+        mc_samples = st.select_slider(
+            "Samples", options=[100_000, 200_000, 500_000, 1_000_000], value=DEFAULT_SAMPLES,
+            format_func=lambda n: f"{n:,}", key="mc_samples"
+        )
+        mc_levers = [
+            ("completion_rate",            "% of IP Warmup Completed", completion_rate,            5.0),
+            ("in_signup_depression",       "IN Signups",               in_signup_depression,       0.05),
+            ("m0_depression",              "M0 Depression",            m0_depression,              0.05),
+            ("m1_plus_depression",         "M1+ Depression",           m1_plus_depression,         0.05),
+            ("active_rescue_depression",   "Active Rescue",            active_rescue_depression,   0.05),
+            ("inactive_rescue_depression", "Inactive Rescue",          inactive_rescue_depression, 0.05),
+            ("repeat_depression_bps",      "Repeat Rate Depression",   repeat_depression_bps,      10.0),
+        ]
+        with st.expander("Distributions", expanded=False):
+            st.caption("Mode = the point estimate above. Beta uses PERT shape.")
+            for name, label, mode, step in mc_levers:
+                lo, hi = UNCERTAIN_INPUTS[name]
+                _, d_lo, _, d_hi = default_spec(name, float(mode))
+                kind = st.selectbox(label, DISTRIBUTIONS, key=f"mc_kind_{name}")
+                low, high = st.slider(
+                    f"{label} bounds", min_value=lo, max_value=hi, value=(d_lo, d_hi), step=step,
+                    key=f"mc_bounds_{name}", label_visibility="collapsed"
+                )
+                mc_specs[name] = (kind, low, float(mode), high)
+
+    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>6 · Warmup Simulation</div>", unsafe_allow_html=True)
+    st.caption("Derive failure probability and severity from simulated daily warmup paths.")
+
+    warmup_mode = st.toggle("Simulate warmup", value=False, key="warmup_mode",
+                            help="Overrides % of IP Warmup Completed and scales the depression levers")
+    warmup_slot = st.empty()
+    if warmup_mode:
+        warmup_ips = st.slider("Sending IPs", min_value=1, max_value=8, value=warmup.DEFAULT_IPS, key="warmup_ips")
+        warmup_days = st.slider("Days to cutover", min_value=60, max_value=120, step=5,
+                                value=warmup.DEFAULT_DAYS, key="warmup_days")
+        warmup_ramp = st.slider("Ramp length (days)", min_value=30, max_value=120, step=5,
+                                value=warmup.DEFAULT_RAMP_DAYS, key="warmup_ramp",
+                                help="Clean days each IP needs to reach full volume; capped at the days to cutover")
+        warmup_stagger = st.slider("IP start stagger (days)", min_value=0, max_value=14, value=0, key="warmup_stagger")
+        warmup_paths = st.select_slider(
+            "Paths", options=[500, 1_000, 2_000, 5_000], value=warmup.DEFAULT_PATHS,
+            format_func=lambda n: f"{n:,}", key="warmup_paths"
+        )
 
-    m0_activation_base = st.slider(
-        "M0 Activation Rate (baseline)", min_value=0.50, max_value=0.80, value=0.6512,
-        step=0.01, format="%.2f", key="m0_base"
-    )
-    m1_plus_uplift = st.slider(
-        "M1+ Uplift (pp)", min_value=0.0, max_value=0.25, value=0.12,
-        step=0.01, format="%.2f", help="Email-driven late activation uplift", key="m1_uplift"
-    )
-    m0_depression = st.slider(
-        "M0 Depression (all channels)", min_value=0.0, max_value=1.0, value=0.95,
-        step=0.05, format="%.2f", key="m0_dep"
-    )
-    m1_plus_depression = st.slider(
-        "M1+ Depression (all channels)", min_value=0.0, max_value=1.0, value=0.95,
-        step=0.05, format="%.2f", help="Nurture emails are the primary late-activation driver", key="m1_dep"
-    )
 
-    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>3 · Rescue Depression</div>", unsafe_allow_html=True)
-    st.caption("Rescue emails target ALL users regardless of signup channel.")
+# ═══════════════════════════════════════════════════════════════════════════
+# MODEL
+# ═══════════════════════════════════════════════════════════════════════════
+perf.mark("model")
+model_months = months_all[migration_month : migration_month + recovery_months]
+while len(model_months) < recovery_months:
+    model_months.append(f"M+{len(model_months)}")
+
+shape_indices = {name: SHAPE_OPTIONS.index(shape) for name, shape in shapes.items()}
+scenario_curve = {}
+if "custom" in shapes.values():
+    curve = _custom_curve(custom_curve)
+    if curve is None:
+        st.sidebar.error("Custom recovery curve needs numbers between 0 and 100; using linear.")
+        shape_indices = {name: 0 if shape == "custom" else shape_indices[name] for name, shape in shapes.items()}
+    else:
+        scenario_curve["custom_curve"] = curve
+
+inputs = dict(
+    completion_rate=completion_rate, recovery_months=recovery_months,
+    migration_month=migration_month, iterable_cost=iterable_cost, arpu=arpu,
+    in_signup_depression=in_signup_depression,
+    oon_embed_signup_depression=oon_embed_signup_depression,
+    m0_activation_base=m0_activation_base, m1_plus_uplift=m1_plus_uplift,
+    m0_depression=m0_depression, m1_plus_depression=m1_plus_depression,
+    active_rescue_depression=active_rescue_depression,
+    inactive_rescue_depression=inactive_rescue_depression,
+    repeat_depression_bps=repeat_depression_bps,
+    **shape_indices,
+    **scenario_curve,
+)
+
 
-    active_rescue_depression = st.slider(
-        "Active Rescue", min_value=0.0, max_value=1.0, value=0.95,
-        step=0.05, format="%.2f", key="active_dep"
+@st.cache_data(show_spinner="Simulating warmup paths…")
+def warmup_simulation(n_ips, days, ramp_days, stagger_days, n_paths):
+    return warmup.simulate(n_ips=n_ips, days=days, ramp_days=ramp_days,
+                           stagger_days=stagger_days, n_paths=n_paths)
+
+
+if warmup_mode:
+    warmup_result = warmup_simulation(warmup_ips, warmup_days, min(warmup_ramp, warmup_days),
+                                      warmup_stagger, warmup_paths)
+    inputs = warmup.apply(warmup_result, inputs)
+    completion_rate = inputs["completion_rate"]
+    repeat_depression_bps = inputs["repeat_depression_bps"]
+    # Move each distribution, bounds included, onto the simulated point estimate
+    mc_specs = {name: recentre(name, spec, float(inputs[name])) for name, spec in mc_specs.items()}
+    warmup_slot.caption(
+        f"{warmup_result['failure_prob']:.0%} of {warmup_paths:,} paths fail · "
+        f"{warmup_result['severity']:.0%} volume shortfall when failing → "
+        f"{completion_rate}% completion, depressions ×{warmup_result['severity'] / warmup.REFERENCE_SEVERITY:.2f}"
     )
-    inactive_rescue_depression = st.slider(
-        "Inactive Rescue", min_value=0.0, max_value=1.0, value=0.95,
-        step=0.05, format="%.2f", help="Win-back emails are ~100% of the inactive rescue lever",
-        key="inactive_dep"
+if update_mode == "debounced":
+    # A newer rerun request aborts this run at its next element, so waiting
+    # here collapses a burst of slider steps into one model run
+    time.sleep(DEBOUNCE_S)
+
+run_stats = st.session_state.setdefault("run_stats", {"runs": 0, "completed": 0, "model_updates": 0, "inputs": None})
+run_stats["runs"] += 1
+if inputs != run_stats["inputs"]:
+    run_stats["model_updates"] += 1
+    run_stats["inputs"] = inputs
+
+# Identical inputs from any session share one result. On a miss, the
+# per-session dependency graph recomputes only the nodes downstream of the
+# inputs that changed since this session's last run.
+if "model_graph" not in st.session_state:
+    st.session_state["model_graph"] = graph.new()
+with perf.span("scenario_cache", "model") as trace_args:
+    cache_key = scenario_cache.key(inputs, data_snapshot)
+    out = scenario_cache.get(cache_key)
+    if trace_args is not None:
+        trace_args["hit"] = out is not None
+recomputed = None
+if out is None:
+    out = graph.scenario(st.session_state["model_graph"], **inputs, data=data_snapshot)
+    scenario_cache.put(cache_key, out)
+    recomputed = graph.last_log(st.session_state["model_graph"])
+
+with st.sidebar.expander("Model Graph"):
+    if recomputed is None:
+        st.caption("Served from the shared result cache; no nodes recomputed")
+    else:
+        st.caption(f"{len(recomputed)} of {len(model.NODES)} nodes recomputed on this rerun")
+    if recomputed:
+        st.markdown("| Node | µs |\n|---|--:|\n" + "\n".join(
+            f"| `{name}` | {seconds * 1e6:,.0f} |" for name, seconds in sorted(recomputed, key=lambda r: -r[1])
+        ))
+with st.sidebar.expander("Shared Result Cache"):
+    cache_stats = scenario_cache.stats()
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    st.caption(
+        f"{cache_stats['entries']:,} entries · {cache_stats['bytes'] / 2**20:,.1f} of "
+        f"{cache_stats['max_bytes'] / 2**20:,.0f} MB  \n"
+        f"{cache_stats['hits']:,} hits · {cache_stats['misses']:,} misses · {cache_stats['evictions']:,} evictions"
+        + (f" · {cache_stats['hits'] / lookups:.0%} hit rate" if lookups else "")
     )
+# Per-month columns as a struct of arrays, one row per model month
+monthly = {"month": np.array(model_months), **{col: v for col, v in out.items() if np.ndim(v) == 1}}
 
-    st.markdown(f"<div style='font-weight:600; font-size:0.82rem; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.05em; margin:20px 0 4px 0;'>4 · Repeat Rate</div>", unsafe_allow_html=True)
-    st.caption("~70% autopay — only ~30% manual-pay users are email-sensitive. SMS/push still active.")
 
-    repeat_depression_bps = st.slider(
-        "Repeat Rate Depression (bps)",
-        min_value=0, max_value=200, value=50, step=10,
-        help="Basis point drop in repeat rate. 50 bps = 0.50pp (85.3% → 84.8%)",
-        key="repeat_dep"
-    )
+def _series(monthly, *cols):
+    """Hashable figure-cache key: the month labels plus each column as a tuple."""
+    return (tuple(monthly["month"].tolist()),) + tuple(tuple(monthly[c].tolist()) for c in cols)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# DATA
+# TOP-LINE: REVENUE IMPACT IF FAILURE
 # ═══════════════════════════════════════════════════════════════════════════
-months_all = ["Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-in_signups_all = [90763, 87470, 89865, 90257, 94113, 99681, 103436, 113150, 112419, 106892, 102895]
-oon_embed_signups_all = [44133, 42530, 43694, 43884, 45760, 48466, 50292, 55015, 54659, 51971, 50028]
+@st.fragment
+def hero_cards(out, completion_rate, recovery_months, iterable_cost, arpu):
+    rev_in_month = out["rev_in_month"]
+    rev_ltv = out["rev_ltv"]
+    expected_revenue_impact = out["expected_revenue_impact"]
+    expected_in_month_impact = out["expected_in_month_impact"]
+    net_value_of_extension = out["net_value_of_extension"]
+    failure_prob = (100 - completion_rate) / 100
 
-migration_idx = 3  # May
-model_months = months_all[migration_idx : migration_idx + recovery_months]
-in_signups_model = in_signups_all[migration_idx : migration_idx + recovery_months]
-oon_embed_signups_model = oon_embed_signups_all[migration_idx : migration_idx + recovery_months]
+    st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.78rem; font-weight:600; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.06em; margin-bottom:10px;'>If Failure Occurs — Total Revenue Impact ({recovery_months}mo window)</div>", unsafe_allow_html=True)
 
-while len(model_months) < recovery_months:
-    model_months.append(f"M+{len(model_months)}")
-    in_signups_model.append(in_signups_model[-1])
-    oon_embed_signups_model.append(oon_embed_signups_model[-1])
+    rv1, rv2 = st.columns(2)
+    with rv1:
+        st.markdown(f"""<div class="hero-card">
+            <div class="hero-label">In-Month Revenue Lost</div>
+            <div class="hero-value text-dark">-${rev_in_month:,.0f}</div>
+            <div class="hero-sub">BPs lost &times; ${arpu:.0f} ARPU, summed over {recovery_months}mo</div>
+        </div>""", unsafe_allow_html=True)
+    with rv2:
+        st.markdown(f"""<div class="hero-card" style="border: 2px solid {COLORS['dark']};">
+            <div class="hero-label">LTV-Weighted Revenue Lost</div>
+            <div class="hero-value text-red">-${rev_ltv:,.0f}</div>
+            <div class="hero-sub">Uses 12-month retention curves per metric type</div>
+        </div>""", unsafe_allow_html=True)
+
+    # ── Expected value row (probability-weighted) ──
+    st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.78rem; font-weight:600; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.06em; margin-bottom:10px;'>Probability-Weighted Expected Impact ({completion_rate}% warmup completion)</div>", unsafe_allow_html=True)
+
+    e1, e2 = st.columns(2)
+    with e1:
+        st.markdown(f"""<div class="hero-card">
+            <div class="hero-label">Expected In-Month Revenue at Risk</div>
+            <div class="hero-value text-dark">${abs(expected_in_month_impact):,.0f}</div>
+            <div class="hero-sub">{completion_rate}% complete &rarr; {failure_prob:.0%} impact &times; ${rev_in_month:,.0f}</div>
+        </div>""", unsafe_allow_html=True)
+    with e2:
+        st.markdown(f"""<div class="hero-card">
+            <div class="hero-label">Expected LTV Revenue at Risk</div>
+            <div class="hero-value text-red">${abs(expected_revenue_impact):,.0f}</div>
+            <div class="hero-sub">{completion_rate}% complete &rarr; {failure_prob:.0%} impact &times; ${rev_ltv:,.0f}</div>
+        </div>""", unsafe_allow_html=True)
+
+    # ── Decision row ──
+    st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
+
+    c1, c2, c3 = st.columns([1.1, 1.1, 0.8])
+
+    with c1:
+        st.markdown(f"""<div class="hero-card">
+            <div class="hero-label">Iterable Extension Cost</div>
+            <div class="hero-value text-dark">${iterable_cost:,.0f}</div>
+            <div class="hero-sub">Cost to keep as safety net</div>
+        </div>""", unsafe_allow_html=True)
+
+    with c2:
+        val_color = "text-green" if net_value_of_extension > 0 else "text-red"
+        st.markdown(f"""<div class="hero-card">
+            <div class="hero-label">Net Value of Extending</div>
+            <div class="hero-value {val_color}">${net_value_of_extension:,.0f}</div>
+            <div class="hero-sub">Expected LTV risk &minus; extension cost</div>
+        </div>""", unsafe_allow_html=True)
+
+    with c3:
+        if net_value_of_extension > 0:
+            st.markdown("""<div class="hero-card" style="display:flex;align-items:center;justify-content:center;">
+                <div class="decision-badge badge-extend">Extend<br>Iterable</div>
+            </div>""", unsafe_allow_html=True)
+        else:
+            st.markdown("""<div class="hero-card" style="display:flex;align-items:center;justify-content:center;">
+                <div class="decision-badge badge-migrate">Proceed with<br>Migration</div>
+            </div>""", unsafe_allow_html=True)
+
+
+perf.mark("hero_cards")
+hero_cards(out, completion_rate, recovery_months, iterable_cost, arpu)
 
-total_signups_model = [i + o for i, o in zip(in_signups_model, oon_embed_signups_model)]
 
-active_users_feb = 303809
-inactive_users_feb = 1_120_177
-active_rescue_rate = 0.2591
-inactive_rescue_rate = 0.0113
+@st.cache_resource(show_spinner="Warming the shared result cache…")
+def _prewarm_scenario_cache():
+    # Once per process (and again after a data refresh clears both caches)
+    return scenario_cache.prewarm()
 
-# Repeat rate data
-repeat_rates_6mo = [0.8632, 0.8503, 0.8687, 0.8360, 0.8473, 0.8521]  # Feb–Sep 2025 trailing 6mo
-repeat_rate_base = sum(repeat_rates_6mo) / len(repeat_rates_6mo)       # ~85.29%
-bp_prev_month_feb = 1_100_855  # Feb 2026 actual
 
-def grow(base, months_from_feb, rate=0.03):
-    return base * (1 + rate) ** months_from_feb
+# Only after the hero, so the cards and decision badge reach the browser first
+perf.mark("cache_prewarm")
+if scenario_cache.prewarm_requested():
+    _prewarm_scenario_cache()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# MODEL
+# BREAKEVEN
 # ═══════════════════════════════════════════════════════════════════════════
-def compute_monthly_impact(mi, in_signup, oon_embed_signup):
-    rp = 0.0 if recovery_months == 1 else mi / recovery_months
-
-    eff_in_signup = in_signup_depression + (1.0 - in_signup_depression) * rp
-    eff_oon_signup = oon_embed_signup_depression + (1.0 - oon_embed_signup_depression) * rp
-    eff_m0 = m0_depression + (1.0 - m0_depression) * rp
-    eff_m1 = m1_plus_depression + (1.0 - m1_plus_depression) * rp
-    eff_active_rescue = active_rescue_depression + (1.0 - active_rescue_depression) * rp
-    eff_inactive_rescue = inactive_rescue_depression + (1.0 - inactive_rescue_depression) * rp
-
-    in_signup_loss = in_signup * (eff_in_signup - 1)
-    oon_signup_loss = oon_embed_signup * (eff_oon_signup - 1)
-    eff_in_signups = in_signup * eff_in_signup
-    eff_oon_signups = oon_embed_signup * eff_oon_signup
-
-    in_m0_loss = eff_in_signups * m0_activation_base * eff_m0 - in_signup * m0_activation_base
-    oon_m0_loss = eff_oon_signups * m0_activation_base * eff_m0 - oon_embed_signup * m0_activation_base
-    in_m1_loss = eff_in_signups * m1_plus_uplift * eff_m1 - in_signup * m1_plus_uplift
-    oon_m1_loss = eff_oon_signups * m1_plus_uplift * eff_m1 - oon_embed_signup * m1_plus_uplift
-
-    months_from_feb = migration_idx + mi
-    active_base = grow(active_users_feb, months_from_feb)
-    active_rescue_loss = active_base * active_rescue_rate * (eff_active_rescue - 1)
-    inactive_base = grow(inactive_users_feb, months_from_feb)
-    inactive_rescue_loss = inactive_base * inactive_rescue_rate * (eff_inactive_rescue - 1)
-
-    return {
-        "month": model_months[mi],
-        "in_signup_loss": in_signup_loss, "oon_signup_loss": oon_signup_loss,
-        "total_signup_loss": in_signup_loss + oon_signup_loss,
-        "in_m0_loss": in_m0_loss, "oon_m0_loss": oon_m0_loss,
-        "in_m1_loss": in_m1_loss, "oon_m1_loss": oon_m1_loss,
-        "total_activation_loss": in_m0_loss + oon_m0_loss + in_m1_loss + oon_m1_loss,
-        "active_rescue_loss": active_rescue_loss, "inactive_rescue_loss": inactive_rescue_loss,
-        "total_rescue_loss": active_rescue_loss + inactive_rescue_loss,
-        "eff_in_signup": eff_in_signup, "eff_oon_signup": eff_oon_signup,
-        "eff_m0": eff_m0, "eff_m1": eff_m1,
-        "eff_active_rescue": eff_active_rescue, "eff_inactive_rescue": eff_inactive_rescue,
-        "in_signup": in_signup, "oon_signup": oon_embed_signup,
-    }
-
-results = [compute_monthly_impact(i, in_signups_model[i], oon_embed_signups_model[i])
-           for i in range(recovery_months)]
-df = pd.DataFrame(results)
-
-# ── Repeat Rate Model ────────────────────────────────────────────────────────
-repeat_losses = []
-for mi in range(recovery_months):
-    rp = 0.0 if recovery_months == 1 else mi / recovery_months
-    eff_dep_bps = repeat_depression_bps * (1.0 - rp)
-    months_from_feb = migration_idx + mi
-    bp_prev = bp_prev_month_feb * (1.03 ** months_from_feb)
-    lost = bp_prev * (eff_dep_bps / 10000)
-    repeat_losses.append({
-        "repeat_bp_loss": -lost,
-        "bp_prev_month": bp_prev,
-        "eff_repeat_dep_bps": eff_dep_bps,
-        "eff_repeat_ratio": 1.0 - (eff_dep_bps / 10000) / repeat_rate_base,
-    })
-df_rpt = pd.DataFrame(repeat_losses)
-for col in df_rpt.columns:
-    df[col] = df_rpt[col].values
-
-total_activation_bp_loss = df["total_activation_loss"].sum()
-total_active_rescue_loss = df["active_rescue_loss"].sum()
-total_inactive_rescue_loss = df["inactive_rescue_loss"].sum()
-total_rescue_bp_loss = df["total_rescue_loss"].sum()
-total_repeat_bp_loss = df["repeat_bp_loss"].sum()
-total_bp_loss = total_activation_bp_loss + total_rescue_bp_loss + total_repeat_bp_loss
-
-# ── Retention curves & LTV multipliers ──────────────────────────────────────
-# Activation: avg of Apr–Jun 2024 cohorts with 12mo data (M0–M12)
-ACTIVATION_RETENTION = [1.0, 0.751, 0.662, 0.611, 0.574, 0.543, 0.513, 0.486, 0.465, 0.449, 0.435, 0.420, 0.400]
-# Active rescue retention (M0–M12)
-ACTIVE_RESCUE_RETENTION = [1.0, 0.6554, 0.5387, 0.4640, 0.3806, 0.3220, 0.2861, 0.2661, 0.2461, 0.2261, 0.2061, 0.1861, 0.1661]
-# Inactive rescue retention (M0–M12)
-INACTIVE_RESCUE_RETENTION = [1.0, 0.6844, 0.5544, 0.4706, 0.4055, 0.3625, 0.3180, 0.2980, 0.2780, 0.2580, 0.2380, 0.2180, 0.1980]
-
-LTV_MULT_ACT = sum(ACTIVATION_RETENTION)              # ~7.31
-LTV_MULT_ACTIVE_RESC = sum(ACTIVE_RESCUE_RETENTION)    # ~4.95
-LTV_MULT_INACTIVE_RESC = sum(INACTIVE_RESCUE_RETENTION) # ~5.28
-
-# Repeat rate uses activation retention curve as LTV proxy (existing retained users)
-LTV_MULT_REPEAT = LTV_MULT_ACT
-
-# ── Three revenue views ─────────────────────────────────────────────────────
-rev_in_month = abs(total_bp_loss) * arpu
-rev_ltv = (abs(total_activation_bp_loss) * arpu * LTV_MULT_ACT +
-           abs(total_active_rescue_loss) * arpu * LTV_MULT_ACTIVE_RESC +
-           abs(total_inactive_rescue_loss) * arpu * LTV_MULT_INACTIVE_RESC +
-           abs(total_repeat_bp_loss) * arpu * LTV_MULT_REPEAT)
-# Per-metric LTV revenue (for section tables)
-act_rev_ltv = abs(total_activation_bp_loss) * arpu * LTV_MULT_ACT
-active_resc_rev_ltv = abs(total_active_rescue_loss) * arpu * LTV_MULT_ACTIVE_RESC
-inactive_resc_rev_ltv = abs(total_inactive_rescue_loss) * arpu * LTV_MULT_INACTIVE_RESC
-repeat_rev_ltv = abs(total_repeat_bp_loss) * arpu * LTV_MULT_REPEAT
-
-# Decision uses LTV as primary
-revenue_impact_if_failure = rev_ltv
-expected_revenue_impact = revenue_impact_if_failure * failure_prob
-expected_in_month_impact = rev_in_month * failure_prob
-net_value_of_extension = abs(expected_revenue_impact) - iterable_cost
+BREAKEVEN_PROBS = np.arange(0, 1.01, 0.05)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_monte_carlo(inputs, specs, n_samples):
+    sim = simulate(inputs, specs, n_samples)
+    # Raw samples stay server-side; only the summaries are cached and charted
+    return {k: v for k, v in sim.items() if k not in ("rev_ltv", "net_value_of_extension")}
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def breakeven_figure(rev_ltv, iterable_cost, failure_prob, breakeven_prob_ltv, rev_ltv_pct=None):
+    probs = BREAKEVEN_PROBS
+    fig_be = go.Figure()
+    if rev_ltv_pct is not None:
+        bands = breakeven_bands(dict(rev_ltv_pct), probs)
+        for lo, hi, opacity in [(5, 95, 0.12), (25, 75, 0.22)]:
+            fig_be.add_trace(go.Scatter(
+                x=np.concatenate([probs, probs[::-1]]), y=np.concatenate([bands[hi], bands[lo][::-1]]),
+                fill="toself", fillcolor=COLORS["red"], opacity=opacity, line=dict(width=0),
+                name=f"P{lo}–P{hi}", hoverinfo="skip",
+            ))
+    fig_be.add_trace(go.Scatter(
+        x=probs, y=[p * rev_ltv for p in probs], mode="lines", name="LTV-Weighted",
+        line=dict(color=COLORS["red"], width=3)
+    ))
+    fig_be.add_hline(y=iterable_cost, line_dash="dash", line_color=COLORS["green"], line_width=2.5,
+                      annotation_text=f"Iterable: ${iterable_cost/1e6:.1f}M",
+                      annotation_position="top right",
+                      annotation_font=dict(size=12, color=COLORS["green"]))
+    fig_be.add_vline(x=failure_prob, line_dash="dot", line_color=COLORS["purple"],
+                      annotation_text=f"Current: {failure_prob:.0%}",
+                      annotation_position="top left",
+                      annotation_font=dict(size=12, color=COLORS["purple"]))
+    if 0 < breakeven_prob_ltv <= 1.0:
+        fig_be.add_vline(x=breakeven_prob_ltv, line_dash="dash", line_color=COLORS["green"],
+                          annotation_text=f"Breakeven: {breakeven_prob_ltv:.0%}",
+                          annotation_position="bottom right",
+                          annotation_font=dict(size=12, color=COLORS["green"]))
+    fig_be.update_layout(
+        **CHART_LAYOUT,
+        xaxis_title="Failure Probability", yaxis_title="Expected Revenue Impact ($)",
+        xaxis_tickformat=".0%", yaxis_tickprefix="$", yaxis_tickformat=",",
+        height=340,
+    )
+    return fig_be
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def histogram_figure(counts, edges, n_samples, title, color):
+    edges = np.asarray(edges)
+    fig_hist = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=np.asarray(counts) / n_samples,
+        marker_color=color, name=title,
+    ))
+    fig_hist.update_layout(
+        **CHART_LAYOUT, bargap=0.02, showlegend=False,
+        xaxis_title=title, yaxis_title="Share of Draws",
+        xaxis_tickprefix="$", xaxis_tickformat=",", yaxis_tickformat=".1%", height=300,
+    )
+    return fig_hist
+
+
+@st.fragment
+def breakeven_section(out, inputs, mc_specs=None, mc_samples=None):
+    completion_rate = inputs["completion_rate"]
+    failure_prob = (100 - completion_rate) / 100
+    breakeven_prob_ltv = out["breakeven_prob_ltv"]
+
+    st.markdown("<div style='height:36px'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Breakeven Analysis</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>At what failure rate does the Iterable extension pay for itself?</div>", unsafe_allow_html=True)
+
+    be1, be2, be3 = st.columns(3)
+    with be1:
+        st.metric("Breakeven Failure Rate", f"{min(breakeven_prob_ltv, 1.0):.0%}")
+    with be2:
+        st.metric("Your Warmup Completion", f"{completion_rate}%")
+    with be3:
+        st.metric("Your Implied Failure Rate", f"{failure_prob:.0%}")
+
+    sim = run_monte_carlo(inputs, mc_specs, mc_samples) if mc_specs is not None else None
+    plotly_chart(breakeven_figure(
+        out["rev_ltv"], inputs["iterable_cost"], failure_prob, breakeven_prob_ltv,
+        tuple(sim["rev_ltv_pct"].items()) if sim else None,
+    ), use_container_width=True)
+
+    if sim:
+        rl, nv = sim["rev_ltv_pct"], sim["net_value_pct"]
+        st.markdown(f"<div style='font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin:8px 0;'>Monte Carlo — {sim['n_samples']:,} samples</div>", unsafe_allow_html=True)
+        mc1, mc2, mc3 = st.columns(3)
+        with mc1:
+            st.metric("P(Extend is Correct)", f"{sim['p_extend']:.0%}",
+                      delta="share of draws with net value > 0", delta_color="off")
+        with mc2:
+            st.metric("LTV Revenue Lost (P50)", f"-${rl[50]:,.0f}",
+                      delta=f"P5 -${rl[5]:,.0f} · P95 -${rl[95]:,.0f}", delta_color="off")
+        with mc3:
+            st.metric("Net Value of Extending (P50)", f"${nv[50]:,.0f}",
+                      delta=f"P5 ${nv[5]:,.0f} · P95 ${nv[95]:,.0f}", delta_color="off")
+
+        h1, h2 = st.columns(2)
+        for col, (counts, edges), title, color in [
+            (h1, sim["rev_ltv_hist"], "LTV-Weighted Revenue Lost ($)", COLORS["red"]),
+            (h2, sim["net_value_hist"], "Net Value of Extending ($)", COLORS["green"]),
+        ]:
+            with col:
+                plotly_chart(histogram_figure(
+                    tuple(counts.tolist()), tuple(edges.tolist()), sim["n_samples"], title, color,
+                ), use_container_width=True)
+
+
+perf.mark("breakeven")
+if mc_mode:
+    breakeven_section(out, inputs, mc_specs, mc_samples)
+else:
+    breakeven_section(out, inputs)
+
+
+# ── Breakeven surface ──────────────────────────────────────────────────────
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def surface_figure(surface_values, custom_curve, completion_rate, recovery_months, iterable_cost):
+    surf = breakeven_surface(**dict(zip(SURFACE_INPUTS, surface_values)), custom_curve=custom_curve)
+    r_idx = recovery_months - RECOVERY_AXIS[0]
+    # Show costs up to a little past the largest loss on the grid, not the full $50M
+    k_max = int(np.searchsorted(COST_AXIS, 1.15 * max(surf["rev_ltv"].max(), iterable_cost))) + 1
+    surf_net_here = lookup(surf, completion_rate, recovery_months, iterable_cost)
+
+    fig_surf = go.Figure()
+    fig_surf.add_trace(go.Heatmap(
+        # Whole dollars, as the hover shows them, sent as ints: full floats doubled the chart's JSON
+        x=COST_AXIS[:k_max].astype(np.int64), y=COMPLETION_AXIS, z=np.rint(surf["net"][:, r_idx, :k_max]).astype(np.int64),
+        zmid=0, colorscale=[[0, COLORS["red"]], [0.5, COLORS["white"]], [1, COLORS["green"]]],
+        colorbar=dict(title="Net $", tickprefix="$", tickformat=",.2s"),
+        hovertemplate="Cost $%{x:,.0f}<br>Completion %{y}%<br>Net value $%{z:,.0f}<extra></extra>",
+    ))
+    fig_surf.add_trace(go.Scatter(
+        x=COST_AXIS[:k_max], y=np.round(np.clip(surf["boundary"][r_idx, :k_max], 0, 100), 2), mode="lines",
+        name="Breakeven", line=dict(color=COLORS["dark"], width=2.5),
+    ))
+    fig_surf.add_trace(go.Scatter(
+        x=[iterable_cost], y=[completion_rate], mode="markers", name="Current",
+        marker=dict(color=COLORS["purple"], size=12, symbol="x"),
+        hovertemplate=f"Current<br>Net value ${surf_net_here:,.0f}<extra></extra>",
+    ))
+    fig_surf.update_layout(
+        **CHART_LAYOUT,
+        xaxis_title="Iterable Extension Cost ($)", yaxis_title="% of IP Warmup Completed",
+        xaxis_tickprefix="$", xaxis_tickformat=",", height=380,
+    )
+    return fig_surf
+
+
+@st.fragment
+def surface_section(inputs):
+    recovery_months = inputs["recovery_months"]
+    st.markdown(f"<div style='font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin:16px 0 4px 0;'>Breakeven surface — {recovery_months}mo recovery window</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.8rem; color:{COLORS['gray']}; margin-bottom:8px;'>Net value of extending across warmup completion and Iterable cost. Green = extend, red = migrate; the line is the decision boundary.</div>", unsafe_allow_html=True)
+    plotly_chart(surface_figure(
+        tuple(float(inputs[k]) for k in SURFACE_INPUTS), inputs.get("custom_curve"),
+        inputs["completion_rate"], recovery_months, inputs["iterable_cost"],
+    ), use_container_width=True)
+
+
+perf.mark("breakeven_surface")
+surface_section(inputs)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# TOP-LINE: REVENUE IMPACT IF FAILURE
+# MIGRATION TIMING
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:0.78rem; font-weight:600; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.06em; margin-bottom:10px;'>If Failure Occurs — Total Revenue Impact ({recovery_months}mo window)</div>", unsafe_allow_html=True)
-
-rv1, rv2 = st.columns(2)
-with rv1:
-    st.markdown(f"""<div class="hero-card">
-        <div class="hero-label">In-Month Revenue Lost</div>
-        <div class="hero-value text-dark">-${rev_in_month:,.0f}</div>
-        <div class="hero-sub">BPs lost &times; ${arpu:.0f} ARPU, summed over {recovery_months}mo</div>
-    </div>""", unsafe_allow_html=True)
-with rv2:
-    st.markdown(f"""<div class="hero-card" style="border: 2px solid {COLORS['dark']};">
-        <div class="hero-label">LTV-Weighted Revenue Lost</div>
-        <div class="hero-value text-red">-${rev_ltv:,.0f}</div>
-        <div class="hero-sub">Uses 12-month retention curves per metric type</div>
-    </div>""", unsafe_allow_html=True)
-
-# ═══════════════════════════════════════════════════════════════════════════
-# EXPECTED VALUE ROW (probability-weighted)
-# ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:0.78rem; font-weight:600; color:{COLORS['gray']}; text-transform:uppercase; letter-spacing:0.06em; margin-bottom:10px;'>Probability-Weighted Expected Impact ({completion_rate}% warmup completion)</div>", unsafe_allow_html=True)
-
-e1, e2 = st.columns(2)
-with e1:
-    st.markdown(f"""<div class="hero-card">
-        <div class="hero-label">Expected In-Month Revenue at Risk</div>
-        <div class="hero-value text-dark">${abs(expected_in_month_impact):,.0f}</div>
-        <div class="hero-sub">{completion_rate}% complete &rarr; {failure_prob:.0%} impact &times; ${rev_in_month:,.0f}</div>
-    </div>""", unsafe_allow_html=True)
-with e2:
-    st.markdown(f"""<div class="hero-card">
-        <div class="hero-label">Expected LTV Revenue at Risk</div>
-        <div class="hero-value text-red">${abs(expected_revenue_impact):,.0f}</div>
-        <div class="hero-sub">{completion_rate}% complete &rarr; {failure_prob:.0%} impact &times; ${rev_ltv:,.0f}</div>
-    </div>""", unsafe_allow_html=True)
-
-# ═══════════════════════════════════════════════════════════════════════════
-# DECISION ROW
-# ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
-
-c1, c2, c3 = st.columns([1.1, 1.1, 0.8])
-
-with c1:
-    st.markdown(f"""<div class="hero-card">
-        <div class="hero-label">Iterable Extension Cost</div>
-        <div class="hero-value text-dark">${iterable_cost:,.0f}</div>
-        <div class="hero-sub">Cost to keep as safety net</div>
-    </div>""", unsafe_allow_html=True)
-
-with c2:
-    val_color = "text-green" if net_value_of_extension > 0 else "text-red"
-    st.markdown(f"""<div class="hero-card">
-        <div class="hero-label">Net Value of Extending</div>
-        <div class="hero-value {val_color}">${net_value_of_extension:,.0f}</div>
-        <div class="hero-sub">Expected LTV risk &minus; extension cost</div>
-    </div>""", unsafe_allow_html=True)
-
-with c3:
-    if net_value_of_extension > 0:
-        st.markdown("""<div class="hero-card" style="display:flex;align-items:center;justify-content:center;">
-            <div class="decision-badge badge-extend">Extend<br>Iterable</div>
-        </div>""", unsafe_allow_html=True)
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def start_month_figure(input_items, current):
+    cmp = compare_start_months(**dict(input_items))
+    opacity = [1.0 if i == current else 0.45 for i in range(len(months_all))]
+    fig_start = go.Figure()
+    fig_start.add_trace(go.Bar(
+        name="LTV-Weighted Revenue Lost", x=months_all, y=cmp["rev_ltv"],
+        marker=dict(color=COLORS["red"], opacity=opacity),
+    ))
+    fig_start.add_trace(go.Bar(
+        name="Net Value of Extending", x=months_all, y=cmp["net_value_of_extension"],
+        marker=dict(color=COLORS["green"], opacity=opacity),
+    ))
+    fig_start.update_layout(
+        **CHART_LAYOUT, barmode="group",
+        xaxis_title="Migration Start Month", yaxis_tickprefix="$", yaxis_tickformat=",", height=340,
+    )
+    return fig_start, int(np.argmin(cmp["rev_ltv"]))
+
+
+@st.fragment
+def timing_section(inputs):
+    current = inputs["migration_month"]
+    fig_start, best = start_month_figure(tuple((k, v) for k, v in inputs.items() if k != "migration_month"), current)
+    st.markdown(f"<div style='font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin:16px 0 4px 0;'>Migration timing — every start month, current inputs</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.8rem; color:{COLORS['gray']}; margin-bottom:8px;'>A failure costs least starting in <strong>{months_all[best]}</strong>. Solid bars = your selected month ({months_all[current]}).</div>", unsafe_allow_html=True)
+    plotly_chart(fig_start, use_container_width=True)
+
+
+perf.mark("migration_timing")
+timing_section(inputs)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ITERABLE EXTENSION POLICY
+# ═══════════════════════════════════════════════════════════════════════════
+EXTENSION_PRICE_DEFAULT = 150_000
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def extension_policy(ltv_rev, monthly_price, completion_rate, completion_spec):
+    if completion_spec is None:
+        values, weights = [completion_rate], None
     else:
-        st.markdown("""<div class="hero-card" style="display:flex;align-items:center;justify-content:center;">
-            <div class="decision-badge badge-migrate">Proceed with<br>Migration</div>
-        </div>""", unsafe_allow_html=True)
+        values, weights = completion_pmf(completion_spec)
+    sol = solve_extension(ltv_rev, monthly_price, values, weights)
+    best = sol["best"]
+    t_idx, k_idx = sol["frontier"][:, 0], sol["frontier"][:, 1]
+
+    fig_ext = go.Figure()
+    fig_ext.add_trace(go.Scatter(
+        name="All policies", x=sol["expected_cost"].ravel(), y=sol["expected_avoided"].ravel(),
+        mode="markers", marker=dict(color=COLORS["gray"], size=5, opacity=0.35), hoverinfo="skip",
+    ))
+    fig_ext.add_trace(go.Scatter(
+        name="Efficient frontier",
+        x=sol["expected_cost"][t_idx, k_idx], y=sol["expected_avoided"][t_idx, k_idx],
+        mode="lines+markers", line=dict(color=COLORS["dark_mid"], width=2),
+        customdata=np.stack([sol["months"][k_idx], sol["thresholds"][t_idx]], axis=1),
+        hovertemplate="%{customdata[0]} mo if completion ≤ %{customdata[1]:.0f}%<br>"
+                      "Cost $%{x:,.0f} · avoided $%{y:,.0f}<extra></extra>",
+    ))
+    fig_ext.add_trace(go.Scatter(
+        name="Recommended", x=[best["expected_cost"]], y=[best["expected_avoided"]],
+        mode="markers", marker=dict(color=COLORS["green"], size=14, symbol="star"),
+        hovertemplate="Cost $%{x:,.0f} · avoided $%{y:,.0f}<extra></extra>",
+    ))
+    top = max(sol["expected_cost"].max(), sol["expected_avoided"].max())
+    fig_ext.add_trace(go.Scatter(
+        name="Break-even", x=[0, top], y=[0, top], mode="lines",
+        line=dict(color=COLORS["gray"], width=1, dash="dot"), hoverinfo="skip",
+    ))
+    fig_ext.update_layout(
+        **CHART_LAYOUT,
+        xaxis_title="Expected Extension Cost ($)", xaxis_tickprefix="$", xaxis_tickformat=",",
+        yaxis_title="Expected Revenue Loss Avoided ($)", yaxis_tickprefix="$", yaxis_tickformat=",",
+        height=380,
+    )
+    return fig_ext, sol
+
+
+@st.fragment
+def extension_section(out, inputs, completion_spec=None):
+    st.markdown("<div style='height:24px'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Iterable Extension — How Long to Keep It</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>Iterable bought by the month: each month kept covers that month's LTV losses if the warmup fails. Every extension length and completion threshold scored at once.</div>", unsafe_allow_html=True)
+
+    monthly_price = st.number_input(
+        "Iterable price ($/month)", min_value=0, max_value=10_000_000, value=EXTENSION_PRICE_DEFAULT,
+        step=10_000, key="ext_price",
+        help="Monthly cost of keeping Iterable running in parallel; replaces the lump sum for this view",
+    )
+    fig_ext, sol = extension_policy(
+        tuple(out["ltv_rev"].tolist()), float(monthly_price), inputs["completion_rate"], completion_spec,
+    )
+    best = sol["best"]
+
+    ex1, ex2 = st.columns([3, 2])
+    with ex1:
+        plotly_chart(fig_ext, use_container_width=True)
+    with ex2:
+        if best["months"] == 0:
+            verdict = "Don't extend — no extension length pays for itself at this price."
+        else:
+            be = sol["breakeven_completion"][best["months"]]
+            when = ("" if completion_spec is None
+                    else f" if warmup completion is at or below <strong>{best['threshold']:.0f}%</strong> "
+                         f"({best['p_extend']:.0%} likely)")
+            verdict = (f"Extend for <strong>{best['months']} month{'s' if best['months'] != 1 else ''}</strong>{when}. "
+                       f"Pays off while completion stays below {be:.0f}%.")
+        st.markdown(f"<div style='font-size:0.9rem; color:{COLORS['dark']}; margin:8px 0 12px 0; line-height:1.5;'>{verdict}</div>", unsafe_allow_html=True)
+        rows = "".join(f"""<tr>
+                <td>{k}</td>
+                <td class="num">${cost:,.0f}</td>
+                <td class="num">${saved:,.0f}</td>
+                <td class="num" style="color:{COLORS['green'] if net > 0 else COLORS['red']}">${net:,.0f}</td>
+            </tr>""" for k, cost, saved, net in zip(
+            sol["months"].tolist(), sol["cost"].tolist(), sol["avoided_if_failed"].tolist(),
+            sol["expected_net"].max(axis=0).tolist(),
+        ))
+        st.markdown(f"""
+        <table class="clean-table">
+            <tr><th>Months</th><th class="num">Cost</th><th class="num">Covered if Failed</th><th class="num">Best Exp. Net</th></tr>
+            {rows}
+        </table>
+        <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
+            Expected net = failure probability × LTV losses in the covered months − extension cost.
+            {"Completion thresholds use the Monte Carlo completion distribution." if completion_spec is not None else "Turn on Monte Carlo with a completion range to also choose a completion threshold."}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+perf.mark("extension_policy")
+extension_section(out, inputs, mc_specs.get("completion_rate") if mc_mode else None)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# BREAKEVEN
+# SENSITIVITY
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:36px'></div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Breakeven Analysis</div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>At what failure rate does the Iterable extension pay for itself?</div>", unsafe_allow_html=True)
-
-breakeven_prob_ltv = iterable_cost / rev_ltv if rev_ltv != 0 else 1.0
-
-be1, be2, be3 = st.columns(3)
-with be1:
-    st.metric("Breakeven Failure Rate", f"{min(breakeven_prob_ltv, 1.0):.0%}")
-with be2:
-    st.metric("Your Warmup Completion", f"{completion_rate}%")
-with be3:
-    st.metric("Your Implied Failure Rate", f"{failure_prob:.0%}")
-
-probs = np.arange(0, 1.01, 0.05)
-
-fig_be = go.Figure()
-fig_be.add_trace(go.Scatter(
-    x=probs, y=[p * rev_ltv for p in probs], mode="lines", name="LTV-Weighted",
-    line=dict(color=COLORS["red"], width=3)
-))
-fig_be.add_hline(y=iterable_cost, line_dash="dash", line_color=COLORS["green"], line_width=2.5,
-                  annotation_text=f"Iterable: ${iterable_cost/1e6:.1f}M",
-                  annotation_position="top right",
-                  annotation_font=dict(size=12, color=COLORS["green"]))
-fig_be.add_vline(x=failure_prob, line_dash="dot", line_color=COLORS["purple"],
-                  annotation_text=f"Current: {failure_prob:.0%}",
-                  annotation_position="top left",
-                  annotation_font=dict(size=12, color=COLORS["purple"]))
-if 0 < breakeven_prob_ltv <= 1.0:
-    fig_be.add_vline(x=breakeven_prob_ltv, line_dash="dash", line_color=COLORS["green"],
-                      annotation_text=f"Breakeven: {breakeven_prob_ltv:.0%}",
-                      annotation_position="bottom right",
-                      annotation_font=dict(size=12, color=COLORS["green"]))
-fig_be.update_layout(
-    **CHART_LAYOUT,
-    xaxis_title="Failure Probability", yaxis_title="Expected Revenue Impact ($)",
-    xaxis_tickformat=".0%", yaxis_tickprefix="$", yaxis_tickformat=",",
-    height=340,
-)
-st.plotly_chart(fig_be, use_container_width=True)
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def sensitivity_figures(input_items, sens_output):
+    sweep = one_at_a_time(dict(input_items))
+    bars = tornado(sweep, sens_output)[::-1]  # widest bar on top
+    sens_base = sweep["base"][sens_output]
+
+    fig_tornado = go.Figure()
+    fig_tornado.add_trace(go.Bar(
+        name="Below current", orientation="h",
+        y=[INPUT_LABELS[b[0]] for b in bars], x=[b[1] for b in bars],
+        base=sens_base, marker_color=COLORS["green"],
+    ))
+    fig_tornado.add_trace(go.Bar(
+        name="Above current", orientation="h",
+        y=[INPUT_LABELS[b[0]] for b in bars], x=[b[2] for b in bars],
+        base=sens_base, marker_color=COLORS["red"],
+    ))
+    fig_tornado.update_layout(
+        **CHART_LAYOUT, barmode="overlay",
+        xaxis_title="Swing vs. Current ($)", xaxis_tickprefix="$", xaxis_tickformat=",",
+        height=420,
+    )
+
+    fig_spider = go.Figure()
+    spider_x = np.linspace(0, 1, SPIDER_POINTS)
+    for i, name in enumerate(sweep["names"]):
+        fig_spider.add_trace(go.Scatter(
+            x=spider_x, y=sweep["results"][sens_output][i], mode="lines", name=INPUT_LABELS[name],
+            line=dict(width=2),
+        ))
+    fig_spider.update_layout(
+        **CHART_LAYOUT,
+        xaxis_title="Position in Slider Range", xaxis_tickformat=".0%",
+        yaxis_tickprefix="$", yaxis_tickformat=",", height=420,
+    )
+    fig_spider.update_layout(legend=dict(orientation="v", yanchor="top", y=1, xanchor="left", x=1.02))
+    return fig_tornado, fig_spider
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def run_sobol(output, fixed_inputs):
+    return sobol_indices(fixed_inputs, output=output)
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def sobol_figure(sens_output, fixed_items):
+    sob = run_sobol(sens_output, dict(fixed_items))
+    order = np.argsort(sob["ST"])
+    fig_sobol = go.Figure()
+    fig_sobol.add_trace(go.Bar(
+        name="Total effect (ST)", orientation="h",
+        y=[FACTOR_LABELS[sob["names"][i]] for i in order], x=sob["ST"][order],
+        marker_color=COLORS["dark_mid"], opacity=0.45,
+    ))
+    fig_sobol.add_trace(go.Bar(
+        name="First order (S1)", orientation="h",
+        y=[FACTOR_LABELS[sob["names"][i]] for i in order], x=sob["S1"][order],
+        marker_color=COLORS["dark"],
+    ))
+    fig_sobol.update_layout(
+        **CHART_LAYOUT, barmode="overlay",
+        xaxis_title="Share of Output Variance", xaxis_tickformat=".0%", height=460,
+    )
+    return fig_sobol, sob["n_runs"]
+
+
+@st.fragment
+def sensitivity_section(inputs):
+    st.markdown("<div style='height:24px'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Sensitivity — What Moves the Answer</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>Each input flexed across its full slider range, all others held at your current settings.</div>", unsafe_allow_html=True)
+
+    # Switching output reruns this fragment only
+    sens_output = st.radio(
+        "Output", SENSITIVITY_OUTPUTS, horizontal=True, key="sens_output", label_visibility="collapsed",
+        format_func={"rev_ltv": "LTV-Weighted Revenue Lost", "net_value_of_extension": "Net Value of Extending"}.get,
+    )
+    fig_tornado, fig_spider = sensitivity_figures(tuple(inputs.items()), sens_output)
+
+    sn1, sn2 = st.columns(2)
+    with sn1:
+        plotly_chart(fig_tornado, use_container_width=True)
+    with sn2:
+        plotly_chart(fig_spider, use_container_width=True)
+
+    perf.mark("sobol")
+    # A toggle rather than an expander: collapsed expanders still run their body
+    if st.toggle("Global Sensitivity (Sobol Indices)", key="show_sobol"):
+        factors = NET_VALUE_FACTORS if sens_output == "net_value_of_extension" else REV_LTV_FACTORS
+        fig_sobol, n_runs = sobol_figure(sens_output, tuple((k, v) for k, v in inputs.items() if k not in factors))
+        plotly_chart(fig_sobol, use_container_width=True)
+        st.markdown(f"<div style='font-size:0.8rem; color:{COLORS['gray']}; line-height:1.5;'>Every input sampled uniformly over its full slider range (LTV multipliers ±{LTV_MULT_SPREAD:.0%} around the retention-curve sums), {n_runs:,} model runs. S1 = variance explained by the input alone; ST − S1 = share that comes through interactions with other inputs.</div>", unsafe_allow_html=True)
+
+
+perf.mark("sensitivity")
+sensitivity_section(inputs)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # IMPACT SUMMARY
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:24px'></div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>If Failure Occurs — Impact by Email Metric</div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>Cumulative impact across {recovery_months}-month recovery window. Not probability-weighted.</div>", unsafe_allow_html=True)
-
-total_in_signup_loss = abs(df["in_signup_loss"].sum())
-total_oon_signup_loss = abs(df["oon_signup_loss"].sum())
-total_signup_loss_count = total_in_signup_loss + total_oon_signup_loss
-total_act_loss = abs(total_activation_bp_loss)
-total_resc_loss = abs(total_rescue_bp_loss)
-
-s1, s2, s3, s4, s5 = st.columns(5)
-with s1:
-    st.metric("Signups Lost", f"{total_signup_loss_count:,.0f}",
-              delta=f"IN {total_in_signup_loss:,.0f} · OON {total_oon_signup_loss:,.0f}", delta_color="off")
-with s2:
-    st.metric("Activation BPs Lost", f"{total_act_loss:,.0f}",
-              delta=f"LTV: -${act_rev_ltv:,.0f}", delta_color="off")
-with s3:
-    resc_rev_ltv = active_resc_rev_ltv + inactive_resc_rev_ltv
-    st.metric("Rescue BPs Lost", f"{total_resc_loss:,.0f}",
-              delta=f"LTV: -${resc_rev_ltv:,.0f}", delta_color="off")
-with s4:
-    total_rpt_loss = abs(total_repeat_bp_loss)
-    st.metric("Repeat BPs Lost", f"{total_rpt_loss:,.0f}",
-              delta=f"LTV: -${repeat_rev_ltv:,.0f}", delta_color="off")
-with s5:
-    st.metric(f"Total LTV Impact ({recovery_months}mo)",
-              f"-${rev_ltv:,.0f}",
-              delta=f"In-month: -${rev_in_month:,.0f}", delta_color="off")
+@st.fragment
+def impact_summary(out, monthly, recovery_months):
+    st.markdown("<div style='height:24px'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>If Failure Occurs — Impact by Email Metric</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>Cumulative impact across {recovery_months}-month recovery window. Not probability-weighted.</div>", unsafe_allow_html=True)
+
+    total_in_signup_loss = abs(monthly["in_signup_loss"].sum())
+    total_oon_signup_loss = abs(monthly["oon_signup_loss"].sum())
+    total_signup_loss_count = total_in_signup_loss + total_oon_signup_loss
+    total_act_loss = abs(out["total_activation_bp_loss"])
+    total_resc_loss = abs(out["total_rescue_bp_loss"])
+
+    s1, s2, s3, s4, s5 = st.columns(5)
+    with s1:
+        st.metric("Signups Lost", f"{total_signup_loss_count:,.0f}",
+                  delta=f"IN {total_in_signup_loss:,.0f} · OON {total_oon_signup_loss:,.0f}", delta_color="off")
+    with s2:
+        st.metric("Activation BPs Lost", f"{total_act_loss:,.0f}",
+                  delta=f"LTV: -${out['act_rev_ltv']:,.0f}", delta_color="off")
+    with s3:
+        resc_rev_ltv = out["active_resc_rev_ltv"] + out["inactive_resc_rev_ltv"]
+        st.metric("Rescue BPs Lost", f"{total_resc_loss:,.0f}",
+                  delta=f"LTV: -${resc_rev_ltv:,.0f}", delta_color="off")
+    with s4:
+        total_rpt_loss = abs(out["total_repeat_bp_loss"])
+        st.metric("Repeat BPs Lost", f"{total_rpt_loss:,.0f}",
+                  delta=f"LTV: -${out['repeat_rev_ltv']:,.0f}", delta_color="off")
+    with s5:
+        st.metric(f"Total LTV Impact ({recovery_months}mo)",
+                  f"-${out['rev_ltv']:,.0f}",
+                  delta=f"In-month: -${out['rev_in_month']:,.0f}", delta_color="off")
+
+
+perf.mark("impact_summary")
+impact_summary(out, monthly, recovery_months)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SECTION 1: SIGNUPS
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
-st.markdown(f"""
-<div>
-    <span class="section-num">1</span>
-    <span class="section-title">Signups — IN vs. OON/Embed</span>
-</div>
-<div class="section-desc">
-    IN signups are heavily email-dependent (reminders, drip campaigns).
-    OON comes from performance marketing; Embed comes through partner flows — both have minimal email dependency for signup.
-</div>
-""", unsafe_allow_html=True)
+SIGNUPS_SERIES = ("in_signup", "eff_in_signup", "oon_signup", "eff_oon_signup")
 
-sig1, sig2 = st.columns([3, 2])
 
-with sig1:
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def signups_figure(month, in_signup, eff_in_signup, oon_signup, eff_oon_signup):
+    in_signup, oon_signup = np.asarray(in_signup), np.asarray(oon_signup)
     fig_signups = go.Figure()
     fig_signups.add_trace(go.Bar(
-        name="IN — Baseline", x=df["month"], y=df["in_signup"],
+        name="IN — Baseline", x=month, y=in_signup,
         marker_color=COLORS["dark_mid"], opacity=0.35
     ))
     fig_signups.add_trace(go.Bar(
-        name="IN — Impaired", x=df["month"], y=df["in_signup"] * df["eff_in_signup"],
+        name="IN — Impaired", x=month, y=in_signup * eff_in_signup,
         marker_color=COLORS["red"]
     ))
     fig_signups.add_trace(go.Bar(
-        name="OON/Embed — Baseline", x=df["month"], y=df["oon_signup"],
+        name="OON/Embed — Baseline", x=month, y=oon_signup,
         marker_color=COLORS["orange_light"], opacity=0.45
     ))
     fig_signups.add_trace(go.Bar(
-        name="OON/Embed — Impaired", x=df["month"], y=df["oon_signup"] * df["eff_oon_signup"],
+        name="OON/Embed — Impaired", x=month, y=oon_signup * eff_oon_signup,
         marker_color=COLORS["orange"]
     ))
     fig_signups.update_layout(
         **CHART_LAYOUT, barmode="group",
         yaxis_title="Signups", yaxis_tickformat=",", height=360,
     )
-    st.plotly_chart(fig_signups, use_container_width=True)
-
-with sig2:
-    rows_html = ""
-    for _, row in df.iterrows():
-        in_pct = (1 - row["eff_in_signup"]) * 100
-        oon_pct = (1 - row["eff_oon_signup"]) * 100
-        rows_html += f"""<tr>
-            <td>{row['month']}</td>
-            <td class="num" style="color:{COLORS['red']}">-{in_pct:.0f}%</td>
-            <td class="num">{abs(row['in_signup_loss']):,.0f}</td>
-            <td class="num" style="color:{COLORS['orange']}">-{oon_pct:.0f}%</td>
-            <td class="num">{abs(row['oon_signup_loss']):,.0f}</td>
-        </tr>"""
+    return fig_signups
 
+
+@st.fragment
+def signups_section(monthly, chart=True):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
     st.markdown(f"""
-    <table class="clean-table">
-        <tr><th></th><th colspan="2" style="text-align:center;">IN</th><th colspan="2" style="text-align:center;">OON / Embed</th></tr>
-        <tr><th>Month</th><th class="num">Drop</th><th class="num">Lost</th><th class="num">Drop</th><th class="num">Lost</th></tr>
-        {rows_html}
-    </table>
+    <div>
+        <span class="section-num">1</span>
+        <span class="section-title">Signups — IN vs. OON/Embed</span>
+    </div>
+    <div class="section-desc">
+        IN signups are heavily email-dependent (reminders, drip campaigns).
+        OON comes from performance marketing; Embed comes through partner flows — both have minimal email dependency for signup.
+    </div>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"<div style='font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;'>Email drives the IN signup funnel — confirmation emails, onboarding drips, reminders. OON enters via paid ads/landing pages; Embed through partner integrations.</div>", unsafe_allow_html=True)
+    sig1, sig2 = st.columns([3, 2]) if chart else (st.container(), st.container())
+
+    with sig1:
+        if chart:
+            plotly_chart(signups_figure(*_series(monthly, *SIGNUPS_SERIES)), use_container_width=True)
+
+    with sig2:
+        in_pct = (1 - monthly["eff_in_signup"]) * 100
+        oon_pct = (1 - monthly["eff_oon_signup"]) * 100
+        rows_html = "".join(f"""<tr>
+                <td>{month}</td>
+                <td class="num" style="color:{COLORS['red']}">-{in_p:.0f}%</td>
+                <td class="num">{in_lost:,.0f}</td>
+                <td class="num" style="color:{COLORS['orange']}">-{oon_p:.0f}%</td>
+                <td class="num">{oon_lost:,.0f}</td>
+            </tr>""" for month, in_p, in_lost, oon_p, oon_lost in zip(
+            monthly["month"].tolist(), in_pct.tolist(), np.abs(monthly["in_signup_loss"]).tolist(),
+            oon_pct.tolist(), np.abs(monthly["oon_signup_loss"]).tolist(),
+        ))
+
+        st.markdown(f"""
+        <table class="clean-table">
+            <tr><th></th><th colspan="2" style="text-align:center;">IN</th><th colspan="2" style="text-align:center;">OON / Embed</th></tr>
+            <tr><th>Month</th><th class="num">Drop</th><th class="num">Lost</th><th class="num">Drop</th><th class="num">Lost</th></tr>
+            {rows_html}
+        </table>
+        """, unsafe_allow_html=True)
+
+        st.markdown(f"<div style='font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;'>Email drives the IN signup funnel — confirmation emails, onboarding drips, reminders. OON enters via paid ads/landing pages; Embed through partner integrations.</div>", unsafe_allow_html=True)
+
+
+perf.mark("signups")
+signups_section(monthly, chart=not merge_charts)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SECTION 2: ACTIVATION
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
-st.markdown(f"""
-<div>
-    <span class="section-num">2</span>
-    <span class="section-title">Activation — M0 + M1+ (All Channels)</span>
-</div>
-<div class="section-desc">
-    Post-signup email nudges drive activation across ALL channels.
-    Impact compounds: fewer signups &times; lower activation rate = multiplicative BP loss.
-</div>
-""", unsafe_allow_html=True)
+ACTIVATION_SERIES = ("in_m0_loss", "in_m1_loss", "oon_m0_loss", "oon_m1_loss")
 
-act1, act2 = st.columns([1.2, 1])
 
-with act1:
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def activation_figure(month, in_m0_loss, in_m1_loss, oon_m0_loss, oon_m1_loss):
     fig_act = go.Figure()
-    fig_act.add_trace(go.Bar(name="IN — M0", x=df["month"], y=df["in_m0_loss"].abs(), marker_color=COLORS["red"]))
-    fig_act.add_trace(go.Bar(name="IN — M1+", x=df["month"], y=df["in_m1_loss"].abs(), marker_color=COLORS["red_light"]))
-    fig_act.add_trace(go.Bar(name="OON/Embed — M0", x=df["month"], y=df["oon_m0_loss"].abs(), marker_color=COLORS["orange"]))
-    fig_act.add_trace(go.Bar(name="OON/Embed — M1+", x=df["month"], y=df["oon_m1_loss"].abs(), marker_color=COLORS["orange_light"]))
+    fig_act.add_trace(go.Bar(name="IN — M0", x=month, y=np.abs(in_m0_loss), marker_color=COLORS["red"]))
+    fig_act.add_trace(go.Bar(name="IN — M1+", x=month, y=np.abs(in_m1_loss), marker_color=COLORS["red_light"]))
+    fig_act.add_trace(go.Bar(name="OON/Embed — M0", x=month, y=np.abs(oon_m0_loss), marker_color=COLORS["orange"]))
+    fig_act.add_trace(go.Bar(name="OON/Embed — M1+", x=month, y=np.abs(oon_m1_loss), marker_color=COLORS["orange_light"]))
     fig_act.update_layout(
         **CHART_LAYOUT, barmode="stack",
         yaxis_title="BPs Lost", yaxis_tickformat=",", height=380,
     )
-    st.plotly_chart(fig_act, use_container_width=True)
-
-with act2:
-    total_act_rate = m0_activation_base + m1_plus_uplift
-    signup_effect_bps = 0
-    activation_effect_bps = 0
-    for _, row in df.iterrows():
-        in_base, oon_base = row["in_signup"], row["oon_signup"]
-        in_eff = in_base * row["eff_in_signup"]
-        oon_eff = oon_base * row["eff_oon_signup"]
-        signup_effect_bps += ((in_eff - in_base) + (oon_eff - oon_base)) * total_act_rate
-        eff_act = m0_activation_base * row["eff_m0"] + m1_plus_uplift * row["eff_m1"]
-        activation_effect_bps += (in_base + oon_base) * (eff_act - total_act_rate)
-    interaction_bps = total_activation_bp_loss - signup_effect_bps - activation_effect_bps
+    return fig_act
 
+
+@st.fragment
+def activation_section(out, monthly, arpu, chart=True):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
     st.markdown(f"""
-    <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin-bottom:8px;">Impact decomposition</div>
-    <table class="clean-table">
-        <tr><th>Driver</th><th class="num">BPs Lost</th><th class="num">LTV Revenue ({LTV_MULT_ACT:.1f}×)</th></tr>
-        <tr><td>Fewer signups (volume)</td><td class="num">{abs(signup_effect_bps):,.0f}</td><td class="num">-${abs(signup_effect_bps) * arpu * LTV_MULT_ACT:,.0f}</td></tr>
-        <tr><td>Lower activation rate</td><td class="num">{abs(activation_effect_bps):,.0f}</td><td class="num">-${abs(activation_effect_bps) * arpu * LTV_MULT_ACT:,.0f}</td></tr>
-        <tr><td>Compounding interaction</td><td class="num">{abs(interaction_bps):,.0f}</td><td class="num">-${abs(interaction_bps) * arpu * LTV_MULT_ACT:,.0f}</td></tr>
-        <tr><td><strong>Total</strong></td><td class="num"><strong>{abs(total_activation_bp_loss):,.0f}</strong></td><td class="num"><strong>-${act_rev_ltv:,.0f}</strong></td></tr>
-    </table>
-    <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
-        LTV multiplier ({LTV_MULT_ACT:.1f}×) = sum of 12-month retention curve.
-        A lost BP today costs ~${arpu * LTV_MULT_ACT:.0f} in lifetime revenue, not just ${arpu:.0f}.
+    <div>
+        <span class="section-num">2</span>
+        <span class="section-title">Activation — M0 + M1+ (All Channels)</span>
+    </div>
+    <div class="section-desc">
+        Post-signup email nudges drive activation across ALL channels.
+        Impact compounds: fewer signups &times; lower activation rate = multiplicative BP loss.
     </div>
     """, unsafe_allow_html=True)
 
+    act1, act2 = st.columns([1.2, 1]) if chart else (st.container(), st.container())
+
+    with act1:
+        if chart:
+            plotly_chart(activation_figure(*_series(monthly, *ACTIVATION_SERIES)), use_container_width=True)
+
+    with act2:
+        signup_effect_bps = out["signup_effect_bps"]
+        activation_effect_bps = out["activation_effect_bps"]
+        interaction_bps = out["interaction_bps"]
+
+        st.markdown(f"""
+        <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin-bottom:8px;">Impact decomposition</div>
+        <table class="clean-table">
+            <tr><th>Driver</th><th class="num">BPs Lost</th><th class="num">LTV Revenue ({LTV_MULT_ACT:.1f}×)</th></tr>
+            <tr><td>Fewer signups (volume)</td><td class="num">{abs(signup_effect_bps):,.0f}</td><td class="num">-${abs(signup_effect_bps) * arpu * LTV_MULT_ACT:,.0f}</td></tr>
+            <tr><td>Lower activation rate</td><td class="num">{abs(activation_effect_bps):,.0f}</td><td class="num">-${abs(activation_effect_bps) * arpu * LTV_MULT_ACT:,.0f}</td></tr>
+            <tr><td>Compounding interaction</td><td class="num">{abs(interaction_bps):,.0f}</td><td class="num">-${abs(interaction_bps) * arpu * LTV_MULT_ACT:,.0f}</td></tr>
+            <tr><td><strong>Total</strong></td><td class="num"><strong>{abs(out['total_activation_bp_loss']):,.0f}</strong></td><td class="num"><strong>-${out['act_rev_ltv']:,.0f}</strong></td></tr>
+        </table>
+        <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
+            LTV multiplier ({LTV_MULT_ACT:.1f}×) = sum of 12-month retention curve.
+            A lost BP today costs ~${arpu * LTV_MULT_ACT:.0f} in lifetime revenue, not just ${arpu:.0f}.
+        </div>
+        """, unsafe_allow_html=True)
+
+
+perf.mark("activation")
+activation_section(out, monthly, arpu, chart=not merge_charts)
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SECTION 3: RESCUE
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
-st.markdown(f"""
-<div>
-    <span class="section-num">3</span>
-    <span class="section-title">Rescue — Active + Inactive Users</span>
-</div>
-<div class="section-desc">
-    Rescue emails target ALL users regardless of original signup channel.
-    Active users get nudges to maintain BPs; inactive users get win-back campaigns.
-</div>
-""", unsafe_allow_html=True)
+RESCUE_SERIES = ("active_rescue_loss", "inactive_rescue_loss")
 
-res1, res2 = st.columns([1.2, 1])
 
-with res1:
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def rescue_figure(month, active_rescue_loss, inactive_rescue_loss):
     fig_rescue = go.Figure()
-    fig_rescue.add_trace(go.Bar(name="Active Rescue", x=df["month"], y=df["active_rescue_loss"].abs(), marker_color=COLORS["red"]))
-    fig_rescue.add_trace(go.Bar(name="Inactive Rescue", x=df["month"], y=df["inactive_rescue_loss"].abs(), marker_color=COLORS["gray"]))
+    fig_rescue.add_trace(go.Bar(name="Active Rescue", x=month, y=np.abs(active_rescue_loss), marker_color=COLORS["red"]))
+    fig_rescue.add_trace(go.Bar(name="Inactive Rescue", x=month, y=np.abs(inactive_rescue_loss), marker_color=COLORS["gray"]))
     fig_rescue.update_layout(
         **CHART_LAYOUT, barmode="stack",
         yaxis_title="BPs Lost", yaxis_tickformat=",", height=360,
     )
-    st.plotly_chart(fig_rescue, use_container_width=True)
+    return fig_rescue
+
 
-with res2:
-    total_active_loss = abs(df["active_rescue_loss"].sum())
-    total_inactive_loss = abs(df["inactive_rescue_loss"].sum())
+@st.cache_data(show_spinner="Simulating every user…")
+def microsim_check(inputs_items, rescue_once):
+    return microsim.simulate(dict(inputs_items), rescue_once=rescue_once)
 
+
+@st.fragment
+def rescue_section(out, monthly, arpu, inputs, chart=True):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
     st.markdown(f"""
-    <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin-bottom:8px;">Rescue by segment</div>
-    <table class="clean-table">
-        <tr><th>Segment</th><th class="num">BPs Lost</th><th class="num">LTV Revenue</th></tr>
-        <tr><td>Active ({LTV_MULT_ACTIVE_RESC:.1f}× mult)</td><td class="num">{total_active_loss:,.0f}</td><td class="num">-${active_resc_rev_ltv:,.0f}</td></tr>
-        <tr><td>Inactive ({LTV_MULT_INACTIVE_RESC:.1f}× mult)</td><td class="num">{total_inactive_loss:,.0f}</td><td class="num">-${inactive_resc_rev_ltv:,.0f}</td></tr>
-        <tr><td><strong>Total</strong></td><td class="num"><strong>{total_active_loss + total_inactive_loss:,.0f}</strong></td><td class="num"><strong>-${active_resc_rev_ltv + inactive_resc_rev_ltv:,.0f}</strong></td></tr>
-    </table>
-    <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
-        Active rescue: {active_rescue_rate:.1%} rate, ~{LTV_MULT_ACTIVE_RESC:.1f}mo retention &rarr; ~${arpu * LTV_MULT_ACTIVE_RESC:.0f}/BP.
-        Inactive rescue: {inactive_rescue_rate:.2%} rate, ~{LTV_MULT_INACTIVE_RESC:.1f}mo retention &rarr; ~${arpu * LTV_MULT_INACTIVE_RESC:.0f}/BP.
-        Win-back emails are the <em>only</em> channel for inactive rescue.
+    <div>
+        <span class="section-num">3</span>
+        <span class="section-title">Rescue — Active + Inactive Users</span>
+    </div>
+    <div class="section-desc">
+        Rescue emails target ALL users regardless of original signup channel.
+        Active users get nudges to maintain BPs; inactive users get win-back campaigns.
     </div>
     """, unsafe_allow_html=True)
 
+    res1, res2 = st.columns([1.2, 1]) if chart else (st.container(), st.container())
+
+    with res1:
+        if chart:
+            plotly_chart(rescue_figure(*_series(monthly, *RESCUE_SERIES)), use_container_width=True)
+
+    with res2:
+        total_active_loss = abs(monthly["active_rescue_loss"].sum())
+        total_inactive_loss = abs(monthly["inactive_rescue_loss"].sum())
+        active_resc_rev_ltv = out["active_resc_rev_ltv"]
+        inactive_resc_rev_ltv = out["inactive_resc_rev_ltv"]
+
+        st.markdown(f"""
+        <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin-bottom:8px;">Rescue by segment</div>
+        <table class="clean-table">
+            <tr><th>Segment</th><th class="num">BPs Lost</th><th class="num">LTV Revenue</th></tr>
+            <tr><td>Active ({LTV_MULT_ACTIVE_RESC:.1f}× mult)</td><td class="num">{total_active_loss:,.0f}</td><td class="num">-${active_resc_rev_ltv:,.0f}</td></tr>
+            <tr><td>Inactive ({LTV_MULT_INACTIVE_RESC:.1f}× mult)</td><td class="num">{total_inactive_loss:,.0f}</td><td class="num">-${inactive_resc_rev_ltv:,.0f}</td></tr>
+            <tr><td><strong>Total</strong></td><td class="num"><strong>{total_active_loss + total_inactive_loss:,.0f}</strong></td><td class="num"><strong>-${active_resc_rev_ltv + inactive_resc_rev_ltv:,.0f}</strong></td></tr>
+        </table>
+        <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
+            Active rescue: {active_rescue_rate:.1%} rate, ~{LTV_MULT_ACTIVE_RESC:.1f}mo retention &rarr; ~${arpu * LTV_MULT_ACTIVE_RESC:.0f}/BP.
+            Inactive rescue: {inactive_rescue_rate:.2%} rate, ~{LTV_MULT_INACTIVE_RESC:.1f}mo retention &rarr; ~${arpu * LTV_MULT_INACTIVE_RESC:.0f}/BP.
+            Win-back emails are the <em>only</em> channel for inactive rescue.
+        </div>
+        """, unsafe_allow_html=True)
+
+    # A toggle rather than an expander: collapsed expanders still run their body
+    if st.toggle("User-level microsimulation", key="show_microsim",
+                 help="Simulate each user with their own rescue propensity, email engagement and autopay status"):
+        rescue_once = st.checkbox("Rescued users leave the pool for the rest of the window", key="microsim_once")
+        sim = microsim_check(tuple((k, inputs[k]) for k in (*model.RESCUE_INPUTS, "custom_curve") if k in inputs),
+                             rescue_once)
+        rows = "".join(
+            f"<tr><td>{label}</td><td class='num'>{abs(sim['closed_form'][k]):,.0f}</td>"
+            f"<td class='num'>{abs(sim[k]):,.0f}</td><td class='num'>{sim['relative_difference'][k]:+.1%}</td></tr>"
+            for label, k in (("Active", "total_active_rescue_loss"), ("Inactive", "total_inactive_rescue_loss"))
+        )
+        groups = " · ".join(f"{g}: {abs(v):,.0f}" for g, v in sim["by_group"].items())
+        st.markdown(f"""
+        <table class="clean-table">
+            <tr><th>BPs lost</th><th class="num">Closed form</th><th class="num">Microsimulation</th><th class="num">Δ</th></tr>
+            {rows}
+        </table>
+        <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:8px; line-height:1.5;">
+            {sim['users']:,} users in {sim['seconds']:.2f}s. BPs lost by email engagement: {groups}.
+        </div>
+        """, unsafe_allow_html=True)
+
+
+perf.mark("rescue")
+rescue_section(out, monthly, arpu, inputs, chart=not merge_charts)
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SECTION 4: REPEAT RATE
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
-st.markdown(f"""
-<div>
-    <span class="section-num">4</span>
-    <span class="section-title">Repeat Rate — Existing Bill-Paid Users</span>
-</div>
-<div class="section-desc">
-    ~70% of users are on autopay and unaffected by email disruption.
-    The remaining ~30% on manual pay rely partly on email reminders — but SMS and push notifications still function.
-    Impact is measured in basis points of repeat rate decline.
-</div>
-""", unsafe_allow_html=True)
+REPEAT_SERIES = ("bp_prev_month", "eff_repeat_dep_bps")
 
-rpt1, rpt2 = st.columns([1.2, 1])
 
-with rpt1:
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def repeat_figure(month, bp_prev_month, eff_repeat_dep_bps):
+    bp_prev_month, eff_repeat_dep_bps = np.asarray(bp_prev_month), np.asarray(eff_repeat_dep_bps)
     fig_rpt = go.Figure()
     fig_rpt.add_trace(go.Bar(
         name="Baseline Repeats",
-        x=df["month"],
-        y=df["bp_prev_month"] * repeat_rate_base,
+        x=month,
+        y=bp_prev_month * repeat_rate_base,
         marker_color=COLORS["dark_mid"], opacity=0.35,
     ))
     fig_rpt.add_trace(go.Bar(
         name="Impaired Repeats",
-        x=df["month"],
-        y=df["bp_prev_month"] * (repeat_rate_base - df["eff_repeat_dep_bps"] / 10000),
+        x=month,
+        y=bp_prev_month * (repeat_rate_base - eff_repeat_dep_bps / 10000),
         marker_color=COLORS["purple"],
     ))
     fig_rpt.update_layout(
         **CHART_LAYOUT, barmode="group",
         yaxis_title="Repeating Users", yaxis_tickformat=",", height=360,
     )
-    st.plotly_chart(fig_rpt, use_container_width=True)
-
-with rpt2:
-    total_rpt_loss = abs(total_repeat_bp_loss)
-    rows_rpt = ""
-    for _, row in df.iterrows():
-        dep_bps = row["eff_repeat_dep_bps"]
-        lost = abs(row["repeat_bp_loss"])
-        rows_rpt += f"""<tr>
-            <td>{row['month']}</td>
-            <td class="num">{row['bp_prev_month']:,.0f}</td>
-            <td class="num" style="color:{COLORS['purple']}">-{dep_bps:.0f} bps</td>
-            <td class="num">{lost:,.0f}</td>
-        </tr>"""
+    return fig_rpt
 
-    st.markdown(f"""
-    <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin-bottom:8px;">Monthly breakdown</div>
-    <table class="clean-table">
-        <tr><th>Month</th><th class="num">BP Prev Mo</th><th class="num">Depression</th><th class="num">BPs Lost</th></tr>
-        {rows_rpt}
-    </table>
 
-    <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin:16px 0 8px 0;">Revenue impact (LTV, {LTV_MULT_REPEAT:.1f}× mult)</div>
-    <table class="clean-table">
-        <tr><th></th><th class="num">BPs Lost</th><th class="num">LTV Revenue</th></tr>
-        <tr><td><strong>Total</strong></td><td class="num"><strong>{total_rpt_loss:,.0f}</strong></td><td class="num"><strong>-${repeat_rev_ltv:,.0f}</strong></td></tr>
-    </table>
-    <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
-        Baseline repeat rate: {repeat_rate_base:.2%} (trailing 6mo avg).
-        Depression of {repeat_depression_bps} bps = {repeat_depression_bps/100:.2f}pp.
-        Low sensitivity due to autopay dominance.
+@st.fragment
+def repeat_section(out, monthly, repeat_depression_bps, chart=True):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
+    st.markdown(f"""
+    <div>
+        <span class="section-num">4</span>
+        <span class="section-title">Repeat Rate — Existing Bill-Paid Users</span>
+    </div>
+    <div class="section-desc">
+        ~70% of users are on autopay and unaffected by email disruption.
+        The remaining ~30% on manual pay rely partly on email reminders — but SMS and push notifications still function.
+        Impact is measured in basis points of repeat rate decline.
     </div>
     """, unsafe_allow_html=True)
 
+    rpt1, rpt2 = st.columns([1.2, 1]) if chart else (st.container(), st.container())
+
+    with rpt1:
+        if chart:
+            plotly_chart(repeat_figure(*_series(monthly, *REPEAT_SERIES)), use_container_width=True)
+
+    with rpt2:
+        total_rpt_loss = abs(out["total_repeat_bp_loss"])
+        rows_rpt = "".join(f"""<tr>
+                <td>{month}</td>
+                <td class="num">{bp_prev:,.0f}</td>
+                <td class="num" style="color:{COLORS['purple']}">-{dep_bps:.0f} bps</td>
+                <td class="num">{lost:,.0f}</td>
+            </tr>""" for month, bp_prev, dep_bps, lost in zip(
+            monthly["month"].tolist(), monthly["bp_prev_month"].tolist(),
+            monthly["eff_repeat_dep_bps"].tolist(), np.abs(monthly["repeat_bp_loss"]).tolist(),
+        ))
+
+        st.markdown(f"""
+        <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin-bottom:8px;">Monthly breakdown</div>
+        <table class="clean-table">
+            <tr><th>Month</th><th class="num">BP Prev Mo</th><th class="num">Depression</th><th class="num">BPs Lost</th></tr>
+            {rows_rpt}
+        </table>
+
+        <div style="font-size:0.88rem; font-weight:600; color:{COLORS['dark']}; margin:16px 0 8px 0;">Revenue impact (LTV, {LTV_MULT_REPEAT:.1f}× mult)</div>
+        <table class="clean-table">
+            <tr><th></th><th class="num">BPs Lost</th><th class="num">LTV Revenue</th></tr>
+            <tr><td><strong>Total</strong></td><td class="num"><strong>{total_rpt_loss:,.0f}</strong></td><td class="num"><strong>-${out['repeat_rev_ltv']:,.0f}</strong></td></tr>
+        </table>
+        <div style="font-size:0.8rem; color:{COLORS['gray']}; margin-top:12px; line-height:1.5;">
+            Baseline repeat rate: {repeat_rate_base:.2%} (trailing 6mo avg).
+            Depression of {repeat_depression_bps} bps = {repeat_depression_bps/100:.2f}pp.
+            Low sensitivity due to autopay dominance.
+        </div>
+        """, unsafe_allow_html=True)
+
+
+perf.mark("repeat")
+repeat_section(out, monthly, repeat_depression_bps, chart=not merge_charts)
+
 
 # ═══════════════════════════════════════════════════════════════════════════
-# RECOVERY CURVE
+# SECTIONS 1–4 IN ONE FIGURE
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Recovery Curve</div>", unsafe_allow_html=True)
-st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>Linear recovery from max depression back to baseline over {recovery_months} months.</div>", unsafe_allow_html=True)
+# Row title and the barmode of the section's own figure
+SECTION_CHART_ROWS = (
+    ("1 · Signups", "group"),
+    ("2 · Activation BPs Lost", "stack"),
+    ("3 · Rescue BPs Lost", "stack"),
+    ("4 · Repeating Users", "group"),
+)
+
 
-fig_recovery = go.Figure()
-traces = [
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def section_charts_figure(signups, activation, rescue, repeat):
+    """The four section bar charts as rows of one figure, from their cached single figures."""
+    figs = (signups_figure(*signups), activation_figure(*activation), rescue_figure(*rescue), repeat_figure(*repeat))
+    merged = make_subplots(
+        rows=len(figs), cols=1, shared_xaxes=True, vertical_spacing=0.06,
+        subplot_titles=[title for title, _ in SECTION_CHART_ROWS],
+    )
+    for row, (fig, (_, barmode)) in enumerate(zip(figs, SECTION_CHART_ROWS), start=1):
+        base = 0.0
+        for trace in fig.to_dict()["data"]:
+            if barmode == "stack":
+                # barmode is figure-wide, so stacked rows share one offset group and stack by explicit bases
+                trace.update(offsetgroup=f"row{row}", base=base)
+                base = base + np.asarray(trace["y"])
+            merged.add_trace(go.Bar(trace), row=row, col=1)
+        merged.update_yaxes(title_text=fig.layout.yaxis.title.text, tickformat=",", row=row, col=1)
+    merged.update_layout(**CHART_LAYOUT, barmode="group", height=260 * len(figs))
+    merged.update_layout(margin_t=72)
+    merged.update_xaxes(**CHART_LAYOUT["xaxis"])
+    merged.update_yaxes(**CHART_LAYOUT["yaxis"])
+    return merged
+
+
+@st.fragment
+def section_charts(monthly):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
+    plotly_chart(section_charts_figure(
+        _series(monthly, *SIGNUPS_SERIES), _series(monthly, *ACTIVATION_SERIES),
+        _series(monthly, *RESCUE_SERIES), _series(monthly, *REPEAT_SERIES),
+    ), use_container_width=True)
+
+
+if merge_charts:
+    perf.mark("section_charts")
+    section_charts(monthly)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RECOVERY CURVE
+# ═══════════════════════════════════════════════════════════════════════════
+RECOVERY_TRACES = [
     ("IN Signup",       "eff_in_signup",       COLORS["red"],          "solid"),
     ("OON/Embed Signup","eff_oon_signup",       COLORS["orange"],       "solid"),
     ("M0 Activation",   "eff_m0",              COLORS["purple"],       "dash"),
@@ -827,61 +1486,143 @@ traces = [
     ("Inactive Rescue", "eff_inactive_rescue", COLORS["gray"],         "dot"),
     ("Repeat Rate",     "eff_repeat_ratio",    COLORS["purple"],       "dashdot"),
 ]
-for name, col, color, dash in traces:
-    fig_recovery.add_trace(go.Scatter(
-        x=df["month"], y=df[col], mode="lines+markers", name=name,
-        line=dict(color=color, width=2.5, dash=dash),
-        marker=dict(size=7),
-    ))
-fig_recovery.add_hline(y=1.0, line_dash="dash", line_color=COLORS["green"], line_width=1.5,
-                        annotation_text="Baseline", annotation_position="top right",
-                        annotation_font=dict(size=11, color=COLORS["green"]))
-fig_recovery.update_layout(
-    **CHART_LAYOUT,
-    yaxis_title="Performance vs. Baseline", yaxis_range=[0, 1.12],
-    yaxis_tickformat=".0%", height=380,
-)
-st.plotly_chart(fig_recovery, use_container_width=True)
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def recovery_figure(month, *curves):
+    fig_recovery = go.Figure()
+    for (name, _, color, dash), y in zip(RECOVERY_TRACES, curves):
+        fig_recovery.add_trace(go.Scatter(
+            x=month, y=y, mode="lines+markers", name=name,
+            line=dict(color=color, width=2.5, dash=dash),
+            marker=dict(size=7),
+        ))
+    fig_recovery.add_hline(y=1.0, line_dash="dash", line_color=COLORS["green"], line_width=1.5,
+                            annotation_text="Baseline", annotation_position="top right",
+                            annotation_font=dict(size=11, color=COLORS["green"]))
+    fig_recovery.update_layout(
+        **CHART_LAYOUT,
+        yaxis_title="Performance vs. Baseline", yaxis_range=[0, 1.12],
+        yaxis_tickformat=".0%", height=380,
+    )
+    return fig_recovery
+
+
+def _shape_summary(shapes):
+    if len(set(shapes.values())) == 1:
+        return f"{next(iter(shapes.values())).capitalize()} recovery"
+    groups = ("signups", "activation", "rescue", "repeat")
+    return "Recovery (" + ", ".join(f"{g} {s}" for g, s in zip(groups, shapes.values())) + ")"
+
+
+@st.fragment
+def recovery_section(monthly, recovery_months, shapes):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Recovery Curve</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>{_shape_summary(shapes)} from max depression back to baseline over {recovery_months} months.</div>", unsafe_allow_html=True)
+    plotly_chart(recovery_figure(*_series(monthly, *(col for _, col, _, _ in RECOVERY_TRACES))),
+                    use_container_width=True)
+
+
+perf.mark("recovery_curve")
+recovery_section(monthly, recovery_months, shapes)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REVENUE LOSS TIMELINE
+# ═══════════════════════════════════════════════════════════════════════════
+TIMELINE_COLORS = {
+    "activation": COLORS["red"],
+    "active_rescue": COLORS["dark"],
+    "inactive_rescue": COLORS["gray"],
+    "repeat": COLORS["purple"],
+}
+TIMELINE_YEAR = 2026  # year of months_all
+
+
+def calendar_labels(start_idx, n_months):
+    first = CALENDAR_MONTHS.index(months_all[start_idx])
+    return [f"{CALENDAR_MONTHS[(first + t) % 12]} '{(TIMELINE_YEAR + (first + t) // 12) % 100:02d}"
+            for t in range(n_months)]
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+@sized_figures
+def timeline_figure(loss_series, arpu, start_month, horizon, annual_discount):
+    cols = dict(zip((col for col, _ in TIMELINE_GROUPS.values()), map(np.asarray, loss_series[1:])))
+    tl = revenue_timeline(cols, arpu, horizon=horizon, annual_discount=annual_discount, by_group=True)
+    x = calendar_labels(start_month, horizon)
+    fig_tl = go.Figure()
+    for group, y in tl["by_group"].items():
+        fig_tl.add_trace(go.Bar(name=TIMELINE_LABELS[group], x=x, y=y[0], marker_color=TIMELINE_COLORS[group]))
+    fig_tl.update_layout(
+        **CHART_LAYOUT, barmode="stack", bargap=0.15,
+        yaxis_title="LTV Revenue Lost ($)", yaxis_tickprefix="$", yaxis_tickformat=",", height=360,
+    )
+    return fig_tl, float(tl["total"][0])
+
+
+@st.fragment
+def timeline_section(monthly, arpu, migration_month, rev_ltv):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:1.15rem; font-weight:700; color:{COLORS['dark']};'>Revenue Loss Timeline</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='font-size:0.83rem; color:{COLORS['gray']}; margin-bottom:16px;'>When the LTV loss lands: each month's lost BPs keep costing ARPU &times; retention in every later month. Curves past M12 decay at their recent monthly rate.</div>", unsafe_allow_html=True)
+
+    tc1, tc2 = st.columns(2)
+    with tc1:
+        horizon = st.select_slider("Horizon (months)", options=[12, 18, 24, 36, 48, 60], value=18, key="timeline_horizon")
+    with tc2:
+        discount = st.slider("Annual discount rate", min_value=0.0, max_value=0.20, value=0.0, step=0.01,
+                             format="%.2f", key="timeline_discount")
+
+    fig_tl, total = timeline_figure(
+        _series(monthly, *(col for col, _ in TIMELINE_GROUPS.values())), arpu, migration_month, horizon, discount,
+    )
+    plotly_chart(fig_tl, use_container_width=True)
+    st.markdown(f"<div style='font-size:0.8rem; color:{COLORS['gray']}; line-height:1.5;'>Present value over {horizon} months: <strong>-${total:,.0f}</strong> vs. -${rev_ltv:,.0f} undiscounted over the measured 12-month curves.</div>", unsafe_allow_html=True)
+
+
+perf.mark("revenue_timeline")
+timeline_section(monthly, arpu, migration_month, out["rev_ltv"])
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # MONTHLY DETAIL
 # ═══════════════════════════════════════════════════════════════════════════
-st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
-
-with st.expander("Monthly Detail Table"):
-    detail_rows = ""
-    totals = {"in_su": 0, "oon_su": 0, "su": 0, "in_m0": 0, "oon_m0": 0,
-              "in_m1": 0, "oon_m1": 0, "act": 0, "active_r": 0, "inactive_r": 0,
-              "resc": 0, "repeat": 0, "total_bp": 0, "ltv": 0}
-
-    for _, row in df.iterrows():
-        in_su = abs(row["in_signup_loss"])
-        oon_su = abs(row["oon_signup_loss"])
-        su = in_su + oon_su
-        in_m0 = abs(row["in_m0_loss"])
-        oon_m0 = abs(row["oon_m0_loss"])
-        in_m1 = abs(row["in_m1_loss"])
-        oon_m1 = abs(row["oon_m1_loss"])
-        act = in_m0 + oon_m0 + in_m1 + oon_m1
-        active_r = abs(row["active_rescue_loss"])
-        inactive_r = abs(row["inactive_rescue_loss"])
-        resc = active_r + inactive_r
-        rpt = abs(row["repeat_bp_loss"])
-        total_bp = act + resc + rpt
-        ltv_mo = (act * arpu * LTV_MULT_ACT +
-                  active_r * arpu * LTV_MULT_ACTIVE_RESC +
-                  inactive_r * arpu * LTV_MULT_INACTIVE_RESC +
-                  rpt * arpu * LTV_MULT_REPEAT)
-
-        for k, v in [("in_su", in_su), ("oon_su", oon_su), ("su", su),
-                     ("in_m0", in_m0), ("oon_m0", oon_m0), ("in_m1", in_m1), ("oon_m1", oon_m1),
-                     ("act", act), ("active_r", active_r), ("inactive_r", inactive_r),
-                     ("resc", resc), ("repeat", rpt), ("total_bp", total_bp), ("ltv", ltv_mo)]:
-            totals[k] += v
-
-        detail_rows += f"""<tr>
-            <td>{row['month']}</td>
+@st.fragment
+def detail_table_section(monthly, arpu):
+    st.markdown("<div style='height:32px; border-top:1px solid #e0e0e0; margin-top:24px;'></div>", unsafe_allow_html=True)
+
+    # Built only while switched on; toggling reruns this fragment alone
+    if not st.toggle("Monthly Detail Table", key="show_detail"):
+        return
+
+    # (column, month) matrix of absolute losses in table order; totals are row sums
+    a = {k: np.abs(monthly[k]) for k in (
+        "in_signup_loss", "oon_signup_loss", "in_m0_loss", "oon_m0_loss", "in_m1_loss", "oon_m1_loss",
+        "active_rescue_loss", "inactive_rescue_loss", "repeat_bp_loss",
+    )}
+    su = a["in_signup_loss"] + a["oon_signup_loss"]
+    act = a["in_m0_loss"] + a["oon_m0_loss"] + a["in_m1_loss"] + a["oon_m1_loss"]
+    resc = a["active_rescue_loss"] + a["inactive_rescue_loss"]
+    total_bp = act + resc + a["repeat_bp_loss"]
+    ltv_mo = arpu * (act * LTV_MULT_ACT + a["active_rescue_loss"] * LTV_MULT_ACTIVE_RESC
+                     + a["inactive_rescue_loss"] * LTV_MULT_INACTIVE_RESC + a["repeat_bp_loss"] * LTV_MULT_REPEAT)
+    detail = np.stack([
+        a["in_signup_loss"], a["oon_signup_loss"], su,
+        a["in_m0_loss"], a["oon_m0_loss"], a["in_m1_loss"], a["oon_m1_loss"], act,
+        a["active_rescue_loss"], a["inactive_rescue_loss"], resc,
+        a["repeat_bp_loss"], total_bp, ltv_mo,
+    ])
+    totals = dict(zip(
+        ("in_su", "oon_su", "su", "in_m0", "oon_m0", "in_m1", "oon_m1", "act",
+         "active_r", "inactive_r", "resc", "repeat", "total_bp", "ltv"),
+        detail.sum(axis=1).tolist(),
+    ))
+
+    detail_rows = "".join(f"""<tr>
+            <td>{month}</td>
             <td class="num">{in_su:,.0f}</td><td class="num">{oon_su:,.0f}</td><td class="num" style="font-weight:600">{su:,.0f}</td>
             <td class="num">{in_m0:,.0f}</td><td class="num">{oon_m0:,.0f}</td>
             <td class="num">{in_m1:,.0f}</td><td class="num">{oon_m1:,.0f}</td><td class="num" style="font-weight:600">{act:,.0f}</td>
@@ -889,7 +1630,8 @@ with st.expander("Monthly Detail Table"):
             <td class="num">{rpt:,.0f}</td>
             <td class="num" style="font-weight:700">{total_bp:,.0f}</td>
             <td class="num" style="font-weight:700; color:{COLORS['red']}">-${ltv_mo:,.0f}</td>
-        </tr>"""
+        </tr>""" for month, (in_su, oon_su, su, in_m0, oon_m0, in_m1, oon_m1, act, active_r, inactive_r, resc, rpt, total_bp, ltv_mo)
+        in zip(monthly["month"].tolist(), detail.T.tolist()))
 
     st.markdown(f"""
     <div style="overflow-x:auto;">
@@ -932,17 +1674,29 @@ with st.expander("Monthly Detail Table"):
     </div>
     """, unsafe_allow_html=True)
 
+
+perf.mark("detail_table")
+detail_table_section(monthly, arpu)
+
+perf.mark("assumptions")
 with st.expander("Model Assumptions & Data Sources"):
     oon_embed_ratio = oon_embed_signups_all[0] / in_signups_all[0]
+    linear_example = f"{recovery_months}mo window and 0.90 depression: Month 1 = 0.90 → Month 2 = {0.90 + (1.0 - 0.90) * 1/recovery_months:.2f} → Month 3 = {0.90 + (1.0 - 0.90) * 2/recovery_months:.2f} → then back to 1.0"
+    if set(shapes.values()) == {"linear"}:
+        recovery_notes = f"""- All depression levers recover **linearly** back to baseline over the recovery window
+- Example with {linear_example}
+- This applies to all levers: signup, activation, rescue, and repeat rate depression"""
+    else:
+        recovery_notes = f"""- Depression levers recover back to baseline over the recovery window: {_shape_summary(shapes).lower()}
+- Exponential rebounds fast with a long tail, logistic follows an S-curve, step holds full depression until the window ends, custom follows the typed monthly curve
+- Linear example with {linear_example}"""
     st.markdown(f"""
-**Signup Projections** (Feb–Dec 2026)
+**Signup Projections** ({months_all[0]}–{months_all[-1]} 2026)
 - IN signups from BP forecast (regular column)
 - OON/Embed estimated at ~{oon_embed_ratio:.0%} of IN (Feb 2026 actuals)
 
 **Recovery Model**
-- All depression levers recover **linearly** back to baseline over the recovery window
-- Example with {recovery_months}mo window and 0.90 depression: Month 1 = 0.90 → Month 2 = {0.90 + (1.0 - 0.90) * 1/recovery_months:.2f} → Month 3 = {0.90 + (1.0 - 0.90) * 2/recovery_months:.2f} → then back to 1.0
-- This applies to all levers: signup, activation, rescue, and repeat rate depression
+{recovery_notes}
 
 **Channel-Specific Email Dependency**
 - **Signups**: IN heavily email-dependent. OON from performance marketing; Embed via partner flows.
@@ -953,7 +1707,7 @@ with st.expander("Model Assumptions & Data Sources"):
 - M0 activation: {m0_activation_base:.2%} · M1+ uplift: {m1_plus_uplift:.0%}pp
 - Active rescue: {active_rescue_rate:.2%} · Inactive rescue: {inactive_rescue_rate:.2%}
 - Repeat rate: {repeat_rate_base:.2%} (trailing 6mo avg, Sep 2025–Feb 2026)
-- Bill Paid Previous Month: {bp_prev_month_feb:,} (Feb 2026), growing ~3%/mo
+- Bill Paid Previous Month: {bp_prev_month_feb:,.0f} (Feb 2026), growing ~3%/mo
 - ~70% autopay → only ~30% manual-pay users are email-sensitive for repeat rate
 
 **Revenue — LTV-Weighted (Primary)**
@@ -966,3 +1720,69 @@ with st.expander("Model Assumptions & Data Sources"):
 
 Retention curves from Apr–Jun 2024 cohorts (activation) and active/inactive segments (rescue).
     """)
+
+# Runs that got this far; the difference to `runs` was superseded mid-flight
+run_stats["completed"] += 1
+payload_kb = chart_payload["bytes"] / 1024
+run_stats_slot.caption(
+    f"{run_stats['runs']} reruns · {run_stats['model_updates']} model updates · "
+    f"{run_stats['runs'] - run_stats['completed']} superseded · last {(time.perf_counter() - run_t0) * 1e3:,.0f} ms"
+    f" · {payload_kb:,.0f} KB of charts" + (" (over budget)" if payload_kb > PAYLOAD_BUDGET_KB else "")
+)
+if payload_kb > PAYLOAD_BUDGET_KB:
+    logger.warning("chart payload %.0f KB in %d charts exceeds %s=%g",
+                   payload_kb, chart_payload["charts"], PAYLOAD_BUDGET_ENV_VAR, PAYLOAD_BUDGET_KB)
+elif perf.enabled():
+    logger.info("chart payload %.0f KB in %d charts", payload_kb, chart_payload["charts"])
+
+# This session's own finished run (None when timing and tracing are off);
+# bench.py reads the section times from here
+perf_run = st.session_state[PERF_RUN_KEY] = perf.finish()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TRACE PANEL
+# ═══════════════════════════════════════════════════════════════════════════
+TRACE_CATEGORIES = {"section": "Section", "model": "Model stage", "serialize": "Figure JSON"}
+
+
+def trace_panel(events):
+    """Where the traced run went: sections, with the model stages and figure JSON inside them."""
+    sections = [e for e in events if e["cat"] == "section"]
+    spans = [e for e in events if e["cat"] != "section"]
+    total = sum(e["seconds"] for e in sections)
+
+    def row(e, label):
+        peak, size = e["args"].get("peak_bytes"), e["args"].get("bytes")
+        return (
+            f"| {label} | {TRACE_CATEGORIES.get(e['cat'], e['cat'])} | {e['seconds'] * 1e3:,.2f} "
+            f"| {e['seconds'] / (total or 1):.1%} | {'' if peak is None else f'{peak / 1024:,.0f}'} "
+            f"| {'' if size is None else f'{size / 1024:,.1f}'} |"
+        )
+
+    rows = []
+    for s in sections:
+        rows.append(row(s, f"**{s['name']}**"))
+        rows += [row(e, f"└ `{e['name']}`") for e in spans if s["start"] <= e["start"] < s["start"] + s["seconds"]]
+    by_kind = {}
+    for e in spans:
+        by_kind[e["cat"]] = by_kind.get(e["cat"], 0.0) + e["seconds"]
+    figure_bytes = sum(e["args"].get("bytes", 0) for e in spans)
+    with st.expander("Trace", expanded=True):
+        st.caption(
+            f"{total * 1e3:,.0f} ms traced · "
+            + " · ".join(f"{TRACE_CATEGORIES.get(k, k).lower()} {v * 1e3:,.0f} ms" for k, v in by_kind.items())
+            + f" · {figure_bytes / 1024:,.0f} KB of figure JSON · tracemalloc slows traced runs"
+        )
+        st.markdown(
+            "| Event | Kind | ms | Share | Peak alloc (KB) | JSON (KB) |\n|---|---|--:|--:|--:|--:|\n" + "\n".join(rows)
+        )
+        st.download_button(
+            "Download Chrome trace", json.dumps(perf.chrome_trace(events)),
+            file_name="braze_dashboard_trace.json", mime="application/json",
+            help="Open in chrome://tracing or ui.perfetto.dev",
+        )
+
+
+if perf_run is not None and perf_run.events is not None:
+    trace_panel(perf_run.events)
@@ -0,0 +1,277 @@
+"""Headless batch runner: stream scenarios from CSV/JSONL through the model.
+
+    python batch.py scenarios.csv -o results.csv
+    cat scenarios.jsonl | python batch.py - --input-format jsonl --workers 8 > results.jsonl
+
+Each input row is one set of sidebar inputs (any of model.INPUT_NAMES; missing
+columns take the dashboard defaults) plus an optional `id` that is copied to
+the output. Values must be finite numbers within model.INPUT_RANGES, as for
+server.py. Input is read and evaluated in chunks of raw lines, so memory is
+bounded by chunk size × in-flight chunks regardless of file size. CSV rows
+must not contain quoted newlines.
+
+Errors name the physical input line (blank lines count). By default the
+first bad row stops the run; --on-error skip drops bad rows and --on-error
+log also reports each one on stderr, and the rest of the file is still
+evaluated.
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+
+from model import DEFAULT_INPUTS, INPUT_NAMES, INPUT_RANGES, run_totals
+
+
+OUTPUT_FIELDS = (
+    "rev_in_month", "rev_ltv", "expected_revenue_impact",
+    "net_value_of_extension", "breakeven_prob_ltv", "decision",
+)
+FORMATS = ("csv", "jsonl")
+ON_ERROR = ("abort", "skip", "log")
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def _detect_format(path, explicit):
+    if explicit:
+        return explicit
+    ext = os.path.splitext(path or "")[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "csv"
+
+
+def _to_float(k, col, line_numbers):
+    """One input column as floats, checked against the dashboard's INPUT_RANGES like server.py."""
+    out = None
+    # CSV cells are all strings and JSONL numbers ints or floats; anything
+    # else (true, objects, lists, blanks to default) takes the slow path
+    types = set(map(type, col))
+    if types <= {str} or types <= {int, float}:
+        try:
+            out = np.array(col, dtype=float)
+        except ValueError:
+            pass
+    if out is None:
+        out = np.empty(len(col))
+        for i, v in enumerate(col):
+            if v == "" or v is None:
+                out[i] = DEFAULT_INPUTS[k]
+                continue
+            try:
+                if isinstance(v, bool):
+                    raise TypeError
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                raise ValueError(f"line {line_numbers[i]}: {k}={v!r} is not a number") from None
+    lo, hi, _ = INPUT_RANGES[k]
+    bad = ~((out >= lo) & (out <= hi))  # NaN fails both
+    if bad.any():
+        i = int(bad.argmax())
+        raise ValueError(f"line {line_numbers[i]}: {k}={col[i]!r} must be in [{lo}, {hi}]")
+    return out
+
+
+def _check_keys(keys, line_no):
+    unknown = set(keys) - set(INPUT_NAMES) - {"id"}
+    if unknown:
+        raise ValueError(f"line {line_no}: unknown inputs: {', '.join(sorted(unknown))}")
+
+
+def _parse_rows(fmt, header, lines, line_numbers):
+    """Column arrays for one chunk, plus the pass-through ids."""
+    n = len(lines)
+    if fmt == "csv":
+        rows = list(csv.reader(lines))
+        for i, row in enumerate(rows):
+            if len(row) != len(header):
+                raise ValueError(f"line {line_numbers[i]}: expected {len(header)} fields, got {len(row)}")
+        raw = dict(zip(header, zip(*rows))) if rows else {}
+    else:
+        raw = {}
+        for i, line in enumerate(lines):
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_numbers[i]}: {e}") from None
+            if not isinstance(rec, dict):
+                raise ValueError(f"line {line_numbers[i]}: expected a JSON object")
+            _check_keys(rec, line_numbers[i])
+            for k, v in rec.items():
+                # Absent keys and nulls both take the default
+                default = DEFAULT_INPUTS.get(k, "")
+                raw.setdefault(k, [default] * n)[i] = default if v is None else v
+    ids = [str(v) for v in raw.get("id", [""] * n)]
+    values = {k: _to_float(k, raw[k], line_numbers) if k in raw else DEFAULT_INPUTS[k] for k in INPUT_NAMES}
+    return ids, values
+
+
+def _evaluate(fmt_in, fmt_out, header, lines, line_numbers):
+    ids, values = _parse_rows(fmt_in, header, lines, line_numbers)
+    try:
+        out = run_totals(**values)
+    except ValueError as e:
+        if len(lines) == 1:
+            raise ValueError(f"line {line_numbers[0]}: {e}") from None
+        raise
+    n = len(ids)
+    decision = np.where(np.broadcast_to(out["extend"], (n,)), "extend", "migrate").tolist()
+    numeric = [np.broadcast_to(out[k], (n,)).tolist() for k in OUTPUT_FIELDS[:-1]]
+    if fmt_out == "csv":
+        if any("," in i or '"' in i or "\n" in i for i in ids):
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerows([i] for i in ids)
+            ids = buf.getvalue().splitlines()
+        row = "%s" + ",%.2f" * (len(numeric) - 1) + ",%.6f,%s\n"
+        return "".join(row % r for r in zip(ids, *numeric, decision))
+    keys = ("id",) + OUTPUT_FIELDS
+    return "".join(
+        json.dumps(dict(zip(keys, (r[0],) + tuple(round(v, 6) for v in r[1:-1]) + (r[-1],)))) + "\n"
+        for r in zip(ids, *numeric, decision)
+    )
+
+
+def _bisect(fmt_in, fmt_out, header, lines, line_numbers, on_error, errors):
+    """Evaluate a chunk that failed as a whole, halving it down to the bad rows.
+
+    Returns the output for the good rows, in input order; the bad rows'
+    "line N: ..." messages go to `errors`, or the first is raised for abort.
+    """
+    try:
+        return _evaluate(fmt_in, fmt_out, header, lines, line_numbers)
+    except ValueError as e:
+        if len(lines) == 1:
+            if on_error == "abort":
+                raise
+            errors.append(str(e))
+            return ""
+    mid = len(lines) // 2
+    return (_bisect(fmt_in, fmt_out, header, lines[:mid], line_numbers[:mid], on_error, errors)
+            + _bisect(fmt_in, fmt_out, header, lines[mid:], line_numbers[mid:], on_error, errors))
+
+
+def evaluate_chunk(fmt_in, fmt_out, header, lines, line_numbers, on_error="abort"):
+    """Parse, evaluate and format one chunk of raw input lines. Runs in workers.
+
+    Returns (output text, error messages of the rows left out); with
+    on_error="abort" the first bad row raises ValueError instead.
+    """
+    try:
+        return _evaluate(fmt_in, fmt_out, header, lines, line_numbers), []
+    except ValueError:
+        pass
+    errors = []
+    return _bisect(fmt_in, fmt_out, header, lines, line_numbers, on_error, errors), errors
+
+
+def read_chunks(stream, fmt, chunk_size):
+    """Yield (header, lines, line_numbers) without reading ahead of the consumer.
+
+    line_numbers are the 1-based physical line of each kept line: blank
+    lines are dropped but still counted.
+    """
+    header = None
+    start = 1
+    if fmt == "csv":
+        first = stream.readline()
+        if not first:
+            return
+        header = next(csv.reader([first]))
+        header = [h.strip() for h in header]
+        _check_keys(header, 1)
+        start = 2
+    lines = ((n, line) for n, line in enumerate(stream, start) if line.strip())
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        numbers, chunk = zip(*chunk)
+        yield header, list(chunk), list(numbers)
+
+
+def run(stream_in, stream_out, fmt_in, fmt_out, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+        on_error="abort", stream_err=None):
+    """Stream every chunk through the model in input order.
+
+    Returns (rows written, bad rows left out). With on_error="log" each bad
+    row's "line N: ..." message is written to stream_err (default stderr).
+    """
+    if on_error not in ON_ERROR:
+        raise ValueError(f"on_error must be one of {', '.join(ON_ERROR)}")
+    if fmt_out == "csv":
+        stream_out.write(",".join(("id",) + OUTPUT_FIELDS) + "\n")
+    stream_err = stream_err or sys.stderr
+    n_rows = n_bad = 0
+
+    def write(n, result):
+        nonlocal n_rows, n_bad
+        text, errors = result
+        stream_out.write(text)
+        n_rows += n - len(errors)
+        n_bad += len(errors)
+        if on_error == "log":
+            for msg in errors:
+                print(f"skipped {msg}", file=stream_err)
+
+    chunks = read_chunks(stream_in, fmt_in, chunk_size)
+    if workers <= 1:
+        for header, lines, line_numbers in chunks:
+            write(len(lines), evaluate_chunk(fmt_in, fmt_out, header, lines, line_numbers, on_error))
+        return n_rows, n_bad
+
+    # Keep at most 2 chunks per worker in flight so memory stays flat
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for header, lines, line_numbers in chunks:
+            pending.append((len(lines), pool.submit(
+                evaluate_chunk, fmt_in, fmt_out, header, lines, line_numbers, on_error)))
+            if len(pending) >= 2 * workers:
+                n, fut = pending.popleft()
+                write(n, fut.result())
+        while pending:
+            n, fut = pending.popleft()
+            write(n, fut.result())
+    return n_rows, n_bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Braze migration risk scenarios in bulk.")
+    parser.add_argument("input", nargs="?", default="-", help="CSV or JSONL file of scenarios, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout (default)")
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from the file extension, else csv")
+    parser.add_argument("--output-format", choices=FORMATS, help="default: from the file extension, else csv")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per evaluation chunk")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default 1: in-process)")
+    parser.add_argument("--on-error", choices=ON_ERROR, default="abort",
+                        help="bad rows: stop at the first (default), skip them, or skip and report each on stderr")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    fmt_in = _detect_format(None if args.input == "-" else args.input, args.input_format)
+    fmt_out = _detect_format(None if args.output == "-" else args.output, args.output_format)
+    stream_in = sys.stdin if args.input == "-" else open(args.input, newline="")
+    stream_out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        n_rows, n_bad = run(stream_in, stream_out, fmt_in, fmt_out, args.chunk_size, args.workers, args.on_error)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if stream_in is not sys.stdin:
+            stream_in.close()
+        if stream_out is not sys.stdout:
+            stream_out.close()
+    print(f"{n_rows:,} scenarios" + (f", {n_bad:,} bad rows skipped" if n_bad else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Rerun latency benchmarks for the dashboard and the model core.
+
+    python bench.py                          # full matrix -> bench_results.json
+    python bench.py --quick -o /tmp/b.json   # smaller matrix
+    python bench.py --compare old.json       # print ratios against an earlier run
+    python bench.py --cold-start 5 --skip-app --skip-model   # fresh-process startup only
+
+Dashboard cases drive app.py headlessly through streamlit's AppTest. Each
+one times full reruns plus the per-section split recorded by perf.mark().
+Cold-start cases run the first script run in a fresh interpreter each time:
+`startup` is interpreter plus streamlit import, `first_paint` adds the
+script up to the end of the hero cards and decision badge, `first_run` the
+whole script; `warm_rerun` is the next run in the same process.
+Model cases microbenchmark the pure functions. Results are written as JSON
+with the commit hash, so runs from different commits can be compared.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import model
+import perf
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "app.py")
+PERF_RUN_KEY = "perf_run"  # where app.py keeps the session's finished perf.Run
+
+# Widget key -> values swept in the dashboard matrix
+APP_MATRIX = {
+    "recovery": [1, 2, 3, 4, 5, 6],
+    "m0_dep": [0.95, 0.5],
+    "mc_mode": [False, True],
+}
+APP_MATRIX_QUICK = {
+    "recovery": [1, 3, 6],
+    "m0_dep": [0.95],
+    "mc_mode": [False],
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(samples):
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "repeats": len(samples),
+    }
+
+
+def time_call(fn, repeats, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return _summary(samples)
+
+
+# ── Dashboard ───────────────────────────────────────────────────────────────
+def _set_widget(at, key, value):
+    for kind in ("slider", "toggle", "number_input", "select_slider", "selectbox"):
+        try:
+            getattr(at, kind)(key=key).set_value(value)
+            return
+        except KeyError:
+            continue
+    raise KeyError(f"no widget with key {key!r}")
+
+
+def bench_app(matrix, repeats):
+    from streamlit.testing.v1 import AppTest
+
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)  # streamlit run puts the script dir on the path; AppTest does not
+    perf.enable()
+    results = []
+    for combo in itertools.product(*matrix.values()):
+        params = dict(zip(matrix, combo))
+        at = AppTest.from_file(APP, default_timeout=120)
+        t0 = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - t0
+        for key, value in params.items():
+            _set_widget(at, key, value)
+        samples, sections = [], {}
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - t0)
+            if at.exception:
+                raise RuntimeError(f"app raised with {params}: {at.exception[0].message}")
+            for name, seconds in at.session_state[PERF_RUN_KEY].sections:
+                sections.setdefault(name, []).append(seconds)
+        results.append({
+            "name": "app_rerun",
+            "params": params,
+            "first_run_s": first,
+            **_summary(samples),
+            "sections_median_s": {k: statistics.median(v) for k, v in sections.items()},
+        })
+        print(f"app_rerun {params}: {results[-1]['median_s'] * 1e3:.1f} ms", file=sys.stderr)
+    return results
+
+
+# ── Cold start ──────────────────────────────────────────────────────────────
+FIRST_PAINT_SECTION = "hero_cards"  # last section before the charts stream in
+
+# Regression budget for the cold-start medians, in seconds. Measured at 544 ms
+# startup and 859 ms first paint; plotly is not on this path to win back,
+# because `import streamlit` already imports plotly.graph_objects, so app.py
+# importing it at the top adds nothing (deferring it into the figure
+# builders measured the same first paint). Cases over budget are flagged.
+COLD_START_BUDGET_S = {"startup": 0.65, "first_paint": 1.0}
+
+# Runs in a fresh interpreter; argv[1] is the wall time the parent spawned it
+_COLD_START_CHILD = """
+import json, sys, time
+spawned = float(sys.argv[1])
+sys.path.insert(0, {here!r})
+from streamlit.testing.v1 import AppTest
+import perf
+perf.enable()
+ready = time.time() - spawned
+at = AppTest.from_file({app!r}, default_timeout=120)
+t0 = time.perf_counter()
+at.run()
+first = time.perf_counter() - t0
+if at.exception:
+    sys.exit(at.exception[0].message)
+sections = at.session_state[{perf_run_key!r}].sections
+t0 = time.perf_counter()
+at.run()
+print(json.dumps({{"startup": ready, "first": first, "rerun": time.perf_counter() - t0, "sections": sections}}))
+"""
+
+
+def _first_paint(sections):
+    total = 0.0
+    for name, seconds in sections:
+        total += seconds
+        if name == FIRST_PAINT_SECTION:
+            break
+    return total
+
+
+def bench_cold_start(repeats):
+    child = _COLD_START_CHILD.format(here=HERE, app=APP, perf_run_key=PERF_RUN_KEY)
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", child, repr(time.time())],
+            cwd=HERE, capture_output=True, text=True, env={**os.environ, perf.ENV_VAR: "1"},
+        )
+        if proc.returncode:
+            raise RuntimeError(f"cold start failed: {proc.stderr.strip()[-500:]}")
+        runs.append(json.loads(proc.stdout.splitlines()[-1]))
+
+    sections = {}
+    for r in runs:
+        for name, seconds in r["sections"]:
+            sections.setdefault(name, []).append(seconds)
+    cases = {
+        "startup": [r["startup"] for r in runs],
+        "first_paint": [r["startup"] + _first_paint(r["sections"]) for r in runs],
+        "first_run": [r["startup"] + r["first"] for r in runs],
+        "warm_rerun": [r["rerun"] for r in runs],
+    }
+    results = []
+    for case, samples in cases.items():
+        results.append({"name": f"cold_start.{case}", "params": {}, **_summary(samples)})
+        if case == "first_run":
+            results[-1]["sections_median_s"] = {k: statistics.median(v) for k, v in sections.items()}
+        budget = COLD_START_BUDGET_S.get(case)
+        over = budget is not None and results[-1]["median_s"] > budget
+        if budget is not None:
+            results[-1]["budget_s"] = budget
+        print(f"cold_start.{case}: {results[-1]['median_s'] * 1e3:.1f} ms"
+              + (f"  OVER BUDGET ({budget * 1e3:.0f} ms)" if over else ""), file=sys.stderr)
+    return results
+
+
+# ── Model core ──────────────────────────────────────────────────────────────
+def bench_model(repeats):
+    from montecarlo import default_spec, simulate, UNCERTAIN_INPUTS
+    from sensitivity import one_at_a_time
+    from sobol import sobol_indices
+    import surface
+    import timeline
+
+    d = model.DEFAULT_INPUTS
+    rng = np.random.default_rng(0)
+
+    def batch(n):
+        x = dict(d)
+        x["recovery_months"] = rng.integers(1, 7, n)
+        for k in ("in_signup_depression", "m0_depression", "active_rescue_depression"):
+            x[k] = rng.uniform(0, 1, n)
+        return x
+
+    def evaluate_cold():
+        for f in model.MEMOIZED_STAGES:
+            f.cache_clear()
+        model.evaluate(**d)
+
+    def surface_cold():
+        surface._surface.cache_clear()
+        surface.breakeven_surface(**d)
+
+    specs = {k: default_spec(k, d[k]) for k in UNCERTAIN_INPUTS}
+    b1e5, b1e6 = batch(100_000), batch(1_000_000)
+    cols1e5 = model.run_scenarios(**b1e5)
+    curves60 = {g: timeline.extend_curve(c, 60) for g, c in timeline.default_curves().items()}
+    cases = [
+        ("evaluate_cold", {}, evaluate_cold),
+        ("evaluate_warm", {}, lambda: model.evaluate(**d)),
+        ("run_scenarios", {"n": 1}, lambda: model.run_scenarios(n_months=3, **d)),
+        ("run_scenarios", {"n": 100_000}, lambda: model.run_scenarios(**b1e5)),
+        ("run_totals", {"n": 100_000}, lambda: model.run_totals(**b1e5)),
+        ("run_totals", {"n": 1_000_000}, lambda: model.run_totals(**b1e6)),
+        ("one_at_a_time", {}, lambda: one_at_a_time(d)),
+        ("breakeven_surface_cold", {}, surface_cold),
+        ("revenue_timeline", {"n": 100_000, "horizon": 60},
+         lambda: timeline.revenue_timeline(cols1e5, d["arpu"], horizon=60, annual_discount=0.08)),
+        ("revenue_timeline", {"n": 100_000, "curve_months": 60},
+         lambda: timeline.revenue_timeline(cols1e5, d["arpu"], curves=curves60)),
+        ("monte_carlo", {"n": 200_000}, lambda: simulate(d, specs, 200_000)),
+        ("monte_carlo", {"n": 1_000_000}, lambda: simulate(d, specs, 1_000_000)),
+        ("sobol", {"n": 8192}, lambda: sobol_indices(d)),
+    ]
+    results = []
+    for name, params, fn in cases:
+        results.append({"name": name, "params": params, **time_call(fn, repeats)})
+        print(f"{name} {params}: {results[-1]['median_s'] * 1e3:.3f} ms", file=sys.stderr)
+    return results
+
+
+def _key(r):
+    return r["name"], json.dumps(r["params"], sort_keys=True)
+
+
+def compare(old_path, new):
+    with open(old_path) as f:
+        old = {_key(r): r for r in json.load(f)["results"]}
+    print(f"{'case':60s} {'old ms':>10s} {'new ms':>10s} {'ratio':>7s}")
+    for r in new["results"]:
+        o = old.get(_key(r))
+        if o is None:
+            continue
+        label = f"{r['name']} {json.dumps(r['params'], sort_keys=True)}"
+        print(f"{label[:60]:60s} {o['median_s'] * 1e3:10.2f} {r['median_s'] * 1e3:10.2f} "
+              f"{r['median_s'] / o['median_s']:7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default=os.path.join(HERE, "bench_results.json"))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="smaller dashboard matrix")
+    parser.add_argument("--skip-app", action="store_true", help="model microbenchmarks only")
+    parser.add_argument("--skip-model", action="store_true", help="dashboard reruns only")
+    parser.add_argument("--cold-start", type=int, default=0, metavar="N",
+                        help="also time N fresh-process first runs")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="print ratios against an earlier results file")
+    args = parser.parse_args(argv)
+
+    results = []
+    if not args.skip_model:
+        results += bench_model(args.repeats)
+    if not args.skip_app:
+        results += bench_app(APP_MATRIX_QUICK if args.quick else APP_MATRIX, args.repeats)
+    if args.cold_start:
+        results += bench_cold_start(args.cold_start)
+
+    import streamlit
+    out = {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "streamlit": streamlit.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(out, f, indent=2)
+    print(f"wrote {args.output}", file=sys.stderr)
+    if args.compare:
+        compare(args.compare, out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Model input data: signup forecasts, base populations and retention curves.
+
+Each dataset is one file in DATA_DIR named `<dataset>.csv`, `.json` or
+`.parquet` (the first found, in that order). Files are validated against
+DATASETS and turned into read-only contiguous arrays once per file version:
+the cache is process-wide and keyed on path + mtime + size, so every session
+and rerun shares the same arrays and an edited file is re-read on next use.
+
+JSON may be a list of records, an object of columns, or (for one-row
+datasets) an object of scalars. Parquet needs pandas with pyarrow.
+"""
+import csv
+import json
+import os
+import threading
+
+import numpy as np
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get("BRAZE_DATA_DIR") or os.path.join(HERE, "data")
+EXTENSIONS = (".csv", ".json", ".parquet")
+
+# Dataset -> {column: kind}. Kinds: "label" unique strings, "month"
+# consecutive calendar abbreviations from FIRST_MONTH, "count" non-negative
+# numbers, "rate" numbers in [0, 1], "age" 0, 1, 2, … in order.
+DATASETS = {
+    "signups": {"month": "month", "in_signups": "count", "oon_embed_signups": "count"},
+    "populations": {
+        "active_users_feb": "count", "inactive_users_feb": "count",
+        "active_rescue_rate": "rate", "inactive_rescue_rate": "rate",
+        "bp_prev_month_feb": "count",
+    },
+    "repeat_rates": {"repeat_rate": "rate"},
+    "retention": {"age": "age", "activation": "rate", "active_rescue": "rate", "inactive_rescue": "rate"},
+}
+ONE_ROW = {"populations"}
+MIN_ROWS = {"signups": 1, "repeat_rates": 1, "retention": 2}
+
+CALENDAR_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+# model.grow() counts months from February, the populations' reference month
+FIRST_MONTH = "Feb"
+
+_cache = {}  # path -> (stamp, columns)
+_lock = threading.Lock()
+
+
+def find(name, data_dir=None):
+    """Path of the file holding dataset `name`."""
+    data_dir = data_dir or DATA_DIR
+    for ext in EXTENSIONS:
+        path = os.path.join(data_dir, name + ext)
+        if os.path.isfile(path):
+            return path
+    raise ValueError(f"no {name}{{{','.join(EXTENSIONS)}}} in {data_dir}")
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+# ── Readers ─────────────────────────────────────────────────────────────────
+# Each returns {column: list of raw values}.
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    cols = {k.strip(): [] for k in rows[0]} if rows else {}
+    for i, row in enumerate(rows, 2):
+        # DictReader files extra fields under None and fills missing ones with None
+        if None in row or None in row.values():
+            raise ValueError(f"{path}: line {i} does not have one field per header column")
+        for k, v in row.items():
+            cols[k.strip()].append(v.strip() if isinstance(v, str) else v)
+    return cols
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    if isinstance(raw, list):
+        if not all(isinstance(r, dict) for r in raw):
+            raise ValueError(f"{path}: expected a list of records")
+        cols = {}
+        for i, r in enumerate(raw):
+            for k, v in r.items():
+                cols.setdefault(k, [None] * i).append(v)
+            for k in cols.keys() - r.keys():
+                cols[k].append(None)
+        return cols
+    if isinstance(raw, dict):
+        if all(isinstance(v, list) for v in raw.values()):
+            return raw
+        if not any(isinstance(v, (list, dict)) for v in raw.values()):
+            return {k: [v] for k, v in raw.items()}
+    raise ValueError(f"{path}: expected records, an object of columns or an object of scalars")
+
+
+def _read_parquet(path):
+    try:
+        import pandas as pd
+        df = pd.read_parquet(path)
+    except ImportError as e:
+        raise ValueError(f"{path}: reading Parquet needs pandas with pyarrow ({e})") from e
+    return {str(k): df[k].tolist() for k in df.columns}
+
+
+READERS = {".csv": _read_csv, ".json": _read_json, ".parquet": _read_parquet}
+
+
+# ── Validation ──────────────────────────────────────────────────────────────
+def _numbers(path, col, values):
+    try:
+        a = np.array([float(v) for v in values])
+    except (TypeError, ValueError):
+        raise ValueError(f"{path}: column {col!r} must be numeric") from None
+    if not np.all(np.isfinite(a)):
+        raise ValueError(f"{path}: column {col!r} has missing or non-finite values")
+    return a
+
+
+def _months(path, col, labels):
+    first = CALENDAR_MONTHS.index(FIRST_MONTH)
+    expected = tuple(CALENDAR_MONTHS[(first + i) % 12] for i in range(len(labels)))
+    if labels != expected:
+        bad = next(i for i, (a, b) in enumerate(zip(labels, expected)) if a != b)
+        raise ValueError(
+            f"{path}: column {col!r} must list calendar months {', '.join(expected[:3])}, … in order; "
+            f"row {bad + 1} is {labels[bad]!r}, expected {expected[bad]!r}"
+        )
+
+
+def validate(name, cols, path=None):
+    """Check raw columns against DATASETS[name]; read-only arrays (labels stay a tuple)."""
+    path = path or name
+    schema = DATASETS[name]
+    missing = [c for c in schema if c not in cols]
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+    n = len(cols[next(iter(schema))])
+    if any(len(cols[c]) != n for c in schema):
+        raise ValueError(f"{path}: columns have different lengths")
+    if name in ONE_ROW and n != 1:
+        raise ValueError(f"{path}: expected exactly one row, got {n}")
+    if n < MIN_ROWS.get(name, 1):
+        raise ValueError(f"{path}: expected at least {MIN_ROWS.get(name, 1)} rows, got {n}")
+
+    out = {}
+    for col, kind in schema.items():
+        if kind in ("label", "month"):
+            labels = tuple(str(v) for v in cols[col])
+            if len(set(labels)) != n or not all(labels):
+                raise ValueError(f"{path}: column {col!r} must be unique and non-empty")
+            if kind == "month":
+                _months(path, col, labels)
+            out[col] = labels
+            continue
+        a = _numbers(path, col, cols[col])
+        if kind == "count" and np.any(a < 0):
+            raise ValueError(f"{path}: column {col!r} must be non-negative")
+        if kind == "rate" and np.any((a < 0) | (a > 1)):
+            raise ValueError(f"{path}: column {col!r} must lie in [0, 1]")
+        if kind == "age" and not np.array_equal(a, np.arange(n)):
+            raise ValueError(f"{path}: column {col!r} must run 0, 1, 2, … without gaps")
+        a = np.ascontiguousarray(a)
+        a.flags.writeable = False
+        out[col] = a
+    if name == "retention":
+        for col in ("activation", "active_rescue", "inactive_rescue"):
+            if out[col][0] != 1.0:
+                raise ValueError(f"{path}: {col} retention must be 1.0 at age 0")
+    return out
+
+
+# ── Loading ─────────────────────────────────────────────────────────────────
+def load_dataset(name, data_dir=None):
+    """Validated columns of dataset `name`, re-read only when its file changed.
+
+    Returns (columns, stamp) where stamp identifies the file version.
+    """
+    path = os.path.abspath(find(name, data_dir))
+    stamp = _stamp(path)
+    with _lock:
+        hit = _cache.get(path)
+        if hit is not None and hit[0] == stamp:
+            return hit[1], (path,) + stamp
+        ext = os.path.splitext(path)[1].lower()
+        try:
+            cols = validate(name, READERS[ext](path), path)
+        except (OSError, UnicodeDecodeError, csv.Error, json.JSONDecodeError) as e:
+            raise ValueError(f"{path}: {e}") from e
+        _cache[path] = (stamp, cols)
+        return cols, (path,) + stamp
+
+
+def load(data_dir=None):
+    """Every dataset as {name: columns}, plus a "version" tuple that changes with any file."""
+    out, version = {}, []
+    for name in DATASETS:
+        cols, stamp = load_dataset(name, data_dir)
+        out[name] = cols if name not in ONE_ROW else {k: v[0].item() for k, v in cols.items()}
+        version.append(stamp)
+    out["version"] = tuple(version)
+    return out
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
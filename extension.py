@@ -0,0 +1,104 @@
+"""Optimal Iterable extension: how many months to keep it, and below which completion.
+
+Iterable is bought by the month. Keeping it for the first k months of the
+recovery window avoids those months' LTV losses if the warmup fails, so with
+a per-month loss profile L and price p
+
+    avoided(k) = failure_prob · Σ_{m<k} L[m]        cost(k) = Σ_{m<k} p[m]
+
+A policy (k, t) extends for k months only if warmup completion is at or
+below t% when the migration starts. Over a discrete completion distribution,
+a policy's expected cost and avoided loss are cumulative sums along the
+completion axis, so every (t, k) pair is scored in one broadcast.
+"""
+import numpy as np
+
+from montecarlo import sample
+
+
+COMPLETION_BINS = np.arange(0, 101)  # whole-percent support for sampled distributions
+PMF_SAMPLES = 50_000
+
+
+def completion_pmf(spec, n_samples=PMF_SAMPLES, seed=0):
+    """(values, weights) of a montecarlo completion_rate spec, binned to whole percents."""
+    draws = sample(spec, n_samples, np.random.default_rng(seed))
+    counts = np.bincount(np.clip(np.rint(draws), 0, 100).astype(int), minlength=len(COMPLETION_BINS))
+    keep = counts > 0
+    return COMPLETION_BINS[keep].astype(float), counts[keep] / n_samples
+
+
+def _prices(monthly_price, n_months):
+    """Price of each extension month; a shorter schedule repeats its last price."""
+    p = np.atleast_1d(np.asarray(monthly_price, dtype=float))
+    return p[np.minimum(np.arange(n_months), len(p) - 1)]
+
+
+def solve(ltv_rev, monthly_price, completion_values, completion_weights=None):
+    """Score every (completion threshold, extension length) policy.
+
+    `ltv_rev` is the per-month LTV loss profile (model "ltv_rev"), length M.
+    `monthly_price` is a scalar or a per-month schedule. The completion
+    distribution is `completion_values` with `completion_weights` (a single
+    point estimate when weights are omitted and one value is given).
+
+    Returns arrays over thresholds t (T,) × lengths k = 0…M (K,):
+    `expected_cost`, `expected_avoided`, `expected_net`, plus `months`,
+    `cost` and `avoided_if_failed` per length, `breakeven_completion` (the
+    completion above which a length stops paying), the `frontier` of
+    efficient (t, k) index pairs in cost order, and the `best` policy.
+    """
+    loss = np.abs(np.asarray(ltv_rev, dtype=float))
+    n_months = len(loss)
+    months = np.arange(n_months + 1)
+    cost = np.concatenate([[0.0], np.cumsum(_prices(monthly_price, n_months))])
+    saved = np.concatenate([[0.0], np.cumsum(loss)])  # loss avoided by k months if the warmup fails
+
+    values = np.atleast_1d(np.asarray(completion_values, dtype=float))
+    weights = (np.full(len(values), 1.0 / len(values)) if completion_weights is None
+               else np.asarray(completion_weights, dtype=float))
+    order = np.argsort(values)
+    values, weights = values[order], weights[order]
+    failure_prob = (100 - values) / 100
+
+    # Extending only when completion <= t: cumulative sums over the sorted completion axis
+    p_extend = np.cumsum(weights)                       # (T,)
+    expected_fp = np.cumsum(weights * failure_prob)     # (T,)
+    expected_cost = p_extend[:, None] * cost[None, :]   # (T, K)
+    expected_avoided = expected_fp[:, None] * saved[None, :]
+    expected_net = expected_avoided - expected_cost
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breakeven_completion = np.where(saved > 0, 100 * (1 - cost / saved), np.nan)
+
+    t, k = np.unravel_index(np.argmax(expected_net), expected_net.shape)
+    best = {
+        "months": int(months[k]),
+        "threshold": float(values[t]) if k else None,
+        "cost": float(cost[k]),
+        "expected_cost": float(expected_cost[t, k]),
+        "expected_avoided": float(expected_avoided[t, k]),
+        "expected_net": float(expected_net[t, k]),
+        "p_extend": float(p_extend[t]) if k else 0.0,
+    }
+    return {
+        "months": months,
+        "cost": cost,
+        "avoided_if_failed": saved,
+        "thresholds": values,
+        "expected_cost": expected_cost,
+        "expected_avoided": expected_avoided,
+        "expected_net": expected_net,
+        "breakeven_completion": breakeven_completion,
+        "frontier": efficient_frontier(expected_cost, expected_avoided),
+        "best": best,
+    }
+
+
+def efficient_frontier(expected_cost, expected_avoided):
+    """(t, k) index pairs no other policy beats on both cost and avoided loss, by cost."""
+    cost, avoided = expected_cost.ravel(), expected_avoided.ravel()
+    order = np.lexsort((-avoided, cost))  # cheapest first, most avoided first within a cost
+    best_so_far = np.maximum.accumulate(avoided[order])
+    keep = np.concatenate([[True], avoided[order][1:] > best_so_far[:-1]])
+    return np.stack(np.unravel_index(order[keep], expected_cost.shape), axis=1)
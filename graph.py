@@ -0,0 +1,140 @@
+"""Incremental evaluation of model.NODES for one interactive session.
+
+A graph state remembers every node value it has computed. update() drops only
+the nodes downstream of the leaves that actually changed, and get() recomputes
+them lazily on the next read, so a new `arpu` never touches the signup or
+activation nodes, and a new `completion_rate` only the expected-value and
+decision nodes. Each recomputation is logged with its own time (excluding its
+dependencies) for inspection.
+
+    g = graph.new()
+    out = graph.scenario(g, **inputs)   # evaluate()-shaped dict
+    graph.last_log(g)                   # [(node, seconds), ...] from that call
+"""
+import time
+
+import numpy as np
+
+import model
+import perf
+
+
+# Everything evaluate() returns, by model stage in evaluation order. Under
+# perf tracing each stage is one span, covering the nodes it recomputes
+# (including dependencies no earlier stage needed).
+STAGES = (
+    ("signup_activation_losses", model.SIGNUP_ACTIVATION_OUTPUTS),
+    ("rescue_losses", model.RESCUE_OUTPUTS),
+    ("repeat_losses", model.REPEAT_OUTPUTS),
+    ("ltv_totals", model.LTV_OUTPUTS),
+    ("ltv_decomposition", ("ltv_rev",)),
+    ("decision", model.DECISION_OUTPUTS),
+)
+OUTPUTS = tuple(dict.fromkeys(k for _, names in STAGES for k in names))
+
+
+def _downstream(nodes):
+    """{name: every node that reads it, directly or transitively}."""
+    readers = {}
+    for name, (_, deps) in nodes.items():
+        for d in deps:
+            readers.setdefault(d, set()).add(name)
+    out = {}
+
+    def walk(name):
+        if name not in out:
+            out[name] = set()
+            for r in readers.get(name, ()):
+                out[name] |= {r} | walk(r)
+        return out[name]
+
+    for name in set(readers) | set(nodes):
+        walk(name)
+    return out
+
+
+def new(nodes=None):
+    """Empty graph state over `nodes` (model.NODES by default)."""
+    nodes = model.NODES if nodes is None else nodes
+    return {"nodes": nodes, "downstream": _downstream(nodes), "leaves": {}, "values": {}, "public": {}, "log": []}
+
+
+def _same(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+
+def update(g, **leaves):
+    """Set leaf values and invalidate what depends on the changed ones.
+
+    Starts a new recompute log. Returns the names of the nodes invalidated.
+    """
+    g["log"] = []
+    stale = set()
+    for k, v in leaves.items():
+        if k in g["leaves"] and _same(g["leaves"][k], v):
+            continue
+        g["leaves"][k] = v
+        stale |= g["downstream"].get(k, set())
+    for name in stale:
+        g["values"].pop(name, None)
+        g["public"].pop(name, None)
+    return stale
+
+
+def get(g, name):
+    """Value of node `name`, recomputing it and any stale dependencies."""
+    if name in g["leaves"]:
+        return g["leaves"][name]
+    if name in g["values"]:
+        return g["values"][name]
+    if name not in g["nodes"]:
+        raise KeyError(f"unknown node or unset leaf: {name}")
+    fn, deps = g["nodes"][name]
+    args = [get(g, d) for d in deps]
+    t0 = time.perf_counter()
+    value = fn(*args)
+    g["log"].append((name, time.perf_counter() - t0))
+    g["values"][name] = value
+    return value
+
+
+def last_log(g):
+    """(node, seconds) for every node recomputed since the last update()."""
+    return list(g["log"])
+
+
+def _public(v):
+    # One-scenario view as in evaluate(): per-month rows as read-only 1-D arrays, totals as scalars
+    v = np.array(np.asarray(v)[0])
+    if v.ndim:
+        v.flags.writeable = False
+        return v
+    return v.item()
+
+
+def scenario(g, **inputs):
+    """model.evaluate(**inputs) through the graph, recomputing only what changed.
+
+    Computes on `inputs["data"]` when given, else on model.current().
+    """
+    missing = set(model.INPUT_NAMES) - set(inputs)
+    if missing:
+        raise TypeError(f"missing scenario inputs: {', '.join(sorted(missing))}")
+    update(
+        g, **{k: np.array([float(inputs[k])]) for k in model.INPUT_NAMES},
+        n_months=int(inputs["recovery_months"]), custom_curve=model.recovery_curve(inputs.get("custom_curve")),
+        data=inputs.get("data") or model.current(),
+    )
+    out = {}
+    for stage, names in STAGES:
+        with perf.span(stage, "model") as args:
+            logged = len(g["log"])
+            for k in names:
+                if k not in g["public"]:
+                    g["public"][k] = _public(get(g, k))
+                out[k] = g["public"][k]
+            if args is not None:
+                args["nodes"] = len(g["log"]) - logged
+    return out
@@ -0,0 +1,814 @@
+"""Vectorized Braze migration risk model.
+
+Every scenario input is broadcast to shape (n_scenarios,) and every per-month
+output is an (n_scenarios, n_months) array, so the dashboard (n=1) and bulk
+what-if runs share one code path.
+"""
+import dataclasses
+import functools
+import inspect
+import threading
+import types
+
+import numpy as np
+
+import data
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DATA
+# ═══════════════════════════════════════════════════════════════════════════
+# Loaded from data/ (see data.py) into one read-only Data snapshot. refresh()
+# swaps in a new snapshot whole, so code that reads current() once per call
+# never mixes two versions of the files. The fields also read as module
+# attributes (model.months_all), each from whichever snapshot is current.
+LTV_MULT_NAMES = ("ltv_mult_act", "ltv_mult_active_resc", "ltv_mult_inactive_resc", "ltv_mult_repeat")
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class Data:
+    """One version of the input data. Compares and hashes by identity, so caches can key on it."""
+    version: tuple
+    months_all: tuple
+    in_signups_all: np.ndarray
+    oon_embed_signups_all: np.ndarray
+    active_users_feb: float
+    inactive_users_feb: float
+    active_rescue_rate: float
+    inactive_rescue_rate: float
+    bp_prev_month_feb: float
+    repeat_rates_6mo: np.ndarray
+    repeat_rate_base: float
+    ACTIVATION_RETENTION: np.ndarray
+    ACTIVE_RESCUE_RETENTION: np.ndarray
+    INACTIVE_RESCUE_RETENTION: np.ndarray
+    LTV_MULT_ACT: float
+    LTV_MULT_ACTIVE_RESC: float
+    LTV_MULT_INACTIVE_RESC: float
+    LTV_MULT_REPEAT: float
+    ltv_mults: types.MappingProxyType  # LTV_MULT_NAMES -> value, the defaults run_totals accepts overrides of
+
+
+def _snapshot(d):
+    """A Data from data.load() output."""
+    p = d["populations"]
+    repeat_rates_6mo = d["repeat_rates"]["repeat_rate"]  # Feb–Sep 2025 trailing 6mo
+    # Activation: avg of Apr–Jun 2024 cohorts with 12mo data (M0–M12);
+    # active / inactive rescue retention (M0–M12)
+    retention = d["retention"]
+    ltv_act = float(retention["activation"].sum())  # ~7.31
+    ltv_active_resc = float(retention["active_rescue"].sum())  # ~4.95
+    ltv_inactive_resc = float(retention["inactive_rescue"].sum())  # ~5.28
+    # Repeat rate uses activation retention curve as LTV proxy (existing retained users)
+    ltv_repeat = ltv_act
+    return Data(
+        version=d["version"],
+        months_all=tuple(d["signups"]["month"]),
+        in_signups_all=d["signups"]["in_signups"],
+        oon_embed_signups_all=d["signups"]["oon_embed_signups"],
+        active_users_feb=p["active_users_feb"],
+        inactive_users_feb=p["inactive_users_feb"],
+        active_rescue_rate=p["active_rescue_rate"],
+        inactive_rescue_rate=p["inactive_rescue_rate"],
+        bp_prev_month_feb=p["bp_prev_month_feb"],  # Feb 2026 actual
+        repeat_rates_6mo=repeat_rates_6mo,
+        repeat_rate_base=float(repeat_rates_6mo.mean()),  # ~85.29%
+        ACTIVATION_RETENTION=retention["activation"],
+        ACTIVE_RESCUE_RETENTION=retention["active_rescue"],
+        INACTIVE_RESCUE_RETENTION=retention["inactive_rescue"],
+        LTV_MULT_ACT=ltv_act,
+        LTV_MULT_ACTIVE_RESC=ltv_active_resc,
+        LTV_MULT_INACTIVE_RESC=ltv_inactive_resc,
+        LTV_MULT_REPEAT=ltv_repeat,
+        ltv_mults=types.MappingProxyType(dict(zip(LTV_MULT_NAMES, (ltv_act, ltv_active_resc, ltv_inactive_resc, ltv_repeat)))),
+    )
+
+
+_data = _snapshot(data.load())
+_DATA_FIELDS = frozenset(f.name for f in dataclasses.fields(Data))
+
+
+def current():
+    """The loaded Data. Read it once and use that object throughout a computation."""
+    return _data
+
+
+def __getattr__(name):
+    if name in _DATA_FIELDS:
+        return getattr(_data, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+migration_idx = 3  # May
+
+GROWTH_RATE = 0.03
+
+
+def grow(base, months_from_feb, rate=GROWTH_RATE):
+    return base * (1 + rate) ** months_from_feb
+
+
+# ── Recovery shapes ─────────────────────────────────────────────────────────
+# Share of the way back to baseline at fraction x = month / window of the
+# recovery window; each lever group picks one by index (the *_recovery_shape
+# inputs). Index CUSTOM_SHAPE picks the scenario's own monthly curve, passed
+# as `custom_curve` next to the inputs; it is scenario data, not a registered
+# shape, and only keys the bounded kernel caches.
+EXPONENTIAL_RATE = 3.0  # fast early rebound, long tail
+LOGISTIC_STEEPNESS = 10.0  # S-curve: slow start, fast middle, slow finish
+
+
+def _logistic(x):
+    s = 1.0 / (1.0 + np.exp(-LOGISTIC_STEEPNESS * (x - 0.5)))
+    lo, hi = 1.0 / (1.0 + np.exp(LOGISTIC_STEEPNESS / 2)), 1.0 / (1.0 + np.exp(-LOGISTIC_STEEPNESS / 2))
+    return (s - lo) / (hi - lo)
+
+
+RECOVERY_SHAPES = ("linear", "exponential", "logistic", "step")
+_shape_fns = (
+    lambda x: x,
+    lambda x: (1.0 - np.exp(-EXPONENTIAL_RATE * x)) / (1.0 - np.exp(-EXPONENTIAL_RATE)),
+    _logistic,
+    lambda x: np.zeros_like(x),
+)
+CUSTOM_SHAPE = len(RECOVERY_SHAPES)
+CURVE_CACHE_SIZE = 32  # kernel tables kept per (window, custom curve)
+
+
+def recovery_curve(curve):
+    """`curve` checked and normalized for the `custom_curve` scenario argument.
+
+    It is the share recovered at the start of each month of a len(curve)-month
+    window (values in [0, 1], the first month usually 0); other window lengths
+    stretch it by interpolation. None passes through (no custom curve).
+    """
+    if curve is None:
+        return None
+    curve = tuple(float(c) for c in curve)
+    if not curve or any(not 0.0 <= c <= 1.0 for c in curve):
+        raise ValueError("a recovery curve needs at least one value, each in [0, 1]")
+    return curve
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def recovery_kernels(max_months, custom_curve=None):
+    """(shape, window R - 1, month) table of recovery progress, 1 from month R on.
+
+    Applying a lever's shape is one fancy index into this table, so shapes
+    and levers add rows, not Python loops. With a `custom_curve` (a
+    recovery_curve() tuple) the table has its row at CUSTOM_SHAPE.
+    """
+    fns = _shape_fns
+    if custom_curve is not None:
+        xp = np.arange(len(custom_curve) + 1) / len(custom_curve)
+        fp = np.array(custom_curve + (1.0,))
+        fns += (lambda x: np.interp(x, xp, fp),)
+    R = np.arange(1, max_months + 1)[:, None]
+    m = np.arange(max_months)[None, :]
+    x = m / R
+    k = np.stack([np.where(m < R, fn(x), 1.0) for fn in fns])
+    k.flags.writeable = False
+    return k
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INPUTS
+# ═══════════════════════════════════════════════════════════════════════════
+# One entry per sidebar lever, in sidebar order. Values are the dashboard
+# defaults; every engine entry point accepts these names as keyword arguments.
+DEFAULT_INPUTS = {
+    "completion_rate": 50,
+    "recovery_months": 3,
+    "migration_month": migration_idx,
+    "iterable_cost": 500_000,
+    "arpu": 30.0,
+    "in_signup_depression": 0.95,
+    "oon_embed_signup_depression": 1.0,
+    "m0_activation_base": 0.6512,
+    "m1_plus_uplift": 0.12,
+    "m0_depression": 0.95,
+    "m1_plus_depression": 0.95,
+    "active_rescue_depression": 0.95,
+    "inactive_rescue_depression": 0.95,
+    "repeat_depression_bps": 50,
+    "signup_recovery_shape": 0,
+    "activation_recovery_shape": 0,
+    "rescue_recovery_shape": 0,
+    "repeat_recovery_shape": 0,
+}
+INPUT_NAMES = tuple(DEFAULT_INPUTS)
+
+# (min, max, step) of each sidebar widget
+INPUT_RANGES = {
+    "completion_rate": (0, 100, 5),
+    "recovery_months": (1, 6, 1),
+    "migration_month": (0, len(_data.months_all) - 1, 1),
+    "iterable_cost": (0, 50_000_000, 100_000),
+    "arpu": (1.0, 100.0, 1.0),
+    "in_signup_depression": (0.0, 1.0, 0.05),
+    "oon_embed_signup_depression": (0.0, 1.0, 0.05),
+    "m0_activation_base": (0.50, 0.80, 0.01),
+    "m1_plus_uplift": (0.0, 0.25, 0.01),
+    "m0_depression": (0.0, 1.0, 0.05),
+    "m1_plus_depression": (0.0, 1.0, 0.05),
+    "active_rescue_depression": (0.0, 1.0, 0.05),
+    "inactive_rescue_depression": (0.0, 1.0, 0.05),
+    "repeat_depression_bps": (0, 200, 10),
+    "signup_recovery_shape": (0, len(RECOVERY_SHAPES) - 1, 1),
+    "activation_recovery_shape": (0, len(RECOVERY_SHAPES) - 1, 1),
+    "rescue_recovery_shape": (0, len(RECOVERY_SHAPES) - 1, 1),
+    "repeat_recovery_shape": (0, len(RECOVERY_SHAPES) - 1, 1),
+}
+SHAPE_INPUTS = ("signup_recovery_shape", "activation_recovery_shape", "rescue_recovery_shape", "repeat_recovery_shape")
+
+INPUT_LABELS = {
+    "completion_rate": "% of IP Warmup Completed",
+    "recovery_months": "Recovery Window (months)",
+    "migration_month": "Migration Start Month",
+    "iterable_cost": "Iterable Extension Cost ($)",
+    "arpu": "ARPU ($/month)",
+    "in_signup_depression": "IN Signups",
+    "oon_embed_signup_depression": "OON / Embed Signups",
+    "m0_activation_base": "M0 Activation Rate (baseline)",
+    "m1_plus_uplift": "M1+ Uplift (pp)",
+    "m0_depression": "M0 Depression",
+    "m1_plus_depression": "M1+ Depression",
+    "active_rescue_depression": "Active Rescue",
+    "inactive_rescue_depression": "Inactive Rescue",
+    "repeat_depression_bps": "Repeat Rate Depression (bps)",
+    "signup_recovery_shape": "Signup Recovery Shape",
+    "activation_recovery_shape": "Activation Recovery Shape",
+    "rescue_recovery_shape": "Rescue Recovery Shape",
+    "repeat_recovery_shape": "Repeat Recovery Shape",
+}
+
+MAX_RECOVERY_MONTHS = 6
+
+# Per-month loss columns, in the order the detail table reads them
+LOSS_COLUMNS = (
+    "in_signup_loss", "oon_signup_loss", "total_signup_loss",
+    "in_m0_loss", "oon_m0_loss", "in_m1_loss", "oon_m1_loss", "total_activation_loss",
+    "active_rescue_loss", "inactive_rescue_loss", "total_rescue_loss",
+    "repeat_bp_loss",
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENGINE
+# ═══════════════════════════════════════════════════════════════════════════
+def _broadcast_inputs(inputs):
+    missing = set(INPUT_NAMES) - set(inputs)
+    if missing:
+        raise TypeError(f"missing scenario inputs: {', '.join(sorted(missing))}")
+    unknown = set(inputs) - set(INPUT_NAMES)
+    if unknown:
+        raise TypeError(f"unknown scenario inputs: {', '.join(sorted(unknown))}")
+    # Scalars stay as shape (1,) so the math only pays for the levers that vary
+    arrays = {k: np.atleast_1d(np.asarray(inputs[k], dtype=float)) for k in INPUT_NAMES}
+    for k, a in arrays.items():
+        if a.ndim != 1:
+            raise ValueError(f"{k} must be a scalar or a 1-D array, got shape {a.shape}")
+    n = np.broadcast_shapes(*(a.shape for a in arrays.values()))[0]
+    return arrays, n
+
+
+def _expand(out, n):
+    return {k: np.broadcast_to(v, (n,) + np.shape(v)[1:]) for k, v in out.items()}
+
+
+def signup_window(series, start_idx, n_months):
+    """Signups for `n_months` from `start_idx`, holding the last month flat past December.
+
+    An array of start indices gives one window per row.
+    """
+    idx = np.minimum(np.asarray(start_idx)[..., None] + np.arange(n_months), len(series) - 1)
+    return np.asarray(series, dtype=float)[idx]
+
+
+@functools.lru_cache(maxsize=8)
+def start_windows(n_months, data):
+    """(start month, model month) tables for every start month in data.months_all.
+
+    Each row is the signup window or growth factor for a migration starting
+    in that month, so a batch of start months is a single fancy index.
+    """
+    starts = np.arange(len(data.months_all))
+    out = {
+        "in_signup": signup_window(data.in_signups_all, starts, n_months),
+        "oon_signup": signup_window(data.oon_embed_signups_all, starts, n_months),
+        "growth": grow(1.0, starts[:, None] + np.arange(n_months)[None, :]),
+    }
+    for a in out.values():
+        a.flags.writeable = False
+    return out
+
+
+def _start_index(migration_month, data):
+    s = migration_month.astype(np.intp)
+    n = len(data.months_all)
+    if s.size and (s.min() < 0 or s.max() >= n or np.any(s != migration_month)):
+        raise ValueError(f"migration_month must be an integer index into months_all (0-{n - 1})")
+    return s
+
+
+def _window_index(recovery_months):
+    R = recovery_months.astype(np.intp)
+    if R.size and (R.min() < 1 or np.any(R != recovery_months)):
+        raise ValueError("recovery_months must be a positive integer")
+    return R - 1
+
+
+def _shape_index(shape, custom_curve):
+    h = shape.astype(np.intp)
+    if h.size and (h.min() < 0 or h.max() > CUSTOM_SHAPE or np.any(h != shape)):
+        raise ValueError(f"recovery shapes must be integer indices into RECOVERY_SHAPES (0-{len(RECOVERY_SHAPES) - 1}) "
+                         f"or CUSTOM_SHAPE ({CUSTOM_SHAPE})")
+    if custom_curve is None and h.size and h.max() == CUSTOM_SHAPE:
+        raise ValueError(f"recovery shape {CUSTOM_SHAPE} (custom) needs a custom_curve")
+    return h
+
+
+def _progress(shape, recovery_months, n_months, custom_curve):
+    """(n, n_months) recovery progress of each scenario's shape and window."""
+    i = _window_index(recovery_months)
+    kernels = recovery_kernels(max(int(i.max(initial=0)) + 1, n_months), custom_curve)
+    return kernels[_shape_index(shape, custom_curve)[:, None], i[:, None], np.arange(n_months)[None, :]]
+
+
+def _eff(dep, progress):
+    return np.where(progress < 1.0, dep[:, None] + (1.0 - dep[:, None]) * progress, 1.0)
+
+
+# ── Quantity graph ──────────────────────────────────────────────────────────
+# Every derived quantity is a node: name -> (fn, names of the quantities it
+# reads). The leaves are INPUT_NAMES plus `n_months`, `custom_curve` (None
+# unless a lever uses CUSTOM_SHAPE) and `data`, the Data snapshot, which
+# refresh() replaces so nodes built on it go stale with it. Scenario
+# inputs are (n,) arrays and per-month nodes (n, n_months). The vectorized
+# stages below evaluate the graph eagerly with compute(); graph.py evaluates it
+# incrementally for one interactive session.
+NODES = {}
+
+
+def _node(name, fn):
+    NODES[name] = (fn, tuple(inspect.signature(fn).parameters))
+
+
+_node("start_index", _start_index)
+_node("in_signup", lambda start_index, n_months, data: start_windows(n_months, data)["in_signup"][start_index])
+_node("oon_signup", lambda start_index, n_months, data: start_windows(n_months, data)["oon_signup"][start_index])
+_node("growth", lambda start_index, n_months, data: start_windows(n_months, data)["growth"][start_index])
+
+# Recovery: each lever group's progress back to baseline, from the kernel table
+_node("signup_progress", lambda signup_recovery_shape, recovery_months, n_months, custom_curve:
+      _progress(signup_recovery_shape, recovery_months, n_months, custom_curve))
+_node("activation_progress", lambda activation_recovery_shape, recovery_months, n_months, custom_curve:
+      _progress(activation_recovery_shape, recovery_months, n_months, custom_curve))
+_node("rescue_progress", lambda rescue_recovery_shape, recovery_months, n_months, custom_curve:
+      _progress(rescue_recovery_shape, recovery_months, n_months, custom_curve))
+_node("repeat_progress", lambda repeat_recovery_shape, recovery_months, n_months, custom_curve:
+      _progress(repeat_recovery_shape, recovery_months, n_months, custom_curve))
+
+_node("eff_in_signup", lambda in_signup_depression, signup_progress: _eff(in_signup_depression, signup_progress))
+_node("eff_oon_signup", lambda oon_embed_signup_depression, signup_progress:
+      _eff(oon_embed_signup_depression, signup_progress))
+_node("eff_m0", lambda m0_depression, activation_progress: _eff(m0_depression, activation_progress))
+_node("eff_m1", lambda m1_plus_depression, activation_progress: _eff(m1_plus_depression, activation_progress))
+_node("eff_active_rescue", lambda active_rescue_depression, rescue_progress:
+      _eff(active_rescue_depression, rescue_progress))
+_node("eff_inactive_rescue", lambda inactive_rescue_depression, rescue_progress:
+      _eff(inactive_rescue_depression, rescue_progress))
+_node("eff_repeat_dep_bps", lambda repeat_depression_bps, repeat_progress:
+      np.where(repeat_progress < 1.0, repeat_depression_bps[:, None] * (1.0 - repeat_progress), 0.0))
+
+# Signups and activation
+_node("in_signup_loss", lambda in_signup, eff_in_signup: in_signup * (eff_in_signup - 1))
+_node("oon_signup_loss", lambda oon_signup, eff_oon_signup: oon_signup * (eff_oon_signup - 1))
+_node("total_signup_loss", lambda in_signup_loss, oon_signup_loss: in_signup_loss + oon_signup_loss)
+_node("eff_in_signups", lambda in_signup, eff_in_signup: in_signup * eff_in_signup)
+_node("eff_oon_signups", lambda oon_signup, eff_oon_signup: oon_signup * eff_oon_signup)
+_node("in_m0_loss", lambda eff_in_signups, in_signup, m0_activation_base, eff_m0:
+      eff_in_signups * m0_activation_base[:, None] * eff_m0 - in_signup * m0_activation_base[:, None])
+_node("oon_m0_loss", lambda eff_oon_signups, oon_signup, m0_activation_base, eff_m0:
+      eff_oon_signups * m0_activation_base[:, None] * eff_m0 - oon_signup * m0_activation_base[:, None])
+_node("in_m1_loss", lambda eff_in_signups, in_signup, m1_plus_uplift, eff_m1:
+      eff_in_signups * m1_plus_uplift[:, None] * eff_m1 - in_signup * m1_plus_uplift[:, None])
+_node("oon_m1_loss", lambda eff_oon_signups, oon_signup, m1_plus_uplift, eff_m1:
+      eff_oon_signups * m1_plus_uplift[:, None] * eff_m1 - oon_signup * m1_plus_uplift[:, None])
+_node("total_activation_loss", lambda in_m0_loss, oon_m0_loss, in_m1_loss, oon_m1_loss:
+      in_m0_loss + oon_m0_loss + in_m1_loss + oon_m1_loss)
+_node("total_activation_bp_loss", lambda total_activation_loss: total_activation_loss.sum(axis=1))
+# Activation decomposition: volume effect at baseline rates, rate effect at
+# baseline volume, and the compounding remainder
+_node("signup_effect_bps", lambda total_signup_loss, m0_activation_base, m1_plus_uplift:
+      (total_signup_loss * (m0_activation_base + m1_plus_uplift)[:, None]).sum(axis=1))
+_node("activation_effect_bps", lambda in_signup, oon_signup, m0_activation_base, m1_plus_uplift, eff_m0, eff_m1:
+      ((in_signup + oon_signup) * (m0_activation_base[:, None] * eff_m0 + m1_plus_uplift[:, None] * eff_m1
+                                   - (m0_activation_base + m1_plus_uplift)[:, None])).sum(axis=1))
+_node("interaction_bps", lambda total_activation_bp_loss, signup_effect_bps, activation_effect_bps:
+      total_activation_bp_loss - signup_effect_bps - activation_effect_bps)
+
+# Rescue
+_node("active_rescue_loss", lambda growth, eff_active_rescue, data:
+      data.active_users_feb * growth * data.active_rescue_rate * (eff_active_rescue - 1))
+_node("inactive_rescue_loss", lambda growth, eff_inactive_rescue, data:
+      data.inactive_users_feb * growth * data.inactive_rescue_rate * (eff_inactive_rescue - 1))
+_node("total_rescue_loss", lambda active_rescue_loss, inactive_rescue_loss: active_rescue_loss + inactive_rescue_loss)
+_node("total_active_rescue_loss", lambda active_rescue_loss: active_rescue_loss.sum(axis=1))
+_node("total_inactive_rescue_loss", lambda inactive_rescue_loss: inactive_rescue_loss.sum(axis=1))
+
+# Repeat rate
+_node("bp_prev_month", lambda growth, data: data.bp_prev_month_feb * growth)
+_node("repeat_bp_loss", lambda bp_prev_month, eff_repeat_dep_bps: -bp_prev_month * (eff_repeat_dep_bps / 10000))
+_node("eff_repeat_ratio", lambda eff_repeat_dep_bps, data:
+      1.0 - (eff_repeat_dep_bps / 10000) / data.repeat_rate_base)
+_node("total_repeat_bp_loss", lambda repeat_bp_loss: repeat_bp_loss.sum(axis=1))
+
+# LTV revenue. The multipliers are nodes so run_totals can pin them per scenario.
+_node("ltv_mult_act", lambda data: data.ltv_mults["ltv_mult_act"])
+_node("ltv_mult_active_resc", lambda data: data.ltv_mults["ltv_mult_active_resc"])
+_node("ltv_mult_inactive_resc", lambda data: data.ltv_mults["ltv_mult_inactive_resc"])
+_node("ltv_mult_repeat", lambda data: data.ltv_mults["ltv_mult_repeat"])
+_node("total_rescue_bp_loss", lambda total_active_rescue_loss, total_inactive_rescue_loss:
+      total_active_rescue_loss + total_inactive_rescue_loss)
+_node("total_bp_loss", lambda total_activation_bp_loss, total_rescue_bp_loss, total_repeat_bp_loss:
+      total_activation_bp_loss + total_rescue_bp_loss + total_repeat_bp_loss)
+_node("act_rev_ltv", lambda total_activation_bp_loss, arpu, ltv_mult_act:
+      np.abs(total_activation_bp_loss) * arpu * ltv_mult_act)
+_node("active_resc_rev_ltv", lambda total_active_rescue_loss, arpu, ltv_mult_active_resc:
+      np.abs(total_active_rescue_loss) * arpu * ltv_mult_active_resc)
+_node("inactive_resc_rev_ltv", lambda total_inactive_rescue_loss, arpu, ltv_mult_inactive_resc:
+      np.abs(total_inactive_rescue_loss) * arpu * ltv_mult_inactive_resc)
+_node("repeat_rev_ltv", lambda total_repeat_bp_loss, arpu, ltv_mult_repeat:
+      np.abs(total_repeat_bp_loss) * arpu * ltv_mult_repeat)
+_node("rev_in_month", lambda total_bp_loss, arpu: np.abs(total_bp_loss) * arpu)
+_node("rev_ltv", lambda act_rev_ltv, active_resc_rev_ltv, inactive_resc_rev_ltv, repeat_rev_ltv:
+      act_rev_ltv + active_resc_rev_ltv + inactive_resc_rev_ltv + repeat_rev_ltv)
+# Per-month LTV revenue lost
+_node("ltv_rev", lambda total_activation_loss, active_rescue_loss, inactive_rescue_loss, repeat_bp_loss, arpu,
+      ltv_mult_act, ltv_mult_active_resc, ltv_mult_inactive_resc, ltv_mult_repeat:
+      np.asarray(arpu)[..., None] * (
+          np.abs(total_activation_loss) * ltv_mult_act
+          + np.abs(active_rescue_loss) * ltv_mult_active_resc
+          + np.abs(inactive_rescue_loss) * ltv_mult_inactive_resc
+          + np.abs(repeat_bp_loss) * ltv_mult_repeat))
+
+# Probability-weighted impact and the Extend/Migrate call; the decision uses LTV
+_node("failure_prob", lambda completion_rate: (100 - completion_rate) / 100)
+_node("expected_revenue_impact", lambda rev_ltv, failure_prob: rev_ltv * failure_prob)
+_node("expected_in_month_impact", lambda rev_in_month, failure_prob: rev_in_month * failure_prob)
+_node("net_value_of_extension", lambda expected_revenue_impact, iterable_cost:
+      np.abs(expected_revenue_impact) - iterable_cost)
+
+
+def _breakeven_prob(rev_ltv, iterable_cost):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rev_ltv != 0, iterable_cost / rev_ltv, 1.0)
+
+
+_node("breakeven_prob_ltv", _breakeven_prob)
+_node("extend", lambda net_value_of_extension: net_value_of_extension > 0)
+
+LEAVES = INPUT_NAMES + ("n_months", "custom_curve", "data")
+
+
+def compute(names, leaves):
+    """The nodes in `names`, evaluated from `leaves` in dependency order.
+
+    `leaves` may also pin any node to a given value, which then stands in for
+    its formula (run_totals pins the loss totals and LTV multipliers this way).
+    `custom_curve` defaults to None and `data` to the current snapshot.
+    """
+    values = {"data": _data, "custom_curve": None, **leaves}
+
+    def get(name):
+        if name not in values:
+            if name not in NODES:
+                raise TypeError(f"missing model input: {name}")
+            fn, deps = NODES[name]
+            values[name] = fn(*(get(d) for d in deps))
+        return values[name]
+
+    return {k: get(k) for k in names}
+
+
+# ── Stages ──────────────────────────────────────────────────────────────────
+# Each stage reads only the levers it depends on, so callers can cache them
+# independently (see the memoized wrappers below).
+SIGNUP_ACTIVATION_OUTPUTS = (
+    "in_signup_loss", "oon_signup_loss", "total_signup_loss",
+    "in_m0_loss", "oon_m0_loss", "in_m1_loss", "oon_m1_loss", "total_activation_loss",
+    "eff_in_signup", "eff_oon_signup", "eff_m0", "eff_m1", "in_signup", "oon_signup",
+    "total_activation_bp_loss", "signup_effect_bps", "activation_effect_bps", "interaction_bps",
+)
+RESCUE_OUTPUTS = (
+    "active_rescue_loss", "inactive_rescue_loss", "total_rescue_loss",
+    "eff_active_rescue", "eff_inactive_rescue", "total_active_rescue_loss", "total_inactive_rescue_loss",
+)
+REPEAT_OUTPUTS = ("repeat_bp_loss", "eff_repeat_dep_bps", "eff_repeat_ratio", "bp_prev_month", "total_repeat_bp_loss")
+LTV_OUTPUTS = (
+    "total_activation_bp_loss", "total_active_rescue_loss", "total_inactive_rescue_loss",
+    "total_rescue_bp_loss", "total_repeat_bp_loss", "total_bp_loss",
+    "act_rev_ltv", "active_resc_rev_ltv", "inactive_resc_rev_ltv", "repeat_rev_ltv", "rev_in_month", "rev_ltv",
+)
+DECISION_OUTPUTS = (
+    "failure_prob", "expected_revenue_impact", "expected_in_month_impact",
+    "net_value_of_extension", "breakeven_prob_ltv", "extend",
+)
+
+
+def signup_activation_losses(x, n_months):
+    return compute(SIGNUP_ACTIVATION_OUTPUTS, {**x, "n_months": n_months})
+
+
+def rescue_losses(x, n_months):
+    return compute(RESCUE_OUTPUTS, {**x, "n_months": n_months})
+
+
+def repeat_losses(x, n_months):
+    return compute(REPEAT_OUTPUTS, {**x, "n_months": n_months})
+
+
+def ltv_revenue(total_activation_bp_loss, total_active_rescue_loss, total_inactive_rescue_loss,
+                total_repeat_bp_loss, arpu, **ltv_mults):
+    """In-month and LTV-weighted revenue views from per-scenario BP loss totals.
+
+    Accepts any of LTV_MULT_NAMES as overrides of the current data's multipliers.
+    """
+    unknown = set(ltv_mults) - set(LTV_MULT_NAMES)
+    if unknown:
+        raise TypeError(f"unknown LTV multipliers: {', '.join(sorted(unknown))}")
+    return compute(LTV_OUTPUTS, {
+        "total_activation_bp_loss": total_activation_bp_loss,
+        "total_active_rescue_loss": total_active_rescue_loss,
+        "total_inactive_rescue_loss": total_inactive_rescue_loss,
+        "total_repeat_bp_loss": total_repeat_bp_loss,
+        "arpu": arpu, **ltv_mults,
+    })
+
+
+def decision(rev_in_month, rev_ltv, completion_rate, iterable_cost):
+    """Probability-weighted impact and the Extend/Migrate call. Decision uses LTV as primary."""
+    return compute(DECISION_OUTPUTS, {
+        "rev_in_month": rev_in_month, "rev_ltv": rev_ltv,
+        "completion_rate": completion_rate, "iterable_cost": iterable_cost,
+    })
+
+
+def scenario_totals(total_activation_bp_loss, total_active_rescue_loss, total_inactive_rescue_loss,
+                    total_repeat_bp_loss, arpu, completion_rate, iterable_cost, **ltv_mults):
+    """LTV revenue views and the Extend/Migrate decision from per-scenario BP loss totals."""
+    out = ltv_revenue(total_activation_bp_loss, total_active_rescue_loss, total_inactive_rescue_loss,
+                      total_repeat_bp_loss, arpu, **ltv_mults)
+    out.update(decision(out["rev_in_month"], out["rev_ltv"], completion_rate, iterable_cost))
+    return out
+
+
+def monthly_ltv_revenue(cols, arpu):
+    """Per-month LTV revenue lost, from the per-month loss columns."""
+    return compute(("ltv_rev",), {**cols, "arpu": arpu})["ltv_rev"]
+
+
+def run_scenarios(n_months=MAX_RECOVERY_MONTHS, **inputs):
+    """Evaluate every scenario at once.
+
+    Takes each name in INPUT_NAMES as a scalar or (n,) array, plus an
+    optional `custom_curve` for levers at CUSTOM_SHAPE and an optional `data`
+    snapshot (default current()), and returns a dict of (n, n_months)
+    per-month arrays plus (n,) totals. Months at or beyond a scenario's
+    `recovery_months` are zero in every loss column.
+    """
+    curve = recovery_curve(inputs.pop("custom_curve", None))
+    d = inputs.pop("data", None) or _data
+    x, n = _broadcast_inputs(inputs)
+    x = {**x, "custom_curve": curve, "data": d}
+    out = signup_activation_losses(x, n_months)
+    out.update(rescue_losses(x, n_months))
+    out.update(repeat_losses(x, n_months))
+    out["ltv_rev"] = monthly_ltv_revenue({**out, **d.ltv_mults}, x["arpu"])
+    out.update(scenario_totals(
+        total_activation_bp_loss=out["total_activation_bp_loss"],
+        total_active_rescue_loss=out["total_active_rescue_loss"],
+        total_inactive_rescue_loss=out["total_inactive_rescue_loss"],
+        total_repeat_bp_loss=out["total_repeat_bp_loss"],
+        arpu=x["arpu"], completion_rate=x["completion_rate"], iterable_cost=x["iterable_cost"],
+        **d.ltv_mults,
+    ))
+    return _expand(out, n)
+
+
+# ── Memoized single-scenario stages ─────────────────────────────────────────
+# The dashboard evaluates one scenario per rerun and most reruns change a
+# single lever. Each stage is cached on just the scalars it reads, so e.g. a
+# new iterable_cost only recomputes the decision stage.
+STAGE_CACHE_SIZE = 256
+
+SIGNUP_ACTIVATION_INPUTS = (
+    "recovery_months", "migration_month", "in_signup_depression", "oon_embed_signup_depression",
+    "m0_activation_base", "m1_plus_uplift", "m0_depression", "m1_plus_depression",
+    "signup_recovery_shape", "activation_recovery_shape",
+)
+RESCUE_INPUTS = (
+    "recovery_months", "migration_month", "active_rescue_depression", "inactive_rescue_depression",
+    "rescue_recovery_shape",
+)
+REPEAT_INPUTS = ("recovery_months", "migration_month", "repeat_depression_bps", "repeat_recovery_shape")
+LOSS_INPUTS = tuple(dict.fromkeys(SIGNUP_ACTIVATION_INPUTS + RESCUE_INPUTS + REPEAT_INPUTS))
+
+
+def _single(stage, names, data, custom_curve, values):
+    x = {k: np.array([float(v)]) for k, v in zip(names, values)}
+    out = {}
+    for k, v in stage({**x, "custom_curve": custom_curve, "data": data}, int(x["recovery_months"][0])).items():
+        v = np.array(v[0])
+        v.flags.writeable = False
+        out[k] = v if v.ndim else float(v)
+    return out
+
+
+@functools.lru_cache(maxsize=STAGE_CACHE_SIZE)
+def signup_activation_stage(data, custom_curve, *values):
+    return _single(signup_activation_losses, SIGNUP_ACTIVATION_INPUTS, data, custom_curve, values)
+
+
+@functools.lru_cache(maxsize=STAGE_CACHE_SIZE)
+def rescue_stage(data, custom_curve, *values):
+    return _single(rescue_losses, RESCUE_INPUTS, data, custom_curve, values)
+
+
+@functools.lru_cache(maxsize=STAGE_CACHE_SIZE)
+def repeat_stage(data, custom_curve, *values):
+    return _single(repeat_losses, REPEAT_INPUTS, data, custom_curve, values)
+
+
+@functools.lru_cache(maxsize=STAGE_CACHE_SIZE)
+def ltv_stage(data, custom_curve, arpu, *loss_values):
+    p = dict(zip(LOSS_INPUTS, loss_values))
+    act = signup_activation_stage(data, custom_curve, *(p[k] for k in SIGNUP_ACTIVATION_INPUTS))
+    resc = rescue_stage(data, custom_curve, *(p[k] for k in RESCUE_INPUTS))
+    rpt = repeat_stage(data, custom_curve, *(p[k] for k in REPEAT_INPUTS))
+    out = {k: float(v) for k, v in ltv_revenue(
+        act["total_activation_bp_loss"], resc["total_active_rescue_loss"],
+        resc["total_inactive_rescue_loss"], rpt["total_repeat_bp_loss"], arpu, **data.ltv_mults,
+    ).items()}
+    ltv_rev = monthly_ltv_revenue({**act, **resc, **rpt, **data.ltv_mults}, arpu)
+    ltv_rev.flags.writeable = False
+    out["ltv_rev"] = ltv_rev
+    return out
+
+
+@functools.lru_cache(maxsize=STAGE_CACHE_SIZE)
+def decision_stage(rev_in_month, rev_ltv, completion_rate, iterable_cost):
+    return {k: v.item() if isinstance(v, np.ndarray) else v
+            for k, v in decision(rev_in_month, rev_ltv, completion_rate, iterable_cost).items()}
+
+
+MEMOIZED_STAGES = (signup_activation_stage, rescue_stage, repeat_stage, ltv_stage, decision_stage)
+
+
+def evaluate(**inputs):
+    """One scenario through the memoized stages.
+
+    Takes INPUT_NAMES, an optional `custom_curve` and an optional `data`
+    snapshot (default current()). Returns per-month columns as 1-D arrays
+    of length `recovery_months` and totals as floats. The returned arrays
+    are shared with the cache and are read-only.
+    """
+    missing = set(INPUT_NAMES) - set(inputs)
+    if missing:
+        raise TypeError(f"missing scenario inputs: {', '.join(sorted(missing))}")
+    p = {k: float(inputs[k]) for k in INPUT_NAMES}
+    curve = recovery_curve(inputs.get("custom_curve"))
+    d = inputs.get("data") or _data
+    out = {}
+    out.update(signup_activation_stage(d, curve, *(p[k] for k in SIGNUP_ACTIVATION_INPUTS)))
+    out.update(rescue_stage(d, curve, *(p[k] for k in RESCUE_INPUTS)))
+    out.update(repeat_stage(d, curve, *(p[k] for k in REPEAT_INPUTS)))
+    out.update(ltv_stage(d, curve, p["arpu"], *(p[k] for k in LOSS_INPUTS)))
+    out.update(decision_stage(out["rev_in_month"], out["rev_ltv"], p["completion_rate"], p["iterable_cost"]))
+    return out
+
+
+def stage_cache_info():
+    return {f.__name__: f.cache_info() for f in MEMOIZED_STAGES}
+
+
+# ── Closed-form totals ──────────────────────────────────────────────────────
+# Every lever sits at 1 + (dep - 1)·q in month m, where q = 1 - progress is
+# read from the recovery kernel of the lever's shape. Window totals are
+# therefore polynomials in (dep - 1) whose coefficients are Σq·x over the
+# window, plus Σq_s·q_a·x where signup and activation depressions compound.
+# They are precomputed once per (shape, start month, R), indexed as
+# sums[key][shape, start, R - 1] (two shape axes for the cross term).
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _window_sums(max_months, custom_curve, data):
+    q = 1.0 - recovery_kernels(max_months, custom_curve)  # (H, R, M), 0 from month R on
+    w = start_windows(max_months, data)
+    return {
+        "in_q": np.einsum("sm,hrm->hsr", w["in_signup"], q),
+        "oon_q": np.einsum("sm,hrm->hsr", w["oon_signup"], q),
+        "in_qq": np.einsum("sm,hrm,grm->hgsr", w["in_signup"], q, q),
+        "oon_qq": np.einsum("sm,hrm,grm->hgsr", w["oon_signup"], q, q),
+        "growth_q": np.einsum("sm,hrm->hsr", w["growth"], q),
+    }
+
+
+def run_totals(**inputs):
+    """Per-scenario totals only, without materialising per-month columns.
+
+    Matches the totals from run_scenarios to floating-point precision at a
+    fraction of the cost; use it for sampling and sweeps. Also accepts a
+    `custom_curve` and any of LTV_MULT_NAMES as extra scalar or (n,) inputs,
+    and a `data` snapshot (default current()).
+    """
+    d = inputs.pop("data", None) or _data
+    ltv_mults = {k: np.atleast_1d(np.asarray(inputs.pop(k, d.ltv_mults[k]), dtype=float)) for k in LTV_MULT_NAMES}
+    curve = recovery_curve(inputs.pop("custom_curve", None))
+    x, n = _broadcast_inputs(inputs)
+    n = np.broadcast_shapes((n,), *(v.shape for v in ltv_mults.values()))[0]
+    i = _window_index(x["recovery_months"])
+    sums = _window_sums(max(int(i.max(initial=0)) + 1, MAX_RECOVERY_MONTHS), curve, d)
+    s = _start_index(x["migration_month"], d)
+    h_su = _shape_index(x["signup_recovery_shape"], curve)
+    h_act = _shape_index(x["activation_recovery_shape"], curve)
+    in_q, oon_q = sums["in_q"][h_su, s, i], sums["oon_q"][h_su, s, i]
+    in_qa, oon_qa = sums["in_q"][h_act, s, i], sums["oon_q"][h_act, s, i]
+    in_qq, oon_qq = sums["in_qq"][h_su, h_act, s, i], sums["oon_qq"][h_su, h_act, s, i]
+    rescue_q = sums["growth_q"][_shape_index(x["rescue_recovery_shape"], curve), s, i]
+    repeat_q = sums["growth_q"][_shape_index(x["repeat_recovery_shape"], curve), s, i]
+
+    a_in = x["in_signup_depression"] - 1.0
+    a_oon = x["oon_embed_signup_depression"] - 1.0
+    a_m0 = x["m0_depression"] - 1.0
+    a_m1 = x["m1_plus_depression"] - 1.0
+    m0 = x["m0_activation_base"]
+    m1 = x["m1_plus_uplift"]
+    # s·(1 + a_s·q_s)·r·(1 + a_r·q_a) - s·r summed over the window, grouped so
+    # the activation rates enter once: r_total·a_s·Σsq_s + d·Σsq_a + d·a_s·Σsq_s·q_a
+    act_rate = m0 + m1
+    act_dep = m0 * a_m0 + m1 * a_m1
+    signup_q = a_in * in_q + a_oon * oon_q
+    total_activation = act_rate * signup_q + act_dep * (in_qa + oon_qa + a_in * in_qq + a_oon * oon_qq)
+    total_active_rescue = d.active_users_feb * d.active_rescue_rate * (x["active_rescue_depression"] - 1.0) * rescue_q
+    total_inactive_rescue = (d.inactive_users_feb * d.inactive_rescue_rate
+                             * (x["inactive_rescue_depression"] - 1.0) * rescue_q)
+    total_repeat = -d.bp_prev_month_feb * (x["repeat_depression_bps"] / 10000) * repeat_q
+
+    out = scenario_totals(
+        total_activation_bp_loss=total_activation,
+        total_active_rescue_loss=total_active_rescue,
+        total_inactive_rescue_loss=total_inactive_rescue,
+        total_repeat_bp_loss=total_repeat,
+        arpu=x["arpu"], completion_rate=x["completion_rate"], iterable_cost=x["iterable_cost"],
+        **ltv_mults,
+    )
+    out["total_signup_loss"] = signup_q
+    return _expand(out, n)
+
+
+def compare_start_months(**inputs):
+    """run_totals for every migration start month in months_all at once.
+
+    Takes scalar inputs (migration_month, if given, is ignored) and returns
+    (len(months_all),) arrays, one entry per start month.
+    """
+    return run_totals(**{**inputs, "migration_month": np.arange(len(_data.months_all))})
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DATA REFRESH
+# ═══════════════════════════════════════════════════════════════════════════
+_refresh_hooks = []
+_refresh_lock = threading.Lock()
+
+
+def on_refresh(fn):
+    """Call `fn()` whenever refresh() rebinds the data, e.g. to clear a cache built on it."""
+    _refresh_hooks.append(fn)
+    return fn
+
+
+def refresh(data_dir=None):
+    """Swap in a new Data snapshot if any data file changed since the last load.
+
+    Cheap when nothing changed (one stat per file). Returns True when the
+    data changed, after clearing every cache derived from it. Safe to call
+    from every session thread: one caller at a time checks and swaps. If a
+    file fails to load or validate, raises (ValueError for bad contents,
+    OSError for unreadable files) and keeps the current snapshot.
+    """
+    global _data
+    with _refresh_lock:
+        d = data.load(data_dir)
+        if d["version"] == _data.version:
+            return False
+        _data = _snapshot(d)
+        INPUT_RANGES["migration_month"] = (0, len(_data.months_all) - 1, 1)
+        # Entries keyed on the old snapshot can no longer be hit; drop them
+        start_windows.cache_clear()
+        _window_sums.cache_clear()
+        for f in MEMOIZED_STAGES:
+            f.cache_clear()
+        for fn in _refresh_hooks:
+            fn()
+    return True
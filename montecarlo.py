@@ -0,0 +1,100 @@
+"""Monte Carlo uncertainty over the depression levers and warmup completion.
+
+Each uncertain lever gets a (kind, low, mode, high) spec. All samples are
+drawn up front and pushed through model.run_totals in one batched call.
+"""
+import numpy as np
+
+from model import run_totals
+
+
+DISTRIBUTIONS = ("triangular", "beta", "uniform")
+
+# Levers that can carry a distribution, with the hard bounds of their sliders
+UNCERTAIN_INPUTS = {
+    "completion_rate": (0.0, 100.0),
+    "in_signup_depression": (0.0, 1.0),
+    "m0_depression": (0.0, 1.0),
+    "m1_plus_depression": (0.0, 1.0),
+    "active_rescue_depression": (0.0, 1.0),
+    "inactive_rescue_depression": (0.0, 1.0),
+    "repeat_depression_bps": (0.0, 200.0),
+}
+
+DEFAULT_SAMPLES = 200_000
+PERCENTILES = (5, 25, 50, 75, 95)
+HIST_BINS = 60
+
+
+def default_spec(name, mode, kind="triangular"):
+    """A spec spanning ±10% of the slider range around the point estimate."""
+    lo, hi = UNCERTAIN_INPUTS[name]
+    width = 0.10 * (hi - lo)
+    return (kind, max(lo, mode - width), mode, min(hi, mode + width))
+
+
+def recentre(name, spec, mode):
+    """`spec` moved so its mode is `mode`, keeping the bounds' offsets from it within the slider range."""
+    kind, low, old_mode, high = spec
+    lo, hi = UNCERTAIN_INPUTS[name]
+    shift = mode - old_mode
+    return (kind, max(lo, low + shift), mode, min(hi, high + shift))
+
+
+def sample(spec, n, rng):
+    """Draw `n` values for one (kind, low, mode, high) spec.
+
+    "beta" is the PERT beta: shape parameters are set from where the mode sits
+    between the bounds, so no extra inputs are needed.
+    """
+    kind, low, mode, high = spec
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {kind!r}; expected one of {DISTRIBUTIONS}")
+    if high < low:
+        raise ValueError(f"distribution bounds are reversed: low={low}, high={high}")
+    if high == low:
+        return np.full(n, float(low))
+    mode = min(max(mode, low), high)
+    if kind == "uniform":
+        return rng.uniform(low, high, n)
+    if kind == "triangular":
+        return rng.triangular(low, mode, high, n)
+    alpha = 1.0 + 4.0 * (mode - low) / (high - low)
+    beta = 1.0 + 4.0 * (high - mode) / (high - low)
+    return low + (high - low) * rng.beta(alpha, beta, n)
+
+
+def simulate(inputs, specs, n_samples=DEFAULT_SAMPLES, seed=0):
+    """Sample every lever in `specs`, hold the rest of `inputs` fixed, and summarise.
+
+    Returns the raw `rev_ltv` and `net_value_of_extension` samples, their
+    percentiles and histograms, and `p_extend`: the share of draws in which
+    extending Iterable has positive net value.
+    """
+    unknown = set(specs) - set(UNCERTAIN_INPUTS)
+    if unknown:
+        raise ValueError(f"no distribution support for: {', '.join(sorted(unknown))}")
+    rng = np.random.default_rng(seed)
+    draws = dict(inputs)
+    for name in UNCERTAIN_INPUTS:
+        if name in specs:
+            draws[name] = sample(specs[name], n_samples, rng)
+    out = run_totals(**draws)
+    rev_ltv = np.broadcast_to(out["rev_ltv"], (n_samples,))
+    net = np.broadcast_to(out["net_value_of_extension"], (n_samples,))
+    return {
+        "n_samples": n_samples,
+        "rev_ltv": rev_ltv,
+        "net_value_of_extension": net,
+        "rev_ltv_pct": dict(zip(PERCENTILES, np.percentile(rev_ltv, PERCENTILES))),
+        "net_value_pct": dict(zip(PERCENTILES, np.percentile(net, PERCENTILES))),
+        "rev_ltv_hist": np.histogram(rev_ltv, bins=HIST_BINS),
+        "net_value_hist": np.histogram(net, bins=HIST_BINS),
+        "p_extend": float(np.mean(net > 0)),
+    }
+
+
+def breakeven_bands(rev_ltv_pct, probs):
+    """Percentile bands of expected LTV impact along the breakeven x-axis."""
+    probs = np.asarray(probs, dtype=float)
+    return {p: probs * v for p, v in rev_ltv_pct.items()}
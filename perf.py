@@ -0,0 +1,251 @@
+"""Wall-clock section timing and opt-in tracing for the dashboard script.
+
+app.py calls mark(name) at the top of each section; the time until the next
+mark (or finish()) is attributed to that section. Disabled unless the
+BRAZE_PROFILE environment variable is set or enable() is called, in which
+case mark() is a thread-local lookup and an attribute check.
+
+Tracing goes further, for one run at a time: BRAZE_TRACE (every run) or
+trace() (the rest of the current run, e.g. from a ?trace=1 query param)
+also records span() blocks nested inside the sections, such as the model
+stages and figure serialization, and the tracemalloc peak of each section
+and span. A finished Run has `sections` and, when traced, `events`;
+chrome_trace() wraps the events for chrome://tracing or Perfetto.
+
+    with perf.span("rescue", "model"):
+        ...
+    with perf.span("plotly_json", "serialize") as args:
+        if args is not None:
+            args["bytes"] = len(spec)
+
+Streamlit runs every session's script on its own thread in one process, so
+the run in progress is per thread: start() begins one for the calling
+thread, and mark(), span(), trace() and finish() only ever touch that one.
+finish() returns the finished Run for the caller to keep (app.py puts it in
+st.session_state); last_run() and last_trace() read the calling thread's.
+tracemalloc is process-wide, so while several traced runs overlap their
+memory peaks include each other's allocations.
+"""
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+
+
+ENV_VAR = "BRAZE_PROFILE"
+TRACE_ENV_VAR = "BRAZE_TRACE"
+
+_enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+_trace_all = os.environ.get(TRACE_ENV_VAR, "") not in ("", "0")
+_local = threading.local()  # .run: the run in progress, .last: the last finished one
+
+# tracemalloc is started by the first traced run and stopped after the last
+# one, unless something else had it running already
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_own_tracemalloc = False
+
+
+class Run:
+    """One script run's marks, spans and memory levels; finish() fills `sections` and `events`."""
+
+    def __init__(self):
+        self.marks = []
+        self.tracing = False
+        # Tracing state: finished spans, the memory peak of each closed
+        # section, and a stack of [base, peak] for the open section and
+        # spans (tracemalloc has one global peak, so it is reset at every
+        # boundary and folded into the enclosing level by hand)
+        self.spans = []
+        self.section_peaks = []
+        self.mem = []
+        self.release = None  # drops this run's hold on tracemalloc, once
+        self.sections = None  # [(section, seconds), ...]
+        self.events = None  # trace events, for traced runs
+
+    def mem_reset(self):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.mem[:] = [[current, current]]
+
+    def mem_peak(self):
+        """Close the innermost memory level; returns its peak above its starting level."""
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        base, carried = self.mem.pop()
+        peak = max(peak, carried)
+        if self.mem:
+            self.mem[-1][1] = max(self.mem[-1][1], peak)
+        return peak - base
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users, _own_tracemalloc
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _own_tracemalloc = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users, _own_tracemalloc
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _own_tracemalloc:
+            tracemalloc.stop()
+            _own_tracemalloc = False
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def _current():
+    return getattr(_local, "run", None)
+
+
+def tracing():
+    run = _current()
+    return run is not None and run.tracing
+
+
+def trace():
+    """Trace the rest of the calling thread's run (start() resets it to BRAZE_TRACE)."""
+    run = _current()
+    if run is None:
+        run = _local.run = Run()
+    if run.tracing:
+        return
+    run.tracing = True
+    _acquire_tracemalloc()
+    # Also released if the run is abandoned mid-flight and collected
+    run.release = weakref.finalize(run, _release_tracemalloc)
+    if not run.marks:
+        run.marks.append(("_start", time.perf_counter()))
+    # Sections closed before tracing began have no memory figure
+    run.section_peaks[:] = [None] * (len(run.marks) - 1)
+    run.mem_reset()
+
+
+def start():
+    """Begin a new script run on the calling thread, dropping an interrupted previous one."""
+    old = _current()
+    if old is not None and old.release is not None:
+        old.release()
+    run = _local.run = Run()
+    if _enabled:
+        run.marks.append(("_start", time.perf_counter()))
+    if _trace_all:
+        trace()
+    return run
+
+
+def mark(name):
+    run = _current()
+    if run is not None and (_enabled or run.tracing):
+        if run.tracing:
+            run.section_peaks.append(run.mem_peak())
+            run.mem_reset()
+        run.marks.append((name, time.perf_counter()))
+
+
+def span(name, cat="model", **args):
+    """Context manager timing a block inside the current section when tracing.
+
+    Yields the event's args dict (extra fields to record, like byte sizes),
+    or None when not tracing, where it costs one call.
+    """
+    run = _current()
+    if run is None or not run.tracing:
+        return contextlib.nullcontext()
+    return _span(run, name, cat, args)
+
+
+@contextlib.contextmanager
+def _span(run, name, cat, args):
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    run.mem[-1][1] = max(run.mem[-1][1], peak)
+    run.mem.append([current, current])
+    t0 = time.perf_counter()
+    try:
+        yield args
+    finally:
+        t1 = time.perf_counter()
+        args["peak_bytes"] = run.mem_peak()
+        run.spans.append({"name": name, "cat": cat, "start": t0, "seconds": t1 - t0, "args": args})
+
+
+def finish():
+    """Close the last section of the calling thread's run and return it, finished.
+
+    Returns None when the run recorded nothing (timing and tracing off).
+    """
+    run = _current()
+    _local.run = None
+    if run is None or not (_enabled or run.tracing) or not run.marks:
+        return None
+    marks = run.marks + [("_end", time.perf_counter())]
+    if run.tracing:
+        run.section_peaks.append(run.mem_peak())
+        run.mem.clear()
+    run.sections = [
+        (name, t1 - t0)
+        for (name, t0), (_, t1) in zip(marks, marks[1:])
+        if name != "_start"
+    ]
+    if run.tracing:
+        run_start = marks[0][1]
+        sections = [
+            {"name": name, "cat": "section", "start": t0, "seconds": t1 - t0, "args": {"peak_bytes": peak}}
+            for (name, t0), (_, t1), peak in zip(marks, marks[1:], run.section_peaks)
+            if name != "_start"
+        ]
+        run.events = [
+            {**e, "start": e["start"] - run_start}
+            for e in sorted(sections + run.spans, key=lambda e: (e["start"], -e["seconds"]))
+        ]
+        run.spans.clear()
+        run.tracing = False
+        run.release()
+    run.marks.clear()
+    _local.last = run
+    return run
+
+
+def last_run():
+    """[(section, seconds), ...] for the calling thread's most recent finished run."""
+    run = getattr(_local, "last", None)
+    return list(run.sections) if run is not None else []
+
+
+def last_trace():
+    """Events of the calling thread's most recent traced run, in start order.
+
+    Each is {"name", "cat", "start", "seconds", "args"}: `cat` is "section"
+    for the marks and the span category otherwise, `start` is seconds since
+    the run began, and args["peak_bytes"] is the tracemalloc peak above the
+    level the event started from.
+    """
+    run = getattr(_local, "last", None)
+    return [dict(e, args=dict(e["args"])) for e in run.events or ()] if run is not None else []
+
+
+def chrome_trace(events, pid=1, tid=1):
+    """Trace-event JSON object (complete "X" events, µs) for chrome://tracing and Perfetto."""
+    return {
+        "displayTimeUnit": "ms",
+        "traceEvents": [
+            {"name": e["name"], "cat": e["cat"], "ph": "X", "pid": pid, "tid": tid,
+             "ts": round(e["start"] * 1e6, 1), "dur": round(e["seconds"] * 1e6, 1), "args": e["args"]}
+            for e in events
+        ],
+    }
@@ -0,0 +1,151 @@
+"""Process-wide cache of single-scenario model results, shared by every session.
+
+Keys are the sidebar inputs quantized to a millionth of their slider step, so
+float noise from widgets never splits an entry. Values are evaluate()-shaped
+dicts whose arrays are read-only, safe to hand to any number of sessions.
+Entries are evicted least-recently-used once their estimated size passes the
+ceiling (BRAZE_CACHE_MB, default 64). Setting BRAZE_CACHE_PREWARM fills the
+cache at startup with every slider position along each input axis around
+the defaults.
+"""
+import collections
+import os
+import sys
+import threading
+
+import numpy as np
+
+import model
+
+
+MB_ENV_VAR = "BRAZE_CACHE_MB"
+PREWARM_ENV_VAR = "BRAZE_CACHE_PREWARM"
+QUANTA_PER_STEP = 1_000_000
+
+_max_bytes = int(float(os.environ.get(MB_ENV_VAR, 64)) * 2**20)
+_entries = collections.OrderedDict()  # key -> (result, nbytes), least recent first
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+_lock = threading.Lock()
+
+
+def key(inputs, data=None):
+    """Hashable key for a scenario: each input in millionths of its slider step, its custom curve,
+    and the version of the `data` snapshot it is computed on (default model.current()).
+
+    With the version in the key, a result a session finishes on old data after
+    another session's refresh() can never be served for the new data.
+    """
+    data = model.current() if data is None else data
+    return tuple(
+        round(float(inputs[k]) / model.INPUT_RANGES[k][2] * QUANTA_PER_STEP) for k in model.INPUT_NAMES
+    ) + (model.recovery_curve(inputs.get("custom_curve")), data.version)
+
+
+def _sizeof(result):
+    # Array buffers plus per-object overhead; an estimate, not an exact count
+    n = sys.getsizeof(result)
+    for v in result.values():
+        n += v.nbytes + sys.getsizeof(v) if isinstance(v, np.ndarray) else sys.getsizeof(v)
+    return n
+
+
+def get(k):
+    """Cached result for key `k`, or None. Counts a hit or a miss."""
+    with _lock:
+        hit = _entries.get(k)
+        if hit is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(k)
+        _stats["hits"] += 1
+        return dict(hit[0])
+
+
+def put(k, result):
+    """Store `result` under `k`, evicting least-recently-used entries over the ceiling."""
+    nbytes = _sizeof(result)
+    with _lock:
+        old = _entries.pop(k, None)
+        if old is not None:
+            _stats["bytes"] -= old[1]
+        if nbytes > _max_bytes:
+            return
+        _entries[k] = (dict(result), nbytes)
+        _stats["bytes"] += nbytes
+        _evict()
+
+
+def _evict():
+    while _stats["bytes"] > _max_bytes and _entries:
+        _, (_, nbytes) = _entries.popitem(last=False)
+        _stats["bytes"] -= nbytes
+        _stats["evictions"] += 1
+
+
+def set_max_bytes(max_bytes):
+    global _max_bytes
+    with _lock:
+        _max_bytes = int(max_bytes)
+        _evict()
+
+
+def clear():
+    """Drop every entry; the counters keep running."""
+    with _lock:
+        _entries.clear()
+        _stats["bytes"] = 0
+
+
+def stats():
+    with _lock:
+        return {**_stats, "entries": len(_entries), "max_bytes": _max_bytes}
+
+
+# ── Pre-warm ────────────────────────────────────────────────────────────────
+def lattice(center=None):
+    """Every slider position of each input with the others at `center` (the defaults)."""
+    center = dict(model.DEFAULT_INPUTS if center is None else center)
+    points = []
+    for name in model.INPUT_NAMES:
+        lo, hi, step = model.INPUT_RANGES[name]
+        for v in np.arange(lo, hi + step / 2, step):
+            points.append({**center, name: round(float(v), 10)})
+    return points
+
+
+def _rows(cols, recovery_months):
+    """Split run_scenarios columns into evaluate()-shaped results, one per scenario."""
+    for i, R in enumerate(recovery_months):
+        out = {}
+        for k, v in cols.items():
+            if np.ndim(v) == 2:
+                row = np.array(v[i, :R])
+                row.flags.writeable = False
+                out[k] = row
+            else:
+                out[k] = v[i].item()
+        yield out
+
+
+def prewarm(points=None):
+    """Fill the cache with `points` (default: lattice()) in one vectorized model run.
+
+    Returns the number of results stored.
+    """
+    points = lattice() if points is None else points
+    if not points:
+        return 0
+    batch = {k: np.array([p[k] for p in points], dtype=float) for k in model.INPUT_NAMES}
+    recovery = batch["recovery_months"].astype(int)
+    data = model.current()
+    cols = model.run_scenarios(n_months=int(recovery.max()), data=data, **batch)
+    for p, result in zip(points, _rows(cols, recovery)):
+        put(key(p, data), result)
+    return len(points)
+
+
+def prewarm_requested():
+    return os.environ.get(PREWARM_ENV_VAR, "") not in ("", "0")
+
+
+model.on_refresh(clear)
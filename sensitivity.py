@@ -0,0 +1,59 @@
+"""One-at-a-time sensitivity of the headline outputs to each sidebar lever.
+
+Every lever is flexed across its full slider range while the others stay at
+the current inputs; all perturbed scenarios go through model.run_totals as a
+single batch.
+"""
+import numpy as np
+
+from model import INPUT_RANGES, run_totals
+
+
+SENSITIVITY_INPUTS = (
+    "arpu", "m0_activation_base", "m1_plus_uplift",
+    "in_signup_depression", "oon_embed_signup_depression",
+    "m0_depression", "m1_plus_depression",
+    "active_rescue_depression", "inactive_rescue_depression",
+    "recovery_months", "repeat_depression_bps", "completion_rate",
+)
+SENSITIVITY_OUTPUTS = ("rev_ltv", "net_value_of_extension")
+SPIDER_POINTS = 11
+
+
+def flex_grid(name, n_points=SPIDER_POINTS):
+    lo, hi, step = INPUT_RANGES[name]
+    values = np.linspace(lo, hi, n_points)
+    # Snap to the slider lattice so every point is a reachable setting
+    return lo + np.round((values - lo) / step) * step
+
+
+def one_at_a_time(inputs, names=SENSITIVITY_INPUTS, n_points=SPIDER_POINTS, outputs=SENSITIVITY_OUTPUTS):
+    """Sweep each lever in `names` over `n_points` of its range.
+
+    Returns `grid` (name -> lever values), `results` (output -> (len(names),
+    n_points) array, rows in `names` order) and `base` (output -> value at
+    the unperturbed inputs).
+    """
+    k = len(names)
+    batch = {key: np.full(k * n_points + 1, float(v)) for key, v in inputs.items() if key != "custom_curve"}
+    batch["custom_curve"] = inputs.get("custom_curve")
+    grid = {}
+    for i, name in enumerate(names):
+        grid[name] = flex_grid(name, n_points)
+        batch[name][i * n_points:(i + 1) * n_points] = grid[name]
+    # The last row is the unperturbed base case
+    out = run_totals(**batch)
+    return {
+        "names": tuple(names),
+        "grid": grid,
+        "results": {o: out[o][:-1].reshape(k, n_points) for o in outputs},
+        "base": {o: float(out[o][-1]) for o in outputs},
+    }
+
+
+def tornado(sweep, output):
+    """(name, low, high) swings of `output` around the base, widest first."""
+    base = sweep["base"][output]
+    res = sweep["results"][output]
+    bars = [(name, res[i].min() - base, res[i].max() - base) for i, name in enumerate(sweep["names"])]
+    return sorted(bars, key=lambda b: b[2] - b[1], reverse=True)
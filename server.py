@@ -0,0 +1,394 @@
+"""Local HTTP JSON service over the model, for notebooks and bots.
+
+    python server.py --port 8765
+    python server.py --load-test                 # against an in-process instance
+    python server.py --load-test --url http://127.0.0.1:8765
+
+Stdlib only. Endpoints:
+
+    GET  /schema     inputs (default, min, max, step, label), outputs, recovery shapes
+    POST /scenario   one scenario -> evaluate()-shaped outputs, monthly columns as lists
+    POST /batch      {"scenarios": [...], "orient": "rows"|"columns"} -> run_totals outputs
+    GET  /metrics    per-endpoint request counts, scenarios and latency percentiles
+    GET  /health
+
+Scenarios are objects of model inputs; missing ones take the dashboard
+defaults. A batch goes through model.run_totals in one vectorized call. Both
+endpoints cache per scenario, keyed by the inputs quantized as in
+scenario_cache, so a batch only computes its misses; /scenario shares the
+dashboard's result cache. Every response carries a Server-Timing header.
+"""
+import argparse
+import collections
+import http.client
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+import graph
+import model
+import scenario_cache
+
+
+ROWS_ENV_VAR = "BRAZE_SERVICE_CACHE_ROWS"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 2**20
+MAX_BATCH = 200_000
+LATENCY_WINDOW = 2_000  # latencies kept per endpoint for percentiles
+ORIENTS = ("rows", "columns")
+
+TOTAL_OUTPUTS = tuple(model.run_totals(**model.DEFAULT_INPUTS))
+
+_max_rows = int(os.environ.get(ROWS_ENV_VAR, 200_000))
+_totals = collections.OrderedDict()  # canonical key -> output row, least recent first
+_totals_stats = {"hits": 0, "misses": 0}
+_totals_lock = threading.Lock()
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+# ── Inputs ──────────────────────────────────────────────────────────────────
+def schema():
+    return {
+        "inputs": {
+            k: {"default": model.DEFAULT_INPUTS[k], "min": lo, "max": hi, "step": step, "label": model.INPUT_LABELS[k]}
+            for k, (lo, hi, step) in ((k, model.INPUT_RANGES[k]) for k in model.INPUT_NAMES)
+        },
+        "outputs": {"batch": list(TOTAL_OUTPUTS), "scenario": list(graph.OUTPUTS)},
+        "recovery_shapes": list(model.RECOVERY_SHAPES),
+    }
+
+
+def columns(scenarios):
+    """{input: (n,) float array} for a list of scenario objects, defaults filled in.
+
+    Raises ValueError for unknown inputs, values that are not JSON numbers,
+    and values outside the dashboard's INPUT_RANGES.
+    """
+    if not isinstance(scenarios, list) or not all(isinstance(s, dict) for s in scenarios):
+        raise ValueError("scenarios must be a list of objects")
+    unknown = set().union(*scenarios) - set(model.INPUT_NAMES) if scenarios else set()
+    if unknown:
+        raise ValueError(f"unknown inputs: {', '.join(sorted(unknown))}")
+    cols = {}
+    for k in model.INPUT_NAMES:
+        d = model.DEFAULT_INPUTS[k]
+        values = [s.get(k, d) for s in scenarios]
+        # JSON numbers only: float() would take true and "3" as well
+        if not set(map(type, values)) <= {int, float}:
+            i = next(i for i, v in enumerate(values) if type(v) not in (int, float))
+            raise ValueError(f"scenario {i}: input {k!r} must be a number, got {values[i]!r}")
+        cols[k] = np.array(values, dtype=float)
+        lo, hi, _ = model.INPUT_RANGES[k]
+        bad = ~((cols[k] >= lo) & (cols[k] <= hi))  # NaN fails both
+        if bad.any():
+            i = int(bad.argmax())
+            raise ValueError(f"scenario {i}: input {k!r} must be in [{lo}, {hi}], got {values[i]!r}")
+    return cols
+
+
+def keys(cols, data):
+    """Canonical cache key per scenario: scenario_cache.key() for a whole batch at once."""
+    steps = np.array([model.INPUT_RANGES[k][2] for k in model.INPUT_NAMES])
+    q = np.rint(np.stack([cols[k] for k in model.INPUT_NAMES], axis=1) / steps * scenario_cache.QUANTA_PER_STEP)
+    return [(data.version, row.tobytes()) for row in q.astype(np.int64)]
+
+
+# ── Evaluation ──────────────────────────────────────────────────────────────
+def run_batch(scenarios):
+    """run_totals rows for `scenarios`, computing only the cache misses in one call.
+
+    Returns (rows in TOTAL_OUTPUTS order, number of rows served from cache).
+    """
+    cols = columns(scenarios)
+    data = model.current()
+    ks = keys(cols, data)
+    rows = [None] * len(ks)
+    with _totals_lock:
+        for i, k in enumerate(ks):
+            hit = _totals.get(k)
+            if hit is not None:
+                _totals.move_to_end(k)
+                rows[i] = hit
+    todo = {}
+    for i, k in enumerate(ks):
+        if rows[i] is None:
+            todo.setdefault(k, i)  # duplicates within the batch compute once
+    if todo:
+        idx = np.fromiter(todo.values(), dtype=np.intp, count=len(todo))
+        out = model.run_totals(**{k: v[idx] for k, v in cols.items()}, data=data)
+        new = list(zip(*(np.broadcast_to(out[k], idx.shape).tolist() for k in TOTAL_OUTPUTS)))
+        computed = dict(zip(todo, new))
+        with _totals_lock:
+            for k, row in computed.items():
+                _totals[k] = row
+            while len(_totals) > _max_rows:
+                _totals.popitem(last=False)
+        for i, k in enumerate(ks):
+            if rows[i] is None:
+                rows[i] = computed[k]
+    hits = len(ks) - len(todo)
+    with _totals_lock:
+        _totals_stats["hits"] += hits
+        _totals_stats["misses"] += len(todo)
+    return rows, hits
+
+
+def run_scenario(inputs):
+    """evaluate()-shaped outputs for one scenario, through the shared result cache."""
+    cols = columns([inputs])
+    p = {k: v[0].item() for k, v in cols.items()}
+    data = model.current()
+    k = scenario_cache.key(p, data)
+    out = scenario_cache.get(k)
+    if out is None:
+        out = model.evaluate(**p, data=data)
+        scenario_cache.put(k, out)
+    return p, {name: v.tolist() if isinstance(v, (np.ndarray, np.generic)) else v for name, v in out.items()}
+
+
+def clear_cache():
+    with _totals_lock:
+        _totals.clear()
+
+
+model.on_refresh(clear_cache)
+
+
+# ── Metrics ─────────────────────────────────────────────────────────────────
+def _record(endpoint, seconds, scenarios, error):
+    with _metrics_lock:
+        m = _metrics.setdefault(endpoint, {
+            "requests": 0, "errors": 0, "scenarios": 0, "latency": collections.deque(maxlen=LATENCY_WINDOW),
+        })
+        m["requests"] += 1
+        m["errors"] += error
+        m["scenarios"] += scenarios
+        m["latency"].append(seconds)
+
+
+def metrics():
+    with _metrics_lock:
+        snap = {e: {**m, "latency": np.array(m["latency"])} for e, m in _metrics.items()}
+    out = {}
+    for e, m in snap.items():
+        lat = m["latency"] * 1e3
+        out[e] = {
+            "requests": m["requests"], "errors": m["errors"], "scenarios": m["scenarios"],
+            "latency_ms": {
+                "mean": float(lat.mean()),
+                **{f"p{p}": float(v) for p, v in zip((50, 95, 99), np.percentile(lat, (50, 95, 99)))},
+                "max": float(lat.max()),
+            },
+        }
+    with _totals_lock:
+        cache = {**_totals_stats, "rows": len(_totals), "max_rows": _max_rows}
+    return {"endpoints": out, "batch_cache": cache, "scenario_cache": scenario_cache.stats()}
+
+
+# ── HTTP ────────────────────────────────────────────────────────────────────
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse a connection
+    server_version = "braze-model/1"
+    quiet = False
+
+    def _send(self, status, body, started, model_seconds=0.0):
+        data = json.dumps(body, separators=(",", ":")).encode()
+        total = time.perf_counter() - started
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Server-Timing", f"model;dur={model_seconds * 1e3:.3f}, total;dur={total * 1e3:.3f}")
+        self.end_headers()
+        self.wfile.write(data)
+        return total
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if n > MAX_BODY_BYTES:
+            raise ValueError(f"request body over {MAX_BODY_BYTES:,} bytes")
+        try:
+            return json.loads(self.rfile.read(n) or b"null")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"invalid JSON: {e}") from None
+
+    def _handle(self, method):
+        started = time.perf_counter()
+        path = urllib.parse.urlsplit(self.path).path.rstrip("/") or "/"
+        endpoint = f"{method} {path}"
+        route = ROUTES.get(endpoint)
+        if route is None:
+            if method == "POST":
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            known = any(r.split(" ", 1)[1] == path for r in ROUTES)
+            self._send(405 if known else 404, {"error": f"no route for {endpoint}"}, started)
+            return
+        scenarios, model_seconds, status = 0, 0.0, 200
+        try:
+            body = self._body() if method == "POST" else None
+            t0 = time.perf_counter()
+            result, scenarios = route(body)
+            model_seconds = time.perf_counter() - t0
+        except (ValueError, TypeError) as e:
+            status, result = 400, {"error": str(e)}
+        total = self._send(status, result, started, model_seconds)
+        _record(endpoint, total, scenarios, status != 200)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+
+def _post_batch(body):
+    if isinstance(body, list):
+        body = {"scenarios": body}
+    if not isinstance(body, dict):
+        raise ValueError('expected {"scenarios": [...]} or a list of scenarios')
+    scenarios = body.get("scenarios", [])
+    orient = body.get("orient", "rows")
+    if orient not in ORIENTS:
+        raise ValueError(f"orient must be one of {ORIENTS}")
+    if isinstance(scenarios, list) and len(scenarios) > MAX_BATCH:
+        raise ValueError(f"at most {MAX_BATCH:,} scenarios per batch")
+    rows, hits = run_batch(scenarios)
+    if orient == "columns":
+        results = dict(zip(TOTAL_OUTPUTS, map(list, zip(*rows)))) if rows else {k: [] for k in TOTAL_OUTPUTS}
+    else:
+        results = [dict(zip(TOTAL_OUTPUTS, r)) for r in rows]
+    return {"n": len(rows), "cached": hits, "results": results}, len(rows)
+
+
+def _post_scenario(body):
+    if not isinstance(body, dict):
+        raise ValueError("expected an object of model inputs")
+    inputs, outputs = run_scenario(body)
+    return {"inputs": inputs, "outputs": outputs}, 1
+
+
+ROUTES = {
+    "GET /schema": lambda _: (schema(), 0),
+    "GET /metrics": lambda _: (metrics(), 0),
+    "GET /health": lambda _: ({"status": "ok", "data_version": str(model.current().version)}, 0),
+    "POST /batch": _post_batch,
+    "POST /scenario": _post_scenario,
+}
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, quiet=False):
+    """A ThreadingHTTPServer bound to (host, port); call serve_forever() on it."""
+    handler = type("QuietHandler", (Handler,), {"quiet": True}) if quiet else Handler
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# ── Load test ───────────────────────────────────────────────────────────────
+def random_scenarios(n, rng):
+    """`n` scenarios drawn uniformly from every input's slider lattice."""
+    out = {}
+    for k in model.INPUT_NAMES:
+        lo, hi, step = model.INPUT_RANGES[k]
+        out[k] = (lo + step * rng.integers(0, int(round((hi - lo) / step)) + 1, n)).round(10).tolist()
+    return [dict(zip(out, row)) for row in zip(*out.values())]
+
+
+def load_test(url, requests=200, batch_size=500, concurrency=4, repeat=False, seed=0):
+    """POST `requests` batches of random scenarios from `concurrency` keep-alive clients.
+
+    With `repeat` every request sends the same batch (all cache hits after the
+    first). Returns scenarios/s and per-request latency percentiles.
+    """
+    parts = urllib.parse.urlsplit(url)
+    rng = np.random.default_rng(seed)
+    n_bodies = 1 if repeat else min(requests, 64)
+    bodies = [json.dumps({"scenarios": random_scenarios(batch_size, rng), "orient": "columns"}).encode()
+              for _ in range(n_bodies)]
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        try:
+            for i in counter:
+                t0 = time.perf_counter()
+                conn.request("POST", "/batch", body=bodies[i % n_bodies], headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                resp.read()
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+                    if resp.status != 200:
+                        errors.append(resp.status)
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    lat = np.array(latencies) * 1e3
+    return {
+        "requests": len(latencies), "errors": len(errors), "batch_size": batch_size,
+        "concurrency": concurrency, "seconds": elapsed,
+        "scenarios_per_s": len(latencies) * batch_size / elapsed,
+        "latency_ms": dict(zip(("p50", "p95", "p99"), np.percentile(lat, (50, 95, 99)).tolist())),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Braze migration risk model as JSON over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--quiet", action="store_true", help="no per-request log lines")
+    parser.add_argument("--load-test", action="store_true", help="run a load test instead of serving")
+    parser.add_argument("--url", help="load-test this server (default: an in-process instance)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeat", action="store_true", help="resend one batch: measures the cached path")
+    args = parser.parse_args(argv)
+
+    if not args.load_test:
+        server = serve(args.host, args.port, args.quiet)
+        print(f"serving on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    server = None
+    url = args.url
+    if url is None:
+        server = serve(args.host, 0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://{args.host}:{server.server_address[1]}"
+    try:
+        result = load_test(url, args.requests, args.batch_size, args.concurrency, args.repeat)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    print(json.dumps(result, indent=2))
+    return 0 if not result["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Precomputed breakeven surface over warmup completion × recovery window × Iterable cost.
+
+For fixed depression levers, `net_value_of_extension` depends on the three
+axes only through rev_ltv(recovery_months), so the whole grid is six model
+runs plus one broadcast. Grids are cached per set of depression inputs, so
+moving any of the three sliders becomes a lookup.
+"""
+import functools
+
+import numpy as np
+
+from model import INPUT_RANGES, LOSS_INPUTS, on_refresh, recovery_curve, run_totals
+
+
+def _axis(name, step=None):
+    lo, hi, slider_step = INPUT_RANGES[name]
+    step = step or slider_step
+    return np.arange(lo, hi + step / 2, step)
+
+
+COMPLETION_AXIS = _axis("completion_rate")
+RECOVERY_AXIS = _axis("recovery_months").astype(int)
+COST_AXIS = _axis("iterable_cost")
+
+SURFACE_INPUTS = ("arpu",) + tuple(k for k in LOSS_INPUTS if k != "recovery_months")
+SURFACE_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=SURFACE_CACHE_SIZE)
+def _surface(custom_curve, *values):
+    levers = dict(zip(SURFACE_INPUTS, values))
+    rev_ltv = run_totals(
+        **levers, recovery_months=RECOVERY_AXIS, completion_rate=0, iterable_cost=0, custom_curve=custom_curve,
+    )["rev_ltv"].copy()
+    failure_prob = (100 - COMPLETION_AXIS) / 100
+    # net[c, r, k] = rev_ltv[r] · failure_prob[c] − cost[k]
+    net = failure_prob[:, None, None] * rev_ltv[None, :, None] - COST_AXIS[None, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Completion % at which extending stops paying off, per (recovery, cost)
+        boundary = 100 * (1 - COST_AXIS[None, :] / rev_ltv[:, None])
+    for a in (rev_ltv, net, boundary):
+        a.flags.writeable = False
+    return {"rev_ltv": rev_ltv, "net": net, "boundary": boundary}
+
+
+on_refresh(_surface.cache_clear)
+
+
+def breakeven_surface(**inputs):
+    """The cached grid for the depression levers in `inputs`.
+
+    `net` has shape (len(COMPLETION_AXIS), len(RECOVERY_AXIS), len(COST_AXIS)).
+    `boundary` is the breakeven completion rate per (recovery, cost), and
+    `rev_ltv` is the revenue lost per recovery window. `custom_curve` is
+    used if given; other extra keys in `inputs` (the three surface axes) are
+    ignored. The arrays are read-only.
+    """
+    return _surface(recovery_curve(inputs.get("custom_curve")), *(float(inputs[k]) for k in SURFACE_INPUTS))
+
+
+def lookup(surface, completion_rate, recovery_months, iterable_cost):
+    """Net value of extending at one point, by index into the surface.
+
+    Recovery must lie on its slider lattice. Cost may fall between grid
+    points; net value is linear in cost, so it is taken from the nearest cost
+    column and shifted by the remainder. Completion off its lattice (e.g. a
+    simulated one) is linear too, and comes straight from rev_ltv.
+    """
+    r = int(recovery_months) - RECOVERY_AXIS[0]
+    if not 0 <= r < len(RECOVERY_AXIS) or RECOVERY_AXIS[r] != recovery_months:
+        raise ValueError(f"recovery_months {recovery_months} is not on the surface axis")
+    c = int(np.searchsorted(COMPLETION_AXIS, completion_rate))
+    if c >= len(COMPLETION_AXIS) or COMPLETION_AXIS[c] != completion_rate:
+        if not COMPLETION_AXIS[0] <= completion_rate <= COMPLETION_AXIS[-1]:
+            raise ValueError(f"completion_rate {completion_rate} is outside the surface axis")
+        return float((100 - completion_rate) / 100 * surface["rev_ltv"][r] - iterable_cost)
+    k = int(np.clip(np.rint((iterable_cost - COST_AXIS[0]) / (COST_AXIS[1] - COST_AXIS[0])), 0, len(COST_AXIS) - 1))
+    return float(surface["net"][c, r, k] - (iterable_cost - COST_AXIS[k]))
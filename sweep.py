@@ -0,0 +1,309 @@
+"""Exhaustive sweep of the sidebar slider lattice with streaming aggregates.
+
+    python sweep.py --stride 4 --workers 4 -o sweep.json
+    python sweep.py --vary recovery_months,m0_depression,in_signup_depression
+    python sweep.py --max-points 100000000 --chunk-size 200000
+
+Every point of the Cartesian product of the swept sliders (the others held
+at the dashboard defaults, or --set values) is visited once: flat indices
+are cut into fixed-size chunks and decoded to slider positions inside the
+workers, so no point list is ever built. Each worker folds its chunks into
+its own row of a multiprocessing.shared_memory buffer:
+
+- count, sum, min and max of rev_ltv
+- a log-bucketed quantile sketch of rev_ltv, every quantile within
+  SKETCH_ACCURACY relative error (buckets merge by addition)
+- how many points recommend Extend, overall and per value of each slider
+
+The parent merges the rows at the end. Memory is fixed by chunk size and
+sketch width, however many points are swept.
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import math
+import multiprocessing
+import multiprocessing.shared_memory
+import sys
+import time
+
+import numpy as np
+
+import model
+
+
+# The sliders the sweep walks by default: the depression levers, activation
+# baselines and the recovery window
+SWEEP_INPUTS = (
+    "in_signup_depression", "oon_embed_signup_depression", "m0_activation_base", "m1_plus_uplift",
+    "m0_depression", "m1_plus_depression", "active_rescue_depression", "inactive_rescue_depression",
+    "repeat_depression_bps", "recovery_months",
+)
+DEFAULT_CHUNK_SIZE = 100_000
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+HIST_BINS = 60
+
+# Sketch: bucket k of |x| covers (γ^(k-1), γ^k]; |x| below SKETCH_MIN counts as zero
+SKETCH_ACCURACY = 0.005
+SKETCH_MIN = 1.0
+SKETCH_MAX = 1e13
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_N_POS = int(math.ceil(math.log(SKETCH_MAX / SKETCH_MIN) / _LOG_GAMMA)) + 1
+SKETCH_WIDTH = 2 * _N_POS + 1  # negatives (most negative first), zero, positives
+
+# Columns of one accumulator row
+COUNT, SUM, MIN, MAX, EXTEND = range(5)
+_HEAD = 5
+
+_state = {}  # per-process sweep layout and accumulator row, set by _init()
+
+
+def axes(names=SWEEP_INPUTS, stride=1):
+    """{name: slider values}, every `stride`-th lattice point (ends always kept)."""
+    out = {}
+    for name in names:
+        lo, hi, step = model.INPUT_RANGES[name]
+        values = np.round(lo + step * np.arange(int(round((hi - lo) / step)) + 1), 10)
+        keep = values[::stride]
+        out[name] = keep if keep[-1] == values[-1] else np.append(keep, values[-1])
+    return out
+
+
+def n_points(sweep_axes):
+    return math.prod(len(v) for v in sweep_axes.values())
+
+
+def _layout(sweep_axes):
+    sizes = [len(v) for v in sweep_axes.values()]
+    offsets = np.cumsum([_HEAD] + sizes)
+    marginal = int(offsets[-1] - _HEAD)
+    width = _HEAD + 2 * marginal + SKETCH_WIDTH  # marginal Extend counts, marginal counts, sketch
+    return offsets[:-1], marginal, width
+
+
+def _new_rows(n_rows, width):
+    rows = np.zeros((n_rows, width))
+    rows[:, MIN], rows[:, MAX] = np.inf, -np.inf
+    return rows
+
+
+# ── Sketch ──────────────────────────────────────────────────────────────────
+def sketch_index(x):
+    """Sketch bucket of each value, in sorted order (most negative first)."""
+    a = np.abs(x)
+    k = np.ceil(np.log(np.maximum(a, SKETCH_MIN) / SKETCH_MIN) / _LOG_GAMMA).astype(np.intp)
+    k = np.minimum(k, _N_POS - 1)
+    return np.where(a < SKETCH_MIN, _N_POS, np.where(x > 0, _N_POS + 1 + k, _N_POS - 1 - k))
+
+
+def sketch_values():
+    """Representative value of every sketch bucket (within SKETCH_ACCURACY of its members)."""
+    pos = SKETCH_MIN * 2 * _GAMMA ** np.arange(_N_POS) / (_GAMMA + 1)
+    return np.concatenate([-pos[::-1], [0.0], pos])
+
+
+def sketch_quantiles(counts, qs=QUANTILES):
+    cum = np.cumsum(counts)
+    ranks = np.searchsorted(cum, np.asarray(qs) * cum[-1], side="left")
+    return sketch_values()[np.minimum(ranks, len(counts) - 1)]
+
+
+# ── Workers ─────────────────────────────────────────────────────────────────
+def _init(shm_name, shape, slots, sweep_axes, fixed):
+    offsets, marginal, width = _layout(sweep_axes)
+    if shm_name is None:
+        rows = _new_rows(1, width)
+        slot = 0
+    else:
+        shm = multiprocessing.shared_memory.SharedMemory(name=shm_name)
+        rows = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        slot = slots.get()
+        _state["shm"] = shm
+    _state.update(
+        rows=rows, row=rows[slot], axes=sweep_axes, fixed=fixed,
+        shape=tuple(len(v) for v in sweep_axes.values()), offsets=offsets, marginal=marginal,
+    )
+
+
+def _sweep_chunk(start, stop):
+    """Evaluate lattice points [start, stop) and fold them into this worker's row."""
+    s = _state
+    digits = np.unravel_index(np.arange(start, stop), s["shape"])
+    batch = dict(s["fixed"])
+    for (name, values), d in zip(s["axes"].items(), digits):
+        batch[name] = values[d]
+    out = model.run_totals(**batch)
+    n = stop - start
+    rev = np.broadcast_to(out["rev_ltv"], (n,))
+    extend = np.broadcast_to(out["extend"], (n,)).astype(float)
+
+    row, m = s["row"], s["marginal"]
+    row[COUNT] += n
+    row[SUM] += rev.sum()
+    row[MIN] = min(row[MIN], rev.min())
+    row[MAX] = max(row[MAX], rev.max())
+    row[EXTEND] += extend.sum()
+    for off, d, size in zip(s["offsets"], digits, s["shape"]):
+        row[off:off + size] += np.bincount(d, weights=extend, minlength=size)
+        row[off + m:off + m + size] += np.bincount(d, minlength=size)
+    row[_HEAD + 2 * m:] += np.bincount(sketch_index(rev), minlength=SKETCH_WIDTH)
+    return n
+
+
+# ── Driver ──────────────────────────────────────────────────────────────────
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+def summarize(row, sweep_axes):
+    """Merged accumulator row -> JSON-friendly summary."""
+    offsets, m, _ = _layout(sweep_axes)
+    count = int(row[COUNT])
+    sketch = row[_HEAD + 2 * m:]
+    values = sketch_values()
+    used = sketch > 0
+    # Bucket values sit within SKETCH_ACCURACY of their members; clip the outer ones onto the range
+    hist = (np.histogram(np.clip(values[used], row[MIN], row[MAX]), bins=HIST_BINS,
+                         range=(row[MIN], row[MAX]), weights=sketch[used])
+            if count else (np.zeros(0), np.zeros(0)))
+    marginal = {}
+    for (name, vals), off in zip(sweep_axes.items(), offsets):
+        ext, cnt = row[off:off + len(vals)], row[off + m:off + m + len(vals)]
+        share = [e / c if c else None for e, c in zip(ext.tolist(), cnt.tolist())]  # None: not reached
+        marginal[name] = {"values": vals.tolist(), "extend_share": share}
+    return {
+        "points": count,
+        "extend_share": row[EXTEND] / count if count else None,
+        "rev_ltv": {
+            "mean": row[SUM] / count if count else None,
+            "min": float(row[MIN]) if count else None,
+            "max": float(row[MAX]) if count else None,
+            "quantiles": dict(zip(map(str, QUANTILES), sketch_quantiles(sketch).tolist())) if count else {},
+            "histogram": {"counts": hist[0].astype(np.int64).tolist(), "edges": hist[1].tolist()},
+        },
+        "extend_share_by_input": marginal,
+    }
+
+
+def run(sweep_axes=None, inputs=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, max_points=None, progress=None):
+    """Sweep the lattice of `sweep_axes` (default: axes()) around `inputs` (default: the defaults).
+
+    Visits the first `max_points` lattice points when given. `progress` is
+    called with the number of points done after each chunk. Returns
+    summarize() of the merged rows plus timing.
+    """
+    sweep_axes = axes() if sweep_axes is None else sweep_axes
+    unknown = set(sweep_axes) - set(model.INPUT_NAMES)
+    if unknown:
+        raise ValueError(f"unknown inputs: {', '.join(sorted(unknown))}")
+    if chunk_size < 1 or workers < 1:
+        raise ValueError("chunk_size and workers must be at least 1")
+    fixed = {k: float(v) for k, v in dict(model.DEFAULT_INPUTS if inputs is None else inputs).items()
+             if k not in sweep_axes}
+    total = n_points(sweep_axes)
+    total = total if max_points is None else min(total, int(max_points))
+    _, _, width = _layout(sweep_axes)
+    started = time.perf_counter()
+    done = 0
+
+    if workers == 1:
+        _init(None, None, None, sweep_axes, fixed)
+        for start, stop in _chunks(total, chunk_size):
+            done += _sweep_chunk(start, stop)
+            if progress:
+                progress(done)
+        merged = _state["row"]
+    else:
+        shm = multiprocessing.shared_memory.SharedMemory(create=True, size=workers * width * 8)
+        try:
+            rows = np.ndarray((workers, width), dtype=float, buffer=shm.buf)
+            rows[:] = _new_rows(workers, width)
+            ctx = multiprocessing.get_context()
+            slots = ctx.Queue()
+            for i in range(workers):
+                slots.put(i)
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=ctx, initializer=_init,
+                initargs=(shm.name, rows.shape, slots, sweep_axes, fixed),
+            ) as pool:
+                # At most 2 chunks per worker in flight, so the queue stays bounded too
+                pending = collections.deque()
+                for start, stop in _chunks(total, chunk_size):
+                    pending.append(pool.submit(_sweep_chunk, start, stop))
+                    if len(pending) >= 2 * workers:
+                        done += pending.popleft().result()
+                        if progress:
+                            progress(done)
+                while pending:
+                    done += pending.popleft().result()
+                    if progress:
+                        progress(done)
+            merged = rows.sum(axis=0)
+            merged[MIN], merged[MAX] = rows[:, MIN].min(), rows[:, MAX].max()
+        finally:
+            del rows
+            shm.close()
+            shm.unlink()
+
+    seconds = time.perf_counter() - started
+    out = summarize(merged, sweep_axes)
+    out.update(lattice_points=n_points(sweep_axes), seconds=seconds, points_per_s=done / seconds if seconds else None)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the slider lattice of the Braze migration risk model.")
+    parser.add_argument("--vary", help=f"comma-separated inputs to sweep (default: {','.join(SWEEP_INPUTS)})")
+    parser.add_argument("--stride", type=int, default=1, help="take every n-th slider position (default 1)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="fix a non-swept input")
+    parser.add_argument("--max-points", type=float, help="stop after this many lattice points")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default 1: in-process)")
+    parser.add_argument("-o", "--output", default="-", help="summary JSON file, or - for stdout (default)")
+    args = parser.parse_args(argv)
+    if args.stride < 1:
+        parser.error("--stride must be at least 1")
+
+    names = tuple(args.vary.split(",")) if args.vary else SWEEP_INPUTS
+    inputs = dict(model.DEFAULT_INPUTS)
+    try:
+        for item in args.set:
+            k, _, v = item.partition("=")
+            if k not in inputs:
+                raise ValueError(f"unknown input {k!r}")
+            inputs[k] = float(v)
+        sweep_axes = axes(names, args.stride)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+    total = n_points(sweep_axes)
+    target = total if args.max_points is None else min(total, int(args.max_points))
+    print(f"{total:,} lattice points; sweeping {target:,}", file=sys.stderr)
+
+    last = [0.0]
+
+    def progress(done):
+        now = time.perf_counter()
+        if now - last[0] > 2:
+            last[0] = now
+            print(f"  {done:,} / {target:,}", file=sys.stderr)
+
+    try:
+        result = run(sweep_axes, inputs, args.chunk_size, args.workers, args.max_points, progress)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    text = json.dumps(result, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(f"{result['points']:,} points in {result['seconds']:.1f}s ({result['points_per_s']:,.0f}/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+import batch
+
+
+CSV = "id,completion_rate,migration_month\na,50,1\n\nb,abc,1\nc,60,99\n\nd,70,2\n"
+
+
+def _run(text, fmt="csv", **kwargs):
+    out, err = io.StringIO(), io.StringIO()
+    counts = batch.run(io.StringIO(text), out, fmt, "csv", stream_err=err, **kwargs)
+    return counts, out.getvalue().splitlines()[1:], err.getvalue().splitlines()
+
+
+def test_abort_names_the_physical_line():
+    with pytest.raises(ValueError, match=r"^line 4: completion_rate='abc'"):
+        _run(CSV)
+
+
+def test_model_errors_name_their_line():
+    text = "id,migration_month\na,1\n\n\nb,99\n"
+    with pytest.raises(ValueError, match=r"^line 5: migration_month"):
+        _run(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+def test_log_skips_bad_rows_and_keeps_the_rest_in_order(chunk_size):
+    counts, rows, errors = _run(CSV, on_error="log", chunk_size=chunk_size)
+    assert counts == (2, 2)
+    assert [r.split(",")[0] for r in rows] == ["a", "d"]
+    assert [e.split(":")[0] for e in errors] == ["skipped line 4", "skipped line 5"]
+
+
+def test_skip_is_silent():
+    counts, rows, errors = _run(CSV, on_error="skip")
+    assert counts == (2, 2) and len(rows) == 2 and errors == []
+
+
+def test_good_rows_match_a_clean_run():
+    _, skipped, _ = _run(CSV, on_error="skip")
+    _, clean, _ = _run("id,completion_rate,migration_month\na,50,1\nd,70,2\n")
+    assert skipped == clean
+
+
+def test_jsonl_errors_name_their_line():
+    text = '{"id": "a"}\n\n[1]\n{"zz": 1}\n{"id": "b"}\n'
+    counts, rows, errors = _run(text, "jsonl", on_error="log")
+    assert counts == (2, 2)
+    assert errors == ["skipped line 3: expected a JSON object", "skipped line 4: unknown inputs: zz"]
+
+
+def test_unknown_csv_column_aborts_regardless():
+    with pytest.raises(ValueError, match=r"^line 1: unknown inputs: zz"):
+        _run("id,zz\na,1\n", on_error="skip")
+
+
+@pytest.mark.parametrize("text, fmt, match", [
+    ("id,completion_rate\na,500\n", "csv", r"^line 2: completion_rate='500' must be in \[0, 100\]"),
+    ("id,completion_rate\na,nan\n", "csv", r"^line 2: completion_rate='nan' must be in"),
+    ("id,arpu\na,inf\n", "csv", r"^line 2: arpu='inf' must be in"),
+    ('{"completion_rate": 500}\n', "jsonl", r"^line 1: completion_rate=500 must be in"),
+    ('{"completion_rate": NaN}\n', "jsonl", r"^line 1: completion_rate=nan must be in"),
+    ('{"completion_rate": {"x": 1}}\n', "jsonl", r"^line 1: completion_rate=\{'x': 1\} is not a number"),
+    ('{"arpu": [3]}\n', "jsonl", r"^line 1: arpu=\[3\] is not a number"),
+    ('{"arpu": true}\n', "jsonl", r"^line 1: arpu=True is not a number"),
+])
+def test_out_of_range_and_non_numeric_values_are_row_errors(text, fmt, match):
+    with pytest.raises(ValueError, match=match):
+        _run(text, fmt)
+    # The same rows are skipped, not fatal, with --on-error skip
+    good = '{"id": "ok"}\n' if fmt == "jsonl" else "ok,\n"  # the blank cell takes the default
+    counts, rows, _ = _run(text + good, fmt, on_error="skip")
+    assert counts == (1, 1) and rows[0].startswith("ok,")
@@ -0,0 +1,82 @@
+import concurrent.futures
+import os
+import shutil
+
+import pytest
+
+import data
+import model
+
+
+def _signups(months):
+    return {"month": list(months), "in_signups": [1.0] * len(months), "oon_embed_signups": [1.0] * len(months)}
+
+
+def test_months_run_in_calendar_order_from_february():
+    months = data.CALENDAR_MONTHS[1:] + data.CALENDAR_MONTHS[:1]
+    cols = data.validate("signups", _signups(months))
+    assert cols["month"][-1] == "Jan"
+
+
+@pytest.mark.parametrize("months", [["Mar", "Apr"], ["Feb", "Apr"], ["Feb", "March"], ["feb", "mar"]])
+def test_months_out_of_order_are_rejected(months):
+    with pytest.raises(ValueError, match="calendar months"):
+        data.validate("signups", _signups(months))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    shutil.copytree(data.DATA_DIR, tmp_path, dirs_exist_ok=True)
+    yield tmp_path
+    model.refresh()
+
+
+def _edit(path, old, new):
+    text = path.read_text().replace(old, new)
+    path.write_text(text)
+    # Make sure the stamp moves even on coarse mtime clocks
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_refresh_keeps_last_good_data_on_error(data_dir):
+    before = model.current()
+    _edit(data_dir / "signups.csv", "Apr,", "April,")
+    with pytest.raises(ValueError, match="calendar months"):
+        model.refresh(data_dir)
+    assert model.current() is before
+
+
+def test_concurrent_refresh_swaps_once(data_dir):
+    before = model.current()
+    _edit(data_dir / "populations.json", "0.2591", "0.2592")
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        changed = list(pool.map(lambda _: model.refresh(data_dir), range(16)))
+    assert changed.count(True) == 1
+    after = model.current()
+    assert after is not before and after.active_rescue_rate == 0.2592
+    assert model.evaluate(**model.DEFAULT_INPUTS)["rev_ltv"] == pytest.approx(
+        float(model.run_totals(**model.DEFAULT_INPUTS)["rev_ltv"][0]))
+
+
+@pytest.mark.parametrize("old, new", [("Apr,", "Apr,1,"), ("Apr,89865,", "Apr,")])
+def test_ragged_csv_rows_are_value_errors(data_dir, old, new):
+    before = model.current()
+    _edit(data_dir / "signups.csv", old, new)
+    with pytest.raises(ValueError, match="line 4"):
+        model.refresh(data_dir)
+    assert model.current() is before
+
+
+def test_cache_keys_carry_the_data_version(data_dir):
+    import scenario_cache
+
+    old = model.current()
+    _edit(data_dir / "populations.json", "0.2591", "0.2592")
+    model.refresh(data_dir)
+    new = model.current()
+    assert scenario_cache.key(model.DEFAULT_INPUTS, old) != scenario_cache.key(model.DEFAULT_INPUTS, new)
+    assert scenario_cache.key(model.DEFAULT_INPUTS) == scenario_cache.key(model.DEFAULT_INPUTS, new)
+    # A session finishing on the old snapshot stores under the old version only
+    scenario_cache.put(scenario_cache.key(model.DEFAULT_INPUTS, old), model.evaluate(**model.DEFAULT_INPUTS, data=old))
+    assert scenario_cache.get(scenario_cache.key(model.DEFAULT_INPUTS)) is None
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import extension
+
+
+def test_completion_pmf_bins_a_uniform_spec():
+    values, weights = extension.completion_pmf(("uniform", 20.0, 50.0, 80.0))
+    assert values.tolist() == list(range(20, 81))
+    assert weights.sum() == pytest.approx(1.0)
+    # Rounding to whole percents gives the end bins half the mass of the inner ones
+    expected = np.full(61, 1 / 60)
+    expected[[0, -1]] = 1 / 120
+    np.testing.assert_allclose(weights, expected, atol=0.003)
+
+
+def test_solve_matches_brute_force():
+    rng = np.random.default_rng(0)
+    ltv_rev = rng.uniform(-2e6, 0, 5)
+    prices = rng.uniform(1e5, 4e5, 5)
+    values, weights = extension.completion_pmf(("triangular", 10.0, 60.0, 95.0), n_samples=5_000)
+    out = extension.solve(ltv_rev, prices, values, weights)
+    for t, threshold in enumerate(out["thresholds"]):
+        extend = values <= threshold
+        for k in range(6):
+            cost = prices[:k].sum() * weights[extend].sum()
+            avoided = (weights[extend] * (100 - values[extend]) / 100).sum() * np.abs(ltv_rev[:k]).sum()
+            assert out["expected_net"][t, k] == pytest.approx(avoided - cost, rel=1e-9, abs=1e-6)
+    assert out["best"]["expected_net"] == pytest.approx(out["expected_net"].max())
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import microsim
+import model
+
+DEPRESSIONS = (0.0, 0.25, 0.5, 0.75, 0.95, 1.0)
+
+
+def _inputs(depression):
+    return {**model.DEFAULT_INPUTS, "active_rescue_depression": depression, "inactive_rescue_depression": depression}
+
+
+@pytest.mark.parametrize("eff", np.linspace(0, 1, 21))
+def test_depression_scale_keeps_weighted_mean(eff):
+    pop = microsim.population(0)
+    sensitivity = microsim._sensitivity(microsim.GROUP_FLAGS)
+    for mass in pop["mass"]:
+        c = microsim._depression_scale(mass, sensitivity, eff)
+        multiplier = np.maximum(0, 1 - c * sensitivity)
+        assert (multiplier >= 0).all() and (multiplier <= 1).all()
+        assert (mass * multiplier).sum() == pytest.approx(eff * mass.sum(), rel=1e-6)
+
+
+def test_propensity_averages_to_rescue_rate():
+    pop = microsim.population(0)
+    for seg, rate in ((microsim.ACTIVE, model.active_rescue_rate), (microsim.INACTIVE, model.inactive_rescue_rate)):
+        p = pop["propensity"][pop["segment"] == seg].astype(np.float64)
+        assert p.max() <= 1
+        assert p.mean() == pytest.approx(rate, rel=1e-5)
+
+
+@pytest.mark.parametrize("depression", DEPRESSIONS)
+def test_independent_months_match_closed_form(depression):
+    res = microsim.simulate(_inputs(depression))
+    for k, diff in res["relative_difference"].items():
+        assert abs(diff) < 0.03, (k, diff)
+
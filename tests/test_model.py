@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import model
+
+
+def _custom(curve, **shapes):
+    return {**model.DEFAULT_INPUTS, **shapes, "custom_curve": curve}
+
+
+def test_custom_curve_matching_linear_reproduces_linear():
+    # Linear progress is m / R, which the curve 0, 1/4, 2/4, 3/4 stretches to for any window
+    inputs = _custom((0, 0.25, 0.5, 0.75), **{k: model.CUSTOM_SHAPE for k in model.SHAPE_INPUTS})
+    expected = model.run_totals(**model.DEFAULT_INPUTS)["rev_ltv"]
+    assert model.run_totals(**inputs)["rev_ltv"] == pytest.approx(expected, rel=1e-12)
+    assert model.run_scenarios(**inputs)["rev_ltv"] == pytest.approx(expected, rel=1e-12)
+    assert model.evaluate(**inputs)["rev_ltv"] == pytest.approx(expected[0], rel=1e-12)
+
+
+def test_custom_curves_stay_per_scenario():
+    shapes = dict(model.INPUT_RANGES)
+    fast = model.run_totals(**_custom((0, 0.9), rescue_recovery_shape=model.CUSTOM_SHAPE))
+    slow = model.run_totals(**_custom((0, 0.1), rescue_recovery_shape=model.CUSTOM_SHAPE))
+    assert abs(fast["total_rescue_bp_loss"][0]) < abs(slow["total_rescue_bp_loss"][0])
+    assert model.INPUT_RANGES == shapes
+    assert model.RECOVERY_SHAPES == ("linear", "exponential", "logistic", "step")
+
+
+def test_custom_shape_needs_a_curve():
+    with pytest.raises(ValueError, match="custom_curve"):
+        model.run_totals(**{**model.DEFAULT_INPUTS, "repeat_recovery_shape": model.CUSTOM_SHAPE})
+
+
+@pytest.mark.parametrize("curve", [(), (0, 1.5), (-0.1,)])
+def test_recovery_curve_rejects_bad_values(curve):
+    with pytest.raises(ValueError):
+        model.recovery_curve(curve)
+
+
+def _lattice(n, seed, **fixed):
+    """`n` scenarios drawn from every input's slider lattice, with `fixed` inputs held."""
+    rng = np.random.default_rng(seed)
+    out = {}
+    for k in model.INPUT_NAMES:
+        lo, hi, step = model.INPUT_RANGES[k]
+        out[k] = np.round(lo + step * rng.integers(0, int(round((hi - lo) / step)) + 1, n), 10)
+    return {**out, **fixed}
+
+
+def _baseline(p, d):
+    """The original dashboard's per-month loop for one scenario (linear recovery only)."""
+    R, start = int(p["recovery_months"]), int(p["migration_month"])
+    in_su = list(d.in_signups_all[start:start + R])
+    oon_su = list(d.oon_embed_signups_all[start:start + R])
+    while len(in_su) < R:
+        in_su.append(in_su[-1])
+        oon_su.append(oon_su[-1])
+    act = active = inactive = repeat = 0.0
+    for mi in range(R):
+        rp = 0.0 if R == 1 else mi / R
+        eff = {k: p[k] + (1.0 - p[k]) * rp for k in (
+            "in_signup_depression", "oon_embed_signup_depression", "m0_depression", "m1_plus_depression",
+            "active_rescue_depression", "inactive_rescue_depression")}
+        eff_in, eff_oon = in_su[mi] * eff["in_signup_depression"], oon_su[mi] * eff["oon_embed_signup_depression"]
+        m0, m1 = p["m0_activation_base"], p["m1_plus_uplift"]
+        act += (eff_in * m0 * eff["m0_depression"] - in_su[mi] * m0
+                + eff_oon * m0 * eff["m0_depression"] - oon_su[mi] * m0
+                + eff_in * m1 * eff["m1_plus_depression"] - in_su[mi] * m1
+                + eff_oon * m1 * eff["m1_plus_depression"] - oon_su[mi] * m1)
+        growth = (1 + model.GROWTH_RATE) ** (start + mi)
+        active += d.active_users_feb * growth * d.active_rescue_rate * (eff["active_rescue_depression"] - 1)
+        inactive += d.inactive_users_feb * growth * d.inactive_rescue_rate * (eff["inactive_rescue_depression"] - 1)
+        repeat -= d.bp_prev_month_feb * growth * p["repeat_depression_bps"] * (1.0 - rp) / 10000
+    m = d.ltv_mults
+    rev_ltv = p["arpu"] * (abs(act) * m["ltv_mult_act"] + abs(active) * m["ltv_mult_active_resc"]
+                           + abs(inactive) * m["ltv_mult_inactive_resc"] + abs(repeat) * m["ltv_mult_repeat"])
+    return {
+        "total_activation_bp_loss": act, "total_active_rescue_loss": active,
+        "total_inactive_rescue_loss": inactive, "total_repeat_bp_loss": repeat,
+        "rev_in_month": abs(act + active + inactive + repeat) * p["arpu"], "rev_ltv": rev_ltv,
+        "net_value_of_extension": abs(rev_ltv * (100 - p["completion_rate"]) / 100) - p["iterable_cost"],
+    }
+
+
+def test_engine_matches_the_baseline_loop():
+    linear = {k: 0 for k in model.SHAPE_INPUTS}
+    x = _lattice(300, seed=1, **linear)
+    out = model.run_scenarios(**x)
+    d = model.current()
+    for i in range(300):
+        expected = _baseline({k: float(np.broadcast_to(v, (300,))[i]) for k, v in x.items()}, d)
+        for k, v in expected.items():
+            assert out[k][i] == pytest.approx(v, rel=1e-12, abs=1e-6), (i, k)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_run_totals_match_run_scenarios(seed):
+    x = _lattice(2000, seed)
+    totals, full = model.run_totals(**x), model.run_scenarios(**x)
+    for k, v in totals.items():
+        expected = full[k].sum(axis=1) if k == "total_signup_loss" else full[k]
+        if v.dtype == bool:
+            assert (v == expected).mean() > 0.999, k  # ties at the breakeven can flip
+        else:
+            np.testing.assert_allclose(v, expected, rtol=1e-10, atol=1e-6, err_msg=k)
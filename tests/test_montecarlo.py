@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+import montecarlo
+
+
+def test_recentre_moves_bounds_with_the_mode():
+    spec = montecarlo.default_spec("active_rescue_depression", 0.95)
+    kind, low, mode, high = montecarlo.recentre("active_rescue_depression", spec, 0.6)
+    assert (kind, mode) == (spec[0], 0.6)
+    assert (low, high) == pytest.approx((spec[1] - 0.35, spec[3] - 0.35))
+    draws = montecarlo.sample((kind, low, mode, high), 100_000, np.random.default_rng(0))
+    assert low <= draws.min() and draws.max() <= high
+    assert draws.mean() == pytest.approx((low + mode + high) / 3, abs=1e-3)
+
+
+def test_recentre_stays_within_slider_range():
+    spec = ("uniform", 40.0, 50.0, 60.0)
+    assert montecarlo.recentre("completion_rate", spec, 95.0) == ("uniform", 85.0, 95.0, 100.0)
+    assert montecarlo.recentre("completion_rate", spec, 2.0) == ("uniform", 0.0, 2.0, 12.0)
@@ -0,0 +1,58 @@
+import gc
+import threading
+import tracemalloc
+
+import perf
+
+
+def _session(name, barrier, results, errors):
+    try:
+        perf.start()
+        perf.trace()
+        for section in range(3):
+            perf.mark(f"{name}{section}")
+            barrier.wait()
+            with perf.span(f"{name}-span", "model") as args:
+                args["bytes"] = section
+                barrier.wait()
+            barrier.wait()
+        results[name] = perf.finish()
+    except Exception as e:  # surfaced by the assertion below
+        errors.append(e)
+        barrier.abort()
+
+
+def test_concurrent_traced_runs_stay_apart():
+    barrier, results, errors = threading.Barrier(2), {}, []
+    threads = [threading.Thread(target=_session, args=(n, barrier, results, errors)) for n in "ab"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    for name, run in results.items():
+        assert [s for s, _ in run.sections] == [f"{name}{i}" for i in range(3)]
+        names = {e["name"] for e in run.events}
+        assert names == {f"{name}{i}" for i in range(3)} | {f"{name}-span"}
+    assert not tracemalloc.is_tracing()
+
+
+def test_abandoned_run_releases_tracemalloc():
+    def interrupted():
+        perf.start()
+        perf.trace()
+        perf.mark("section")  # never finished, like a rerun stopping the script
+
+    t = threading.Thread(target=interrupted)
+    t.start()
+    t.join()
+    del t
+    gc.collect()
+    assert not tracemalloc.is_tracing()
+
+
+def test_finish_without_timing_returns_none(monkeypatch):
+    monkeypatch.setattr(perf, "_enabled", False)
+    perf.start()
+    perf.mark("section")
+    assert perf.finish() is None
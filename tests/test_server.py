@@ -0,0 +1,67 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import model
+import server
+
+
+@pytest.fixture(scope="module")
+def post():
+    srv = server.serve(port=0, quiet=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+    def post(path, body):
+        conn = http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=30)
+        try:
+            conn.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            return resp.status, json.loads(resp.read())
+        finally:
+            conn.close()
+
+    yield post
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_defaults_are_accepted():
+    cols = server.columns([{}, dict(model.DEFAULT_INPUTS)])
+    assert all(v.shape == (2,) for v in cols.values())
+
+
+@pytest.mark.parametrize("k", model.INPUT_NAMES)
+def test_range_ends_are_accepted(k):
+    lo, hi, _ = model.INPUT_RANGES[k]
+    cols = server.columns([{k: lo}, {k: hi}])
+    assert cols[k].tolist() == [lo, hi]
+
+
+@pytest.mark.parametrize("scenario, match", [
+    ({"completion_rate": 500}, "must be in"),
+    ({"completion_rate": -5}, "must be in"),
+    ({"arpu": 0.5}, "must be in"),
+    ({"arpu": True}, "must be a number"),
+    ({"arpu": "3"}, "must be a number"),
+    ({"arpu": None}, "must be a number"),
+    ({"arpu": float("nan")}, "must be in"),
+])
+def test_bad_values_are_rejected(scenario, match):
+    with pytest.raises(ValueError, match=match):
+        server.columns([scenario])
+
+
+@pytest.mark.parametrize("path", ["/scenario", "/batch"])
+@pytest.mark.parametrize("scenario", [{"completion_rate": 500}, {"arpu": True}, {"arpu": "3"}])
+def test_bad_values_are_400(post, path, scenario):
+    body = scenario if path == "/scenario" else {"scenarios": [{}, scenario]}
+    status, out = post(path, body)
+    assert status == 400
+    assert "arpu" in out["error"] or "completion_rate" in out["error"]
+
+
+def test_batch_error_names_the_scenario(post):
+    status, out = post("/batch", {"scenarios": [{}, {}, {"arpu": 1000}]})
+    assert status == 400 and out["error"].startswith("scenario 2:")
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import sobol
+
+
+A, B = 7.0, 0.1
+
+
+def _ishigami(x1, x2, x3, **_):
+    return {"rev_ltv": np.sin(x1) + A * np.sin(x2) ** 2 + B * x3 ** 4 * np.sin(x1)}
+
+
+def test_ishigami_indices(monkeypatch):
+    # Closed-form indices of sin x1 + a·sin² x2 + b·x3⁴·sin x1 on [-π, π]³
+    v1 = 0.5 * (1 + B * np.pi ** 4 / 5) ** 2
+    v2 = A ** 2 / 8
+    v13 = B ** 2 * np.pi ** 8 * (1 / 18 - 1 / 50)
+    var = v1 + v2 + v13
+    monkeypatch.setattr(sobol, "run_totals", _ishigami)
+    names = ("x1", "x2", "x3")
+    out = sobol.sobol_indices(inputs={}, names=names, bounds={k: (-np.pi, np.pi) for k in names}, n=2 ** 14)
+    assert out["variance"] == pytest.approx(var, rel=0.02)
+    np.testing.assert_allclose(out["S1"], [v1 / var, v2 / var, 0.0], atol=0.01)
+    np.testing.assert_allclose(out["ST"], [(v1 + v13) / var, v2 / var, v13 / var], atol=0.01)
+
+
+def test_chunking_does_not_change_the_indices():
+    names = ("recovery_months", "m0_depression", "arpu")
+    whole = sobol.sobol_indices(names=names, n=2 ** 10, chunk_rows=2 ** 10)
+    chunked = sobol.sobol_indices(names=names, n=2 ** 10, chunk_rows=100)
+    np.testing.assert_allclose(chunked["S1"], whole["S1"], rtol=1e-9)
+    np.testing.assert_allclose(chunked["ST"], whole["ST"], rtol=1e-9)
@@ -0,0 +1,51 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import model
+import sweep
+
+
+NAMES = ("recovery_months", "m0_depression", "active_rescue_depression", "repeat_depression_bps")
+
+
+def _exact(sweep_axes):
+    grid = list(itertools.product(*sweep_axes.values()))
+    cols = dict(zip(sweep_axes, np.array(grid).T))
+    return model.run_totals(**{**model.DEFAULT_INPUTS, **cols})
+
+
+@pytest.fixture(scope="module")
+def lattice():
+    sweep_axes = sweep.axes(NAMES, stride=2)
+    return sweep_axes, sweep.run(sweep_axes, chunk_size=997), _exact(sweep_axes)
+
+
+def test_quantiles_within_sketch_accuracy(lattice):
+    _, out, exact = lattice
+    qs = np.array(sweep.QUANTILES)
+    expected = np.quantile(exact["rev_ltv"], qs, method="inverted_cdf")
+    got = np.array([out["rev_ltv"]["quantiles"][str(q)] for q in sweep.QUANTILES])
+    np.testing.assert_allclose(got, expected, rtol=sweep.SKETCH_ACCURACY)
+
+
+def test_moments_and_extend_shares_are_exact(lattice):
+    sweep_axes, out, exact = lattice
+    rev = exact["rev_ltv"]
+    assert out["points"] == rev.size == sweep.n_points(sweep_axes)
+    assert out["rev_ltv"]["mean"] == pytest.approx(rev.mean(), rel=1e-12)
+    assert (out["rev_ltv"]["min"], out["rev_ltv"]["max"]) == (rev.min(), rev.max())
+    assert out["extend_share"] == pytest.approx(exact["extend"].mean(), rel=1e-12)
+    months = np.array(list(itertools.product(*sweep_axes.values())))[:, 0]
+    by_month = [exact["extend"][months == v].mean() for v in sweep_axes["recovery_months"]]
+    assert out["extend_share_by_input"]["recovery_months"]["extend_share"] == pytest.approx(by_month, rel=1e-12)
+
+
+def test_workers_merge_to_the_same_summary(lattice):
+    sweep_axes, out, _ = lattice
+    parallel = sweep.run(sweep_axes, chunk_size=997, workers=2)
+    assert parallel["points"] == out["points"]
+    assert parallel["rev_ltv"]["quantiles"] == out["rev_ltv"]["quantiles"]
+    assert parallel["rev_ltv"]["mean"] == pytest.approx(out["rev_ltv"]["mean"], rel=1e-12)
+    assert parallel["extend_share_by_input"] == out["extend_share_by_input"]
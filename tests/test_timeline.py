@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import model
+import timeline
+
+
+def _reference(losses, kernels, horizon, weights):
+    """(G, n, horizon) by np.convolve, one group and scenario at a time."""
+    out = np.zeros(losses.shape[:2] + (horizon,))
+    for g, kernel in enumerate(kernels):
+        for i, series in enumerate(losses[g]):
+            full = np.convolve(series, kernel)[:horizon]
+            out[g, i, :len(full)] = full
+    return out * weights
+
+
+@pytest.mark.parametrize("n_cohorts, n_ages, horizon", [
+    (6, 13, 18),  # dashboard shape: banded matmul
+    (6, 13, 10),  # horizon cut inside the window
+    (timeline.FFT_MIN_LENGTH, 200, 327),  # FFT, full length
+    (300, timeline.FFT_MIN_LENGTH, 150),  # FFT, cut
+])
+@pytest.mark.parametrize("by_group", [True, False])
+def test_convolution_matches_np_convolve(n_cohorts, n_ages, horizon, by_group):
+    rng = np.random.default_rng(n_cohorts + n_ages)
+    losses = rng.uniform(0, 1e5, (len(timeline.GROUPS), 3, n_cohorts))
+    kernels = rng.uniform(0, 1, (len(timeline.GROUPS), n_ages))
+    weights = timeline.discount_factors(horizon, 0.08)
+    expected = _reference(losses, kernels, horizon, weights)
+    got = timeline._convolve(losses, kernels, horizon, weights, by_group)
+    np.testing.assert_allclose(got, expected if by_group else expected.sum(axis=0), rtol=1e-9, atol=1e-6)
+
+
+def test_undiscounted_total_is_rev_ltv():
+    x = {**model.DEFAULT_INPUTS, "recovery_months": np.arange(1, 7)}
+    cols = model.run_scenarios(**x)
+    out = timeline.revenue_timeline(cols, x["arpu"])
+    np.testing.assert_allclose(out["total"], cols["rev_ltv"], rtol=1e-12)
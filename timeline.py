@@ -0,0 +1,141 @@
+"""Calendar-month revenue-loss timeline from the per-month BP losses.
+
+rev_ltv weights every lost BP by the sum of its retention curve, wherever in
+the window it was lost. Here each month's losses form a cohort that keeps
+costing ARPU × retention[age] in calendar month cohort + age, so the timeline
+is the convolution of the loss series with the curve. Summed with no discount
+and no horizon cut it equals rev_ltv exactly.
+
+The convolution is a matmul against a banded (cohort × calendar month) kernel
+matrix per lever group that already carries the discount factors and the
+horizon cut. When both the window and the curve are long, FFT takes over.
+"""
+import numpy as np
+
+import model
+
+
+# Lever group -> (per-month loss column, model retention curve name). Repeat
+# uses the activation curve as its LTV proxy, as in model.LTV_MULT_REPEAT.
+# Curves are looked up at call time so a model.refresh() is picked up.
+GROUPS = {
+    "activation": ("total_activation_loss", "ACTIVATION_RETENTION"),
+    "active_rescue": ("active_rescue_loss", "ACTIVE_RESCUE_RETENTION"),
+    "inactive_rescue": ("inactive_rescue_loss", "INACTIVE_RESCUE_RETENTION"),
+    "repeat": ("repeat_bp_loss", "ACTIVATION_RETENTION"),
+}
+GROUP_LABELS = {
+    "activation": "Activation",
+    "active_rescue": "Active Rescue",
+    "inactive_rescue": "Inactive Rescue",
+    "repeat": "Repeat",
+}
+
+TAIL_FIT_MONTHS = 3  # last month-over-month ratios averaged for the tail
+FFT_MIN_LENGTH = 128  # use FFT once both window and curve are at least this long
+
+
+def extend_curve(curve, n_ages, tail_fit=TAIL_FIT_MONTHS):
+    """`curve` cut or extended to `n_ages` points.
+
+    Ages past the measured curve decay geometrically at the mean
+    month-over-month ratio of its last `tail_fit` steps.
+    """
+    curve = np.asarray(curve, dtype=float)
+    if n_ages <= len(curve):
+        return curve[:n_ages]
+    tail = curve[-tail_fit - 1:]
+    ratio = np.mean(tail[1:] / tail[:-1])
+    return np.concatenate([curve, curve[-1] * ratio ** np.arange(1, n_ages - len(curve) + 1)])
+
+
+def discount_factors(n_months, annual_rate=0.0):
+    """Present-value factor for each calendar month, month 0 undiscounted."""
+    return (1.0 + annual_rate) ** (-np.arange(n_months) / 12)
+
+
+def default_curves():
+    """{group: current model retention curve}."""
+    data = model.current()
+    return {g: getattr(data, c) for g, (_, c) in GROUPS.items()}
+
+
+def _curves(curves, n_ages):
+    """(G, A) kernel stack in GROUPS order; A = longest curve unless `n_ages` is given."""
+    raw = list({**default_curves(), **(curves or {})}.values())
+    if n_ages is None:
+        n_ages = max(len(c) for c in raw)
+        # Ragged custom curves are zero-padded, not extrapolated
+        return np.stack([np.pad(np.asarray(c, dtype=float), (0, n_ages - len(c))) for c in raw])
+    return np.stack([extend_curve(c, n_ages) for c in raw])
+
+
+def _losses(cols):
+    """(G, n, M) absolute BP losses from run_scenarios or evaluate columns."""
+    return np.stack([np.atleast_2d(np.abs(cols[col])) for col, _ in GROUPS.values()])
+
+
+def _convolve(losses, kernels, horizon, weights, by_group):
+    """Σ_c losses[c] · kernels[t - c] · weights[t]: (n, horizon), or (G, n, horizon) by group."""
+    n_groups, n, n_cohorts = losses.shape
+    n_ages = kernels.shape[-1]
+    if min(n_cohorts, n_ages) >= FFT_MIN_LENGTH:
+        size = 1 << (n_cohorts + n_ages - 2).bit_length()
+        spec = np.fft.rfft(losses, size) * np.fft.rfft(kernels, size)[:, None, :]
+        if not by_group:
+            spec = spec.sum(axis=0)  # linear, so sum groups before the inverse
+        return np.fft.irfft(spec, size)[..., :horizon] * weights
+    # Banded matrix T[g, c, t] = kernel_g[t - c] · w[t]
+    age = np.arange(horizon)[None, :] - np.arange(n_cohorts)[:, None]
+    valid = (age >= 0) & (age < n_ages)
+    band = np.where(valid, kernels[:, np.clip(age, 0, n_ages - 1)], 0.0) * weights
+    if by_group:
+        return losses @ band
+    # All groups in one (n, G·M) @ (G·M, horizon) matmul
+    return losses.transpose(1, 0, 2).reshape(n, -1) @ band.reshape(-1, horizon)
+
+
+def revenue_timeline(cols, arpu, horizon=None, annual_discount=0.0, curves=None, by_group=False):
+    """LTV revenue lost per calendar month, counted from the first model month.
+
+    `cols` are per-month loss columns from run_scenarios ((n, M) arrays) or
+    evaluate (length-M arrays). `horizon` is the number of calendar months
+    kept; by default the timeline runs until the last cohort leaves the
+    curve. Curves are extrapolated when the horizon outruns them. `curves`
+    maps group names in GROUPS to replacement retention curves (e.g. 36–60
+    month ones).
+
+    Returns `timeline` (n, horizon) and `total` (n,), in positive dollars,
+    plus `by_group` {group: (n, horizon)} when `by_group` is set.
+    """
+    losses = _losses(cols)
+    n_cohorts = losses.shape[-1]
+    kernels = _curves(curves, horizon)
+    if horizon is None:
+        horizon = n_cohorts + kernels.shape[-1] - 1
+    disc = discount_factors(horizon, annual_discount)
+    arpu = np.asarray(arpu, dtype=float).reshape(-1, 1)
+    out = {}
+    if by_group:
+        groups = _convolve(losses, kernels, horizon, disc, by_group=True) * arpu
+        out["by_group"] = dict(zip(GROUPS, groups))
+        timeline = groups.sum(axis=0)
+    else:
+        timeline = _convolve(losses, kernels, horizon, disc, by_group=False) * arpu
+    out["timeline"] = timeline
+    out["total"] = timeline.sum(axis=-1)
+    return out
+
+
+def cohort_matrix(cols, arpu, n_ages=None, annual_discount=0.0, curves=None):
+    """Revenue lost by (cohort month, age), all groups summed: shape (n, M, A).
+
+    Anti-diagonals (cohort + age = t) sum to revenue_timeline's month t.
+    """
+    losses = _losses(cols)
+    kernels = _curves(curves, n_ages)
+    n_cohorts, n_ages = losses.shape[-1], kernels.shape[-1]
+    calendar = np.arange(n_cohorts)[:, None] + np.arange(n_ages)[None, :]
+    disc = discount_factors(n_cohorts + n_ages - 1, annual_discount)[calendar]
+    mat = np.einsum("gnc,ga->nca", losses, kernels) * disc
+    return np.asarray(arpu, dtype=float).reshape(-1, 1, 1) * mat
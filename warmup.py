@@ -0,0 +1,173 @@
+"""Daily stochastic simulation of the IP warmup, feeding failure probability and severity.
+
+Each IP ramps its daily volume geometrically from `start_volume` to
+`target_volume` over `ramp_days`, split across mailbox providers by share.
+Every (path, IP, provider) cell climbs the ramp one step per clean day:
+
+- complaints and bounces are binomial draws on the day's volume, at the
+  provider's base rates scaled by a per-path list-quality shock (shared by
+  all IPs) and daily noise; bounces run higher while an IP is still cold
+- above THROTTLE_SHARE of either limit the provider throttles: the cell
+  holds its volume for the day
+- above a limit the cell backs off BACKOFF_STEPS steps and takes a strike;
+  MAX_STRIKES strikes block the IP at that provider for BLOCK_DAYS, after
+  which it restarts the ramp from the bottom
+
+A path's completion is the share of target volume its cells can send when
+the `days`-day schedule ends; it fails below FAILURE_COMPLETION. All paths,
+IPs and providers advance together, one vectorized step per day.
+
+    res = simulate(n_ips=4, days=90)
+    res["failure_prob"], res["severity"]
+    inputs = apply(res, inputs)   # completion and depressions for the model
+"""
+import numpy as np
+
+
+# Provider -> share of volume, base complaint and bounce rates, and the
+# rates at which the provider starts blocking
+PROVIDERS = {
+    "gmail":     {"share": 0.40, "complaint": 0.0008, "complaint_limit": 0.003, "bounce": 0.012, "bounce_limit": 0.05},
+    "microsoft": {"share": 0.25, "complaint": 0.0010, "complaint_limit": 0.003, "bounce": 0.015, "bounce_limit": 0.05},
+    "yahoo":     {"share": 0.20, "complaint": 0.0009, "complaint_limit": 0.003, "bounce": 0.012, "bounce_limit": 0.05},
+    "other":     {"share": 0.15, "complaint": 0.0006, "complaint_limit": 0.005, "bounce": 0.020, "bounce_limit": 0.08},
+}
+
+DEFAULT_PATHS = 2_000
+DEFAULT_IPS = 4
+DEFAULT_DAYS = 90
+DEFAULT_RAMP_DAYS = 60
+DEFAULT_TARGET_VOLUME = 500_000  # per IP per day
+DEFAULT_START_VOLUME = 2_000
+
+LIST_QUALITY_SIGMA = 0.35  # lognormal spread of the per-path list quality shock
+DAILY_SIGMA = 0.25  # lognormal day-to-day noise per cell
+COLD_BOUNCE_MULT = 0.5  # extra bounce rate on a cold IP, fading as it ramps
+THROTTLE_SHARE = 0.6
+BACKOFF_STEPS = 5
+MAX_STRIKES = 3
+BLOCK_DAYS = 14
+FAILURE_COMPLETION = 0.9
+EXACT_COUNT_BELOW = 25  # expected count under which draws are exact binomials, else normal
+
+# Depression the sidebar levers describe, as a share of volume lost at cutover
+REFERENCE_SEVERITY = 0.5
+MULTIPLIER_INPUTS = (
+    "in_signup_depression", "oon_embed_signup_depression", "m0_depression", "m1_plus_depression",
+    "active_rescue_depression", "inactive_rescue_depression",
+)
+BPS_INPUTS = ("repeat_depression_bps",)
+
+
+def ramp(start_volume, target_volume, ramp_days):
+    """Daily volume at each ramp step 0…ramp_days, geometric from start to target."""
+    if not 0 < start_volume <= target_volume:
+        raise ValueError("volumes must satisfy 0 < start_volume <= target_volume")
+    return start_volume * (target_volume / start_volume) ** (np.arange(ramp_days + 1) / ramp_days)
+
+
+def _provider_arrays(providers):
+    names = tuple(providers)
+    cols = {k: np.array([float(providers[p][k]) for p in names]) for k in PROVIDERS["gmail"]}
+    if np.any(cols["share"] < 0) or not np.isclose(cols["share"].sum(), 1.0):
+        raise ValueError("provider shares must be non-negative and sum to 1")
+    return names, cols
+
+
+def _counts(rng, n, p, z):
+    """Binomial(n, p) draws: normal approximation from `z` where n·p is large, exact elsewhere."""
+    mean = n * p
+    out = np.maximum(np.rint(mean + np.sqrt(mean * (1.0 - p)) * z), 0.0)
+    small = mean < EXACT_COUNT_BELOW
+    out[small] = rng.binomial(n[small], p[small])
+    return out
+
+
+def simulate(n_ips=DEFAULT_IPS, days=DEFAULT_DAYS, ramp_days=DEFAULT_RAMP_DAYS,
+             target_volume=DEFAULT_TARGET_VOLUME, start_volume=DEFAULT_START_VOLUME,
+             stagger_days=0, providers=None, n_paths=DEFAULT_PATHS, seed=0):
+    """Run `n_paths` warmups of `n_ips` IPs over a `days`-day schedule.
+
+    IP i starts ramping on day i·stagger_days. Returns per-path `completion`
+    and `failed`, their summaries `failure_prob`, `completion_pct` and
+    `severity` (mean volume shortfall of the failed paths), `done_by_day`
+    (share of paths fully ramped by each day), `volume` (mean daily volume
+    sent per provider, (days, providers)) and `breaches` (mean limit breaches
+    per path, per provider).
+    """
+    if n_ips < 1 or n_paths < 1:
+        raise ValueError("need at least one IP and one path")
+    if not 1 <= ramp_days <= days:
+        raise ValueError("ramp_days must lie in 1…days")
+    names, prov = _provider_arrays(PROVIDERS if providers is None else providers)
+    steps = ramp(start_volume, target_volume, ramp_days)
+    rng = np.random.default_rng(seed)
+
+    shape = (n_paths, n_ips, len(names))
+    share, limit_c, limit_b = prov["share"], prov["complaint_limit"], prov["bounce_limit"]
+    quality = rng.lognormal(0.0, LIST_QUALITY_SIGMA, (n_paths, 1, 1))
+    base_c = np.clip(prov["complaint"] * quality, 0.0, 1.0)
+    base_b = prov["bounce"] * quality
+    start_day = (np.arange(n_ips) * stagger_days)[None, :, None]
+
+    k = np.zeros(shape, dtype=np.intp)       # ramp step per cell
+    strikes = np.zeros(shape, dtype=np.int8)
+    blocked_until = np.zeros(shape, dtype=np.intp)
+    breaches = np.zeros(len(names))
+    volume = np.zeros((days, len(names)))
+    done_by_day = np.zeros(days)
+    for day in range(days):
+        active = (day >= start_day) & (day >= blocked_until)
+        sent = np.where(active, steps[k] * share, 0.0)
+        n = np.rint(sent).astype(np.int64)
+        z = rng.standard_normal((4,) + shape)
+        noise = np.exp(DAILY_SIGMA * z[:2])
+        cold = 1.0 + COLD_BOUNCE_MULT * (1.0 - k / ramp_days)
+        complaints = _counts(rng, n, np.clip(base_c * noise[0], 0.0, 1.0), z[2])
+        bounces = _counts(rng, n, np.clip(base_b * cold * noise[1], 0.0, 1.0), z[3])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pressure = np.where(n > 0, np.maximum(complaints / limit_c, bounces / limit_b) / n, 0.0)
+
+        breach = active & (pressure > 1.0)
+        clean = active & (pressure <= THROTTLE_SHARE)
+        k = np.where(breach, np.maximum(k - BACKOFF_STEPS, 0), np.where(clean, np.minimum(k + 1, ramp_days), k))
+        strikes += breach
+        block = strikes >= MAX_STRIKES
+        blocked_until[block] = day + 1 + BLOCK_DAYS
+        k[block], strikes[block] = 0, 0
+        breaches += breach.sum(axis=(0, 1))
+        volume[day] = sent.sum(axis=1).mean(axis=0)
+        done_by_day[day] = np.mean(np.all((k == ramp_days) & (blocked_until <= day + 1), axis=(1, 2)))
+
+    capacity = np.where(blocked_until <= days, steps[k], 0.0) * share
+    completion = capacity.sum(axis=(1, 2)) / (n_ips * target_volume)
+    failed = completion < FAILURE_COMPLETION
+    return {
+        "providers": names,
+        "completion": completion,
+        "failed": failed,
+        "failure_prob": float(failed.mean()),
+        "completion_pct": float(100 * completion.mean()),
+        "severity": float(np.mean(1.0 - completion[failed])) if failed.any() else 0.0,
+        "done_by_day": done_by_day,
+        "volume": volume,
+        "breaches": breaches / n_paths,
+    }
+
+
+def apply(result, inputs, reference_severity=REFERENCE_SEVERITY):
+    """Model inputs driven by a simulation `result`.
+
+    completion_rate becomes the simulated success rate, so the model's
+    failure_prob is the simulated one. Each depression lever is scaled by
+    severity / reference_severity: the sidebar levers describe a failure
+    that loses `reference_severity` of send volume.
+    """
+    scale = result["severity"] / reference_severity
+    out = dict(inputs)
+    out["completion_rate"] = round(100 * (1 - result["failure_prob"]), 1)
+    for name in MULTIPLIER_INPUTS:
+        out[name] = float(np.clip(1 - (1 - inputs[name]) * scale, 0.0, 1.0))
+    for name in BPS_INPUTS:
+        out[name] = round(float(inputs[name] * scale), 1)
+    return out